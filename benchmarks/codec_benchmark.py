@@ -0,0 +1,60 @@
+#!env/bin/python3
+""" Microbenchmark of dynosql.codec against the original UNFLUFF decoder
+
+    python -m benchmarks.codec_benchmark [--items 1000] [--attributes 10] [--repeat 5]
+
+UNFLUFF only understands S and N values so the page decoded by both is made
+of those types only.
+"""
+import argparse
+import timeit
+
+from dynosql.codec import Codec
+from dynosql.helper_methods import UNFLUFF
+
+
+def make_page(items, attributes):
+    page = []
+    for i in range(items):
+        item = {'artist': {'S': 'Artist %d' % i}, 'song': {'S': 'Song %d' % i}}
+        for a in range(attributes):
+            if a % 3 == 0:
+                item['count_%d' % a] = {'N': str(i * a)}
+            elif a % 3 == 1:
+                item['ratio_%d' % a] = {'N': '%d.5' % a}
+            else:
+                item['label_%d' % a] = {'S': 'label %d' % a}
+        page.append(item)
+    return {'Items': page}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--attributes', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    page = make_page(args.items, args.attributes)
+    hints = {name: 'int' if name.startswith('count') else 'float' if name.startswith('ratio') else 'str'
+             for name in page['Items'][0]}
+    inferred = Codec()
+    hinted = Codec(hints)
+    assert inferred.decode_items(page['Items']) == UNFLUFF(page)
+
+    candidates = [
+        ('UNFLUFF', lambda: UNFLUFF(page)),
+        ('Codec', lambda: inferred.decode_items(page['Items'])),
+        ('Codec with type hints', lambda: hinted.decode_items(page['Items'])),
+    ]
+    baseline = None
+    print('decoding %d items with %d attributes' % (args.items, args.attributes + 2))
+    for name, function in candidates:
+        seconds = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        baseline = baseline or seconds
+        print('%-24s %8.2f ms  %6.0f items/ms  %5.2fx' % (
+            name, seconds * 1000, args.items / (seconds * 1000), baseline / seconds))
+
+
+if __name__ == '__main__':
+    main()
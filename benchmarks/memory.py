@@ -0,0 +1,107 @@
+#!env/bin/python3
+""" Memory used by materialised scan results
+
+    python -m benchmarks.memory [--rows 100000] [--endpoint-url URL] [--output memory.json]
+
+Scans a table of --rows records into a list, once as dicts (what iterating a
+result yields by default) and once as CompactRecords (result.compact()), and
+reports the bytes each representation keeps alive per record along with the
+peak allocated while scanning. Also reports the size of lazy DynoRecord
+references. Memory is measured with tracemalloc, every shape of
+benchmarks.suite is run.
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.suite import SHAPES, QUICK_SHAPES, make_record
+from dynosql.adapters.memory import InMemoryAdapter
+from dynosql.dyno_record import DynoRecord
+from dynosql.dynosql import Dynosql
+
+
+def measure(build):
+    """ Bytes still allocated by what build returns, and the peak while building it
+
+    Returns:
+    tuple: (retained bytes, peak bytes, the built object)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        built = build()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current - before, peak - before, built
+
+
+def run(dyno, shapes, rows):
+    results = {}
+    for attributes, value_size in shapes:
+        declared = {name: 'int' if name.startswith('number') else 'str'
+                    for name in make_record(attributes, value_size)}
+        table = dyno(table_name='benchmark_memory', partition_key=('id', 'int'), **declared)
+        try:
+            table.extend((dict(make_record(attributes, value_size, i), id=i) for i in range(rows)), max_workers=4)
+            suffix = '[attributes=%d,value_size=%d]' % (attributes, value_size)
+            for name, build in (('scan.dicts', lambda: list(table.scan())),
+                                ('scan.compact', lambda: list(table.scan().compact())),
+                                ('records.lazy', lambda: [DynoRecord(table.adapter, table.table_name, i)
+                                                          for i in range(rows)])):
+                retained, peak, built = measure(build)
+                assert len(built) == rows, len(built)
+                del built
+                results[name + suffix] = {
+                    'bytes_per_record': retained / rows,
+                    'peak_bytes': peak,
+                    'params': {'rows': rows, 'attributes': attributes, 'value_size': value_size},
+                }
+        finally:
+            table.drop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint, an InMemoryAdapter is used when omitted')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--quick', action='store_true', help='one item shape and 10000 rows')
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    if args.endpoint_url:
+        dyno = Dynosql(endpoint_url=args.endpoint_url)
+    else:
+        dyno = Dynosql(adapter=InMemoryAdapter())
+    shapes = QUICK_SHAPES if args.quick else SHAPES
+    rows = 10000 if args.quick else args.rows
+
+    results = run(dyno, shapes, rows)
+    for name, measurement in sorted(results.items()):
+        print('%-50s %10.0f bytes/record  %12.0f peak bytes' % (
+            name, measurement['bytes_per_record'], measurement['peak_bytes']))
+
+    if args.output:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'adapter': args.endpoint_url or 'memory',
+                'timestamp': time.time(),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
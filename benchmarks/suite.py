@@ -0,0 +1,225 @@
+#!env/bin/python3
+""" Benchmark suite for the dynosql client stack
+
+    python -m benchmarks.suite [--endpoint-url URL] [--quick] [--output results.json]
+                               [--baseline baseline.json] [--tolerance 0.25] [--only get]
+
+Microbenchmarks time single calls of key building, encoding and decoding.
+Throughput runs time DynoTable get/put/update/delete, extend and filter
+against an InMemoryAdapter, or DynamoDB Local when --endpoint-url is given.
+Every benchmark is run for each item shape (attribute count x value size).
+
+Results are written as JSON. When a baseline file is given the results are
+compared with it and the exit status is 1 if any benchmark got slower than
+the tolerance allows, so a stored baseline can gate a release:
+
+    python -m benchmarks.suite --output benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from dynosql.adapters.memory import InMemoryAdapter
+from dynosql.codec import Codec, encode_item
+from dynosql.dynosql import Dynosql
+from dynosql.helper_methods import UNFLUFF
+
+
+# (attribute count, bytes per string value)
+SHAPES = [(5, 16), (50, 16), (5, 1024)]
+QUICK_SHAPES = [(5, 16)]
+
+
+def make_record(attributes, value_size, i=0):
+    record = {}
+    for a in range(attributes):
+        if a % 2:
+            record['number_%d' % a] = i * a
+        else:
+            record['label_%d' % a] = ('%d-' % i).ljust(value_size, 'x')
+    return record
+
+
+def measure(function, number, repeat):
+    """ Best time of repeat runs of number calls
+
+    Returns:
+    float: seconds per call
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def result(seconds, **params):
+    return {'seconds_per_op': seconds, 'ops_per_second': 1 / seconds if seconds else None, 'params': params}
+
+
+def micro_benchmarks(dyno, shape, number, repeat):
+    attributes, value_size = shape
+    results = {}
+    adapter = dyno.adapter
+    table = dyno(table_name='benchmark_keys', partition_key=('artist', 'str'), sort_key=('song', 'str'))
+    try:
+        results['get_keys.cached'] = result(measure(
+            lambda: adapter._get_keys('benchmark_keys', ('Prince', 'Kiss')), number, repeat))
+        keys = iter([('Prince', 'Song %d' % i) for i in range(number * repeat + 1)])
+        results['get_keys.uncached'] = result(measure(
+            lambda: adapter._get_keys('benchmark_keys', next(keys)), number, repeat))
+    finally:
+        table.drop()
+
+    record = make_record(attributes, value_size)
+    results['encode_item'] = result(measure(lambda: encode_item(record), number, repeat))
+
+    # UNFLUFF only understands S and N values, which is all make_record produces
+    page = {'Items': [encode_item(make_record(attributes, value_size, i)) for i in range(100)]}
+    codec = Codec()
+    pages = max(number // len(page['Items']), 1)
+    results['decode.unfluff'] = result(measure(lambda: UNFLUFF(page), pages, repeat) / len(page['Items']))
+    results['decode.codec'] = result(measure(lambda: codec.decode_items(page['Items']), pages, repeat) /
+                                     len(page['Items']))
+    return results
+
+
+def throughput_benchmarks(dyno, shape, count, repeat):
+    attributes, value_size = shape
+    results = {}
+    records = [make_record(attributes, value_size, i) for i in range(count)]
+    table = dyno(table_name='benchmark_music', partition_key=('artist', 'str'), sort_key=('song', 'str'))
+
+    def timed(name, function, setup=None):
+        best = None
+        for _ in range(repeat):
+            if setup is not None:
+                # outside the timed region, e.g. repopulating the table before each delete pass
+                setup()
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = result(best / count, count=count)
+
+    def put():
+        for i, record in enumerate(records):
+            table['Prince', 'Song %d' % i] = record
+
+    def get():
+        for i in range(count):
+            table['Prince', 'Song %d' % i].json
+
+    def update():
+        for i in range(count):
+            table['Prince', 'Song %d' % i]['number_1'] = i
+
+    def delete():
+        for i in range(count):
+            del table['Prince', 'Song %d' % i]
+
+    def extend():
+        table.extend(dict(record, artist='Prince', song='Song %d' % i) for i, record in enumerate(records))
+
+    def scan_filter():
+        matched = sum(1 for _ in table.filter(table.number_1 >= 0))
+        assert matched == count, matched
+
+    try:
+        timed('table.put', put)
+        timed('table.get', get)
+        timed('table.update', update)
+        timed('table.filter', scan_filter)
+        timed('table.delete', delete, setup=put)
+        timed('table.extend', extend)
+    finally:
+        table.drop()
+    return results
+
+
+def run(dyno, shapes, number, count, repeat, only=None):
+    results = {}
+    for shape in shapes:
+        suffix = '[attributes=%d,value_size=%d]' % shape
+        for group in (micro_benchmarks(dyno, shape, number, repeat),
+                      throughput_benchmarks(dyno, shape, count, repeat)):
+            for name, measurement in group.items():
+                if only and only not in name:
+                    continue
+                measurement['params'].update(attributes=shape[0], value_size=shape[1])
+                results[name + suffix] = measurement
+    return results
+
+
+def compare(baseline, results, tolerance):
+    """ Benchmarks slower than the baseline by more than tolerance
+
+    Parameters:
+    baseline (dict): results of an earlier run
+    results (dict): results of this run
+    tolerance (float): allowed slowdown, 0.25 allows a 25% slower time per op
+
+    Returns:
+    list: of (name, baseline seconds, current seconds) tuples
+    """
+    regressions = []
+    for name, measurement in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if measurement['seconds_per_op'] > previous['seconds_per_op'] * (1 + tolerance):
+            regressions.append((name, previous['seconds_per_op'], measurement['seconds_per_op']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--endpoint-url', help='DynamoDB endpoint, an InMemoryAdapter is used when omitted')
+    parser.add_argument('--quick', action='store_true', help='one item shape and fewer iterations')
+    parser.add_argument('--only', help='only run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare with the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    if args.endpoint_url:
+        dyno = Dynosql(endpoint_url=args.endpoint_url)
+    else:
+        dyno = Dynosql(adapter=InMemoryAdapter())
+    shapes = QUICK_SHAPES if args.quick else SHAPES
+    number, count = (1000, 100) if args.quick else (10000, 500)
+
+    results = run(dyno, shapes, number, count, args.repeat, only=args.only)
+    for name, measurement in sorted(results.items()):
+        print('%-60s %12.2f us/op  %12.0f ops/s' % (
+            name, measurement['seconds_per_op'] * 1e6, measurement['ops_per_second'] or 0))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'adapter': args.endpoint_url or 'memory',
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(baseline, results, args.tolerance)
+        for name, before, after in regressions:
+            print('REGRESSION %s: %.2f us/op -> %.2f us/op (%+.0f%%)' % (
+                name, before * 1e6, after * 1e6, (after / before - 1) * 100))
+        if regressions:
+            return 1
+        print('no regressions against %s' % args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+""" Command line tools for dynosql
+
+    python -m dynosql load TABLE PATH [--format csv|jsonl] [--workers 8] [--endpoint-url URL]
+                                      [--region-name REGION] [--checkpoint PATH | --no-checkpoint]
+
+load streams a CSV or JSON lines file into an existing table, see Loader.
+Run the same command again after a failure to resume from the checkpoint.
+"""
+import argparse
+import json
+import logging
+import sys
+
+from dynosql.dynosql import Dynosql
+
+logger = logging.getLogger(__name__)
+
+
+def load(args):
+    options = {'region_name': args.region_name} if args.region_name else {}
+    dyno = Dynosql(endpoint_url=args.endpoint_url, **options)
+    checkpoint = False if args.no_checkpoint else args.checkpoint or True
+    stats = dyno.table(args.table).load(args.path, format=args.format, workers=args.workers, checkpoint=checkpoint)
+    print(json.dumps(stats))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m dynosql', description=__doc__.split('\n')[1])
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    loader = commands.add_parser('load', help='bulk load a CSV or JSON lines file into a table')
+    loader.add_argument('table')
+    loader.add_argument('path')
+    loader.add_argument('--format', choices=('csv', 'jsonl'), help='guessed from the file extension when omitted')
+    loader.add_argument('--workers', type=int, default=4, help='concurrent BatchWriteItem workers')
+    loader.add_argument('--endpoint-url', help='DynamoDB endpoint, the AWS endpoint of the region when omitted')
+    loader.add_argument('--region-name')
+    loader.add_argument('--checkpoint', help="checkpoint file, defaults to PATH + '.checkpoint'")
+    loader.add_argument('--no-checkpoint', action='store_true', help='always load the whole file')
+    loader.add_argument('-v', '--verbose', action='store_true', help='log progress')
+    loader.set_defaults(run=load)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s:%(name)s:%(levelname)s - %(message)s')
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import asyncio
+import functools
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from dynosql.adapters.botocore import BotocoreAdapter
+from dynosql.async_dyno_result import AsyncDynoResult
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBotocoreAdapter(object):
+    """ asyncio front end to BotocoreAdapter
+
+    Every operation is delegated to a BotocoreAdapter, so key encoding,
+    expressions and decoding are exactly the ones used by the sync API. The
+    blocking botocore calls run on a dedicated thread pool and a semaphore
+    caps how many requests are in flight at once.
+
+    Parameters:
+    adapter (BotocoreAdapter): adapter to delegate to, one is created when omitted
+    max_concurrency (int): maximum number of concurrent requests
+    """
+    def __init__(self, adapter=None, max_concurrency=10, **adapter_options):
+        self.adapter = adapter or BotocoreAdapter(**adapter_options)
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='dynosql')
+        self._semaphore = None
+        logger.info('initialised async botocore...')
+
+
+    @property
+    def semaphore(self):
+        # created on first use so that it belongs to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+    async def run(self, function, *args, **kwargs):
+        """ Runs a blocking call on the adapter's thread pool
+        """
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+
+
+    async def create_table(self, table_name, partition_key=None, sort_key=None, **attributes):
+        return await self.run(self.adapter.create_table, table_name, partition_key=partition_key,
+                              sort_key=sort_key, **attributes)
+
+
+    def bind_table(self, table_name, **attributes):
+        # no request is made, the key schema is described by the first operation that needs it
+        self.adapter.bind_table(table_name, **attributes)
+
+
+    async def describe_table(self, table_name):
+        return await self.run(self.adapter.describe_table, table_name)
+
+
+    async def delete_table(self, table_name):
+        return await self.run(self.adapter.delete_table, table_name)
+
+
+    async def list_tables(self):
+        return await self.run(self.adapter.list_tables)
+
+
+    async def warm_up(self, connections=None):
+        return await self.run(self.adapter.warm_up, connections)
+
+
+    async def get_item(self, table_name, primary_key, attributes=None):
+        return await self.run(self.adapter.get_item, table_name, primary_key, attributes=attributes)
+
+
+    async def put_item(self, table_name, primary_key, attributes):
+        return await self.run(self.adapter.put_item, table_name, primary_key, attributes)
+
+
+    async def update(self, table_name, primary_key, update, return_values='NONE', condition=None):
+        return await self.run(self.adapter.update, table_name, primary_key, update, return_values=return_values,
+                              condition=condition)
+
+
+    async def delete_item(self, table_name, primary_key):
+        return await self.run(self.adapter.delete_item, table_name, primary_key)
+
+
+    async def batch_get(self, table_name, primary_keys, attributes=None, default=None):
+        return await self.run(self.adapter.batch_get, table_name, list(primary_keys),
+                              attributes=attributes, default=default)
+
+
+    async def batch_write(self, table_name, items, max_workers=1):
+        return await self.run(self.adapter.batch_write, table_name, items, max_workers=max_workers)
+
+
+    def filter(self, table_name, filter_expression=None, page_size=None, limit=None, parallel=None):
+        # planned on the thread pool when first consumed, see AsyncDynoResult
+        return AsyncDynoResult(self, table_name, functools.partial(
+            self.adapter.filter, table_name, filter_expression, page_size=page_size, limit=limit, parallel=parallel))
+
+
+    def query(self, table_name, partition_key, sort_key=None, begins_with=None, reverse=False, page_size=None, limit=None):
+        return AsyncDynoResult(self, table_name, functools.partial(
+            self.adapter.query, table_name, partition_key, sort_key=sort_key, begins_with=begins_with,
+            reverse=reverse, page_size=page_size, limit=limit))
+
+
+    async def pages(self, result):
+        """ Iterates the pages of a DynoResult, fetching each page on the thread pool
+
+        Parameters:
+        result (DynoResult): built by the sync adapter's filter, scan or query
+
+        Returns:
+        async generator: of lists of records
+        """
+        pages = result.pages()
+        try:
+            while True:
+                page = await self.run(next, pages, None)
+                if page is None:
+                    return
+                yield page
+        finally:
+            try:
+                pages.close()
+            except ValueError:
+                # cancelled while a page is being fetched on the pool, the
+                # generator is closed when it is garbage collected instead
+                pass
+
+
+    def close(self):
+        self.executor.shutdown(wait=False)
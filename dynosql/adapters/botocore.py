@@ -1,6 +1,21 @@
 import botocore
-import botocore.session
+import decimal
+import itertools
 import logging
+import queue
+import random
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dynosql.adapters.client_registry import CLIENTS, ClientRegistry
+from dynosql.adapters.table_metadata import TABLE_METADATA
+from dynosql.codec import Codec, KeyEncoder
+from dynosql.dyno_result import DynoResult
+from dynosql.expressions import RENDER_PATH, Condition, UpdateExpression
+from dynosql.query_plan import QueryPlan
+from dynosql.instrumentation import Instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +25,7 @@ DYNAMODB_DATATYPES_LOOKUP = {
    'int': 'N',
    'float': 'N',
    'long': 'N',
-   # binary - TODO
+   'bytes': 'B',
    'dict': 'M', # Document Types
    'list': 'L'
    # Set Types - TODO
@@ -19,7 +34,7 @@ DYNAMODB_DATATYPES_LOOKUP = {
 
 DYNAMODB_DATATYPES_LOOKUP2 = {
    'S': 'str', # Scalar Types
-   # binary - TODO
+   'B': 'bytes',
    'M': 'dict', # Document Types
    'L': 'list',
    'N': 'int',
@@ -27,195 +42,463 @@ DYNAMODB_DATATYPES_LOOKUP2 = {
    # string set, number set, and binary set.
 }
 
-# Functions: attribute_exists | attribute_not_exists | attribute_type | contains | begins_with | size These function names are case-sensitive.
-# Comparison operators: = | <> | < | > | <= | >= | BETWEEN | IN
-# Logical operators: AND | OR | NOT
-DYNAMODB_EXPRESSION_LOOKUP = {
-    '!=': '<>',
-    '==': '=',
-    '<': '<',
-    '>': '>',
-    '<=': '<=',
-    '>=': '>='
+# BatchWriteItem accepts at most 25 put/delete requests per call
+BATCH_WRITE_SIZE = 25
+# BatchGetItem accepts at most 100 keys per call
+BATCH_GET_SIZE = 100
+BATCH_RETRIES = 8
+
+# capacity each operation consumes, used to pick the RateLimiter bucket
+OPERATION_CAPACITY = {
+    'get_item': 'read',
+    'batch_get_item': 'read',
+    'query': 'read',
+    'scan': 'read',
+    'put_item': 'write',
+    'update_item': 'write',
+    'delete_item': 'write',
+    'batch_write_item': 'write',
 }
+THROTTLING_ERRORS = ('ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded')
 
-ATTRIBUTE_VALUES = 'abcdefghijklmnopqrstuvwxyz'
 
+def BACKOFF(attempt, base=0.05, cap=5.0):
+    """ Exponential backoff with full jitter
 
+    Parameters:
+    attempt (int): number of retries made so far, starting at 1
 
-def DYNAMODB_DATATYPES_REVERSE_LOOKUP(db_type, value=None):
-    """ Convert dynamodb datatypes into python datatypes
+    Returns:
+    float: seconds to sleep before the next retry
     """
-    lookup = {
-       'S': str, # Scalar Types
-       # binary - TODO
-       'M': dict, # Document Types
-       'L': list
-       # Set Types - TODO
-       # string set, number set, and binary set.
-    }
-    if db_type in ('S', 'M', 'L'):
-        return lookup[db_type]
-    elif db_type == 'N':
-        if value.isdigit():
-            return int
-        else:
-            try:
-                float(value)
-                return float
-            except ValueError as e:
-                return str
+    return random.uniform(0, min(cap, base * 2 ** attempt))
 
 
-def UNFLUFF(fluff):
-    """ Removes the
+class ScanSegmentError(Exception):
+    """ Raised when one segment of a parallel scan fails, the other segments are cancelled
+    """
+    def __init__(self, segment, error):
+        super(ScanSegmentError, self).__init__('Scan segment %d failed: %s' % (segment, error))
+        self.segment = segment
+        self.error = error
 
-    Paramters:
-    fluff (dict): dictionary value of record returned from DynamoDB
 
-    Returns:
-    dict: Returns unfluffed  response from DynamoDB
+class ConditionFailedError(Exception):
+    """ Raised when the ConditionExpression of a conditional write doesn't hold, nothing was written
     """
-    try:
-        return [{
-            k: DYNAMODB_DATATYPES_REVERSE_LOOKUP(
-                list(v)[0],
-                list(v.values())[0])(list(v.values())[0])
-            for k, v in x.items()
-        } for x in fluff['Items']]
-    except KeyError:
-        return {
-            k: DYNAMODB_DATATYPES_REVERSE_LOOKUP(
-                list(v)[0],
-                list(v.values())[0])(list(v.values())[0])
-            for k, v in fluff['Item'].items()
-        }
+    def __init__(self, table_name, primary_key):
+        super(ConditionFailedError, self).__init__('Condition failed for %s %s' % (table_name, primary_key))
+        self.table_name = table_name
+        self.primary_key = primary_key
+
+
+def CONSUMED_UNITS(response):
+    """ Capacity units reported by a response made with ReturnConsumedCapacity, batch
+        operations report a list with an entry per table
+    """
+    consumed = response.get('ConsumedCapacity') or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(entry.get('CapacityUnits', 0) for entry in consumed)
+
+
+def CHUNKS(iterable, size):
+    """ Lazily splits an iterable into lists of at most size elements
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 
 class BotocoreAdapter(object):
 
-    def __init__(self, endpoint_url='http://localhost:8000/'):
-        session = botocore.session.get_session()
-        self.client = session.create_client('dynamodb', endpoint_url=endpoint_url)
+    def __init__(self, endpoint_url='http://localhost:8000/', shared_client=True, client=None, metadata=None,
+                 **client_options):
+        """ Parameters:
+        endpoint_url (string):
+        shared_client (bool): reuse the process-wide client for this endpoint and configuration
+        client: use this DynamoDB client instead of creating one
+        metadata (TableMetadata): cache of table descriptions, defaults to the process-wide TABLE_METADATA
+        client_options (dict): connection pool, timeout and retry options, see ClientRegistry.get
+        """
+        registry = CLIENTS if shared_client else ClientRegistry()
+        self.client = client if client is not None else registry.get(endpoint_url, **client_options)
+        self.client_options = registry.options(**client_options)
+        self.metadata = metadata if metadata is not None else TABLE_METADATA
+        # descriptions are only shared between adapters talking to the same endpoint and region
+        self.metadata_scope = '{} {}'.format(endpoint_url, self.client_options['region_name'])
         self.tables = {}
+        self.instrumentation = Instrumentation()
         logger.info('initialised botocore...')
 
 
+    def warm_up(self, connections=None):
+        """ Open pooled HTTP connections ahead of time
+
+        Issues concurrent ListTables requests so the first real requests don't
+        pay for TCP and TLS handshakes.
+
+        Parameters:
+        connections (int): number of connections to open, defaults to max_pool_connections
+
+        Return:
+        int: number of requests that succeeded
+        """
+        connections = connections or self.client_options['max_pool_connections']
+        def ping(_):
+            try:
+                self._call('list_tables', None, Limit=1)
+                return 1
+            except Exception as error:
+                logger.warning('warm up request failed: %s', error)
+                return 0
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            return sum(executor.map(ping, range(connections)))
+
+
+    def set_rate_limiter(self, table_name, rate_limiter, throughput=None):
+        """ Paces every request made for a table
+
+        Parameters:
+        table_name (string):
+        rate_limiter (RateLimiter): None removes the limiter
+        throughput (dict): ProvisionedThroughput of the table, used for rates the limiter doesn't set
+        """
+        if rate_limiter is not None:
+            rate_limiter.provision(throughput)
+        self.tables.setdefault(table_name, {})['rate_limiter'] = rate_limiter
+
+
+    def rate_limiter(self, table_name):
+        return self.tables.get(table_name, {}).get('rate_limiter')
+
+
+    def _call(self, operation, table_name, **params):
+        """ Calls a client method, paced by the table's RateLimiter and reported to instrumentation
+
+        Without a limiter or instrumentation callbacks this is a plain client call.
+        Otherwise data operations ask for ReturnConsumedCapacity. With a limiter the
+        request waits for tokens and is charged what it consumed, throttled requests
+        cut the limiter's rate and are retried with backoff. Requests botocore had to
+        retry itself before they succeeded cut the rate once per retry as well.
+
+        Parameters:
+        operation (string): name of the client method
+        table_name (string): None for operations that aren't about one table
+        params: arguments for the client method
+
+        Returns:
+        dict: the client response
+        """
+        method = getattr(self.client, operation)
+        limiter = self.rate_limiter(table_name)
+        instrumented = self.instrumentation.enabled
+        if limiter is None and not instrumented:
+            return method(**params)
+
+        kind = OPERATION_CAPACITY.get(operation)
+        if kind is None:
+            limiter = None
+        else:
+            params['ReturnConsumedCapacity'] = 'TOTAL'
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire(kind)
+            try:
+                response = method(**params)
+            except Exception as e:
+                code = e.response.get('Error', {}).get('Code') if isinstance(e, botocore.exceptions.ClientError) \
+                    else type(e).__name__
+                if limiter is not None:
+                    # rejected requests consume nothing, refund the estimate
+                    limiter.consume(kind, 0.0, estimate=1.0)
+                    if code in THROTTLING_ERRORS:
+                        limiter.throttled(kind)
+                        if attempt < BATCH_RETRIES:
+                            attempt += 1
+                            time.sleep(BACKOFF(attempt))
+                            continue
+                if instrumented:
+                    self._emit(operation, table_name, params, None, started, attempt, code)
+                raise
+            if limiter is not None:
+                limiter.consume(kind, CONSUMED_UNITS(response), estimate=1.0)
+                # throttles botocore retried successfully never reach the except above
+                for _ in range(response.get('ResponseMetadata', {}).get('RetryAttempts', 0)):
+                    limiter.throttled(kind)
+            if instrumented:
+                self._emit(operation, table_name, params, response, started, attempt)
+            return response
+
+
+    def _emit(self, operation, table_name, request, response, started, attempt, error=None):
+        response = response or {}
+        metadata = response.get('ResponseMetadata', {})
+        consumed = response.get('ConsumedCapacity')
+        self.instrumentation.emit({
+            'operation': operation,
+            'table': table_name,
+            'latency': time.perf_counter() - started,
+            'items': Instrumentation.count_items(operation, request, response),
+            'bytes': int(metadata.get('HTTPHeaders', {}).get('content-length', 0)),
+            'consumed_capacity': CONSUMED_UNITS(response) if consumed is not None else None,
+            'retries': attempt + metadata.get('RetryAttempts', 0),
+            'error': error,
+        })
+
+
     def _get_keys(self, table_name, primary_key):
         """
         Returns {'artist': {'S': 'Michael Jackson'}}
         """
-        logger.info(table_name)
-        logger.info(self.tables)
-        try:
-            partition_key_value, sort_key_value = primary_key
-            keys = {
-                self.tables[table_name]['partition_key'][0]: {
-                    DYNAMODB_DATATYPES_LOOKUP[self.tables[table_name]['partition_key'][1]]: str(partition_key_value)
-                },
-                self.tables[table_name]['sort_key'][0]: {
-                    DYNAMODB_DATATYPES_LOOKUP[self.tables[table_name]['sort_key'][1]]: str(sort_key_value)
-                }
-            }
-        except ValueError:
-            partition_key_value, sort_key_value = (primary_key, None,)
-            keys = {
-                self.tables[table_name]['partition_key'][0]: {
-                    DYNAMODB_DATATYPES_LOOKUP[self.tables[table_name]['partition_key'][1]]: str(partition_key_value)
-                }
-            }
-        except TypeError:
-            raise KeyError('Table was not defined with a sort key')
-        logger.info(keys)
-        return keys
+        return self._metadata(table_name)['key_encoder'].encode(primary_key)
+
+
+    def _metadata(self, table_name):
+        """ What the adapter knows about a table, tables bound without a create are
+            described the first time their key schema is needed
+        """
+        metadata = self.tables.get(table_name)
+        if metadata is None or 'key_encoder' not in metadata:
+            metadata = self.tables.setdefault(table_name, {})
+            metadata.setdefault('codec', Codec())
+            self._define_primary_key(table_name, self.describe_table(table_name))
+        return metadata
+
+
+    def describe_table(self, table_name):
+        """ Description of a table, served from the metadata cache when possible
+
+        Returns:
+        dict: the table description under 'Table', a cached description only holds
+            the key schema, indexes and provisioned throughput
+        """
+        description = self.metadata.get(self.metadata_scope, table_name)
+        if description is not None:
+            logger.debug('describe %s: cached', table_name)
+            return {'Table': description}
+        description = self._call('describe_table', table_name, TableName=table_name)
+        self.metadata.set(self.metadata_scope, table_name, description['Table'])
+        return description
+
+
+    def bind_table(self, table_name, **attributes):
+        """ Refers to an existing table without making any request, its key schema
+            is described once it is needed
+
+        Parameters:
+        table_name (string):
+        attributes (dict): types of other attributes, used when decoding
+        """
+        self.tables.setdefault(table_name, {})['codec'] = Codec(attributes)
 
 
     def _define_primary_key(self, table_name, description):
-        #'KeySchema': [{'AttributeName': 'song', 'KeyType': 'HASH'}]
-        #'AttributeDefinitions': [{'AttributeName': 'song', 'AttributeType': 'S'}]
-        #
-        keys = {}
-        for i, keyschema in enumerate(description['Table']['KeySchema']):
-            definition = description['Table']['AttributeDefinitions'][i]
+        """ Reads the key schema of an existing table from its description
+        """
+        types = {
+            definition['AttributeName']: DYNAMODB_DATATYPES_LOOKUP2[definition['AttributeType']]
+            for definition in description['Table']['AttributeDefinitions']
+        }
+        for keyschema in description['Table']['KeySchema']:
+            name = keyschema['AttributeName']
             if keyschema['KeyType'] == 'HASH':
-                self.tables[table_name]['partition_key'] = (keyschema['AttributeName'], DYNAMODB_DATATYPES_LOOKUP2[definition['AttributeType']])
+                self.tables[table_name]['partition_key'] = (name, types[name])
             else:
-                self.tables[table_name]['sort_key'] = (keyschema['AttributeName'], DYNAMODB_DATATYPES_LOOKUP2[definition['AttributeType']])
+                self.tables[table_name]['sort_key'] = (name, types[name])
+        self._register_keys(table_name)
+        self._define_indexes(table_name, description['Table'])
+
+
+    def _define_indexes(self, table_name, table_description):
+        """ Records the secondary indexes of a table from its description
+        """
+        types = {
+            definition['AttributeName']: DYNAMODB_DATATYPES_LOOKUP2[definition['AttributeType']]
+            for definition in table_description.get('AttributeDefinitions', [])
+        }
+        indexes = {}
+        for index_type, option in (('global', 'GlobalSecondaryIndexes'), ('local', 'LocalSecondaryIndexes')):
+            for index in table_description.get(option, []):
+                keys = {key['KeyType']: (key['AttributeName'], types.get(key['AttributeName']))
+                        for key in index['KeySchema']}
+                indexes[index['IndexName']] = {
+                    'type': index_type,
+                    'partition_key': keys['HASH'],
+                    'sort_key': keys.get('RANGE'),
+                    'projection': index.get('Projection', {}).get('ProjectionType', 'ALL'),
+                }
+        self.tables[table_name]['indexes'] = indexes
+
+
+    def indexes(self, table_name):
+        """ Secondary indexes of a table
+
+        Returns:
+        dict: index name to its type ('global' or 'local'), partition_key, sort_key and projection
+        """
+        return self._metadata(table_name).get('indexes', {})
+
+
+    def key_schemas(self, table_name):
+        """ (index name, hash key, range key) of the table, then of every index that projects
+            all attributes, in the order the query planner considers them
+        """
+        encoder = self._metadata(table_name)['key_encoder']
+        schemas = [(None, encoder.partition_name, encoder.sort_name)]
+        for index_name, index in sorted(self.indexes(table_name).items()):
+            if index['projection'] == 'ALL':
+                schemas.append((index_name, index['partition_key'][0],
+                                index['sort_key'][0] if index['sort_key'] else None))
+        return schemas
+
+
+    def plan(self, table_name, filter_expression=None):
+        """ How filter_expression would be executed, see QueryPlan
+
+        Returns:
+        QueryPlan:
+        """
+        return QueryPlan.choose(self.key_schemas(table_name), filter_expression)
+
+
+    def _register_keys(self, table_name):
+        """ Builds the key encoder once the key schema of a table is known
+        """
+        self.tables[table_name]['key_encoder'] = KeyEncoder(
+            self.tables[table_name]['partition_key'],
+            self.tables[table_name].get('sort_key')
+        )
+
+
+    def codec(self, table_name):
+        """ Returns the Codec used to encode and decode records of a table
+        """
+        return self._metadata(table_name)['codec']
+
+
+    def attribute_types(self, table_name):
+        """ Declared types of a table's attributes, key attributes included
+
+        Returns:
+        dict: attribute name to type name e.g. {'artist': 'str', 'released': 'int'}
+        """
+        metadata = self._metadata(table_name)
+        types = dict(metadata['codec'].hints)
+        for key in ('partition_key', 'sort_key'):
+            if metadata.get(key):
+                name, type_name = metadata[key]
+                types[name] = type_name
+        return types
 
 
     def list_tables(self):
-        table_list = self.client.list_tables()
-        logger.info(table_list)
+        table_list = self._call('list_tables', None)
+        logger.debug(table_list)
         return table_list
 
 
-    def create_table(self, table_name, partition_key=None, sort_key=None, **attributes):
-        logger.info(partition_key)
-        logger.info(sort_key)
+    def create_table(self, table_name, partition_key=None, sort_key=None, global_indexes=None,
+                     local_indexes=None, **attributes):
+        """ Creates a table, or describes it when no partition_key is given, descriptions
+            come from the metadata cache when possible
+
+        Parameters:
+        table_name (string):
+        partition_key (tuple): (name, type)
+        sort_key (tuple): (name, type)
+        global_indexes (dict): index name to a dict of partition_key, optional sort_key and
+            projection, 'ALL' (default), 'KEYS_ONLY' or a list of attribute names
+        local_indexes (dict): index name to a dict of sort_key and optional projection
+        attributes (dict): types of other attributes, used when decoding
+
+        Returns:
+        dict: the table description under 'Table'
+        """
+        logger.debug('create table %s: %s %s', table_name, partition_key, sort_key)
         KeySchema = []
-        AttributeDefinitions = []
+        definitions = {}
+        # declared attribute types let the codec skip type inference when decoding
+        hints = dict(attributes)
         self.tables[table_name] = {}
-        #     'partition_key': partition_key,
-        #     'sort_key': sort_key
-        # }
 
-        if partition_key:
-            self.tables[table_name]['partition_key'] = partition_key
-            KeySchema.append({ 'AttributeName': partition_key[0], 'KeyType': 'HASH' })
-            AttributeDefinitions.append(
-                {
-                    'AttributeName': partition_key[0],
-                    'AttributeType': DYNAMODB_DATATYPES_LOOKUP[partition_key[1]]
-                }
-            )
-        if sort_key:
-            self.tables[table_name]['sort_key'] = sort_key
-            KeySchema.append({ 'AttributeName': sort_key[0], 'KeyType': 'RANGE' })
-            AttributeDefinitions.append(
-                {
-                    'AttributeName': sort_key[0],
-                    'AttributeType': DYNAMODB_DATATYPES_LOOKUP[sort_key[1]]
-                }
-            )
-        logger.info(KeySchema)
-        logger.info(AttributeDefinitions)
+        def define(key):
+            hints[key[0]] = key[1]
+            definitions[key[0]] = {'AttributeName': key[0], 'AttributeType': DYNAMODB_DATATYPES_LOOKUP[key[1]]}
 
-        try:
-            description = self.client.create_table(
-                TableName=table_name,
-                KeySchema=KeySchema,
-                AttributeDefinitions=AttributeDefinitions,
-                ProvisionedThroughput={
-                    'ReadCapacityUnits': 5,
-                    'WriteCapacityUnits': 5,
-                },
-            )
-            description['Table'] = description['TableDescription']
-            del description['TableDescription']
-            return description
-        except botocore.exceptions.ParamValidationError as e:
-            description = self.client.describe_table(TableName=table_name)
-            logger.info(description['Table'])
-            partition_key = (
-                description['Table']['AttributeDefinitions'][0]['AttributeName'],
-                DYNAMODB_DATATYPES_LOOKUP2[description['Table']['AttributeDefinitions'][0]['AttributeType']]
-            )
-            try:
-                sort_key = (
-                    description['Table']['AttributeDefinitions'][1]['AttributeName'],
-                    DYNAMODB_DATATYPES_LOOKUP2[description['Table']['AttributeDefinitions'][1]['AttributeType']]
-                )
-            except IndexError:
-                pass
+        def key_schema(hash_key, range_key=None):
+            define(hash_key)
+            schema = [{'AttributeName': hash_key[0], 'KeyType': 'HASH'}]
+            if range_key:
+                define(range_key)
+                schema.append({'AttributeName': range_key[0], 'KeyType': 'RANGE'})
+            return schema
+
+        def projection(index):
+            projected = index.get('projection', 'ALL')
+            if isinstance(projected, str):
+                return {'ProjectionType': projected}
+            return {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': list(projected)}
 
+        if partition_key:
+            self.tables[table_name]['partition_key'] = partition_key
+            KeySchema = key_schema(partition_key, sort_key)
+            if sort_key:
+                self.tables[table_name]['sort_key'] = sort_key
+            self._register_keys(table_name)
+
+        indexes = {}
+        if global_indexes:
+            indexes['GlobalSecondaryIndexes'] = [{
+                'IndexName': index_name,
+                'KeySchema': key_schema(index['partition_key'], index.get('sort_key')),
+                'Projection': projection(index),
+                'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5},
+            } for index_name, index in global_indexes.items()]
+        if local_indexes:
+            indexes['LocalSecondaryIndexes'] = [{
+                'IndexName': index_name,
+                'KeySchema': key_schema(partition_key, index['sort_key']),
+                'Projection': projection(index),
+            } for index_name, index in local_indexes.items()]
+        AttributeDefinitions = list(definitions.values())
+        self.tables[table_name]['codec'] = Codec(hints)
+        logger.debug('%s %s %s', KeySchema, AttributeDefinitions, indexes)
+
+        if not partition_key:
+            description = self.describe_table(table_name)
+            logger.debug(description['Table'])
             self._define_primary_key(table_name, description)
             return description
 
+        description = self._call(
+            'create_table', table_name,
+            TableName=table_name,
+            KeySchema=KeySchema,
+            AttributeDefinitions=AttributeDefinitions,
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5,
+            },
+            **indexes
+        )
+        description['Table'] = description['TableDescription']
+        del description['TableDescription']
+        self._define_indexes(table_name, description['Table'])
+        self.metadata.set(self.metadata_scope, table_name, description['Table'])
+        return description
+
 
     def delete_table(self, table_name):
+        self.metadata.invalidate(self.metadata_scope, table_name)
         try:
-            self.client.delete_table(TableName=table_name)
+            self._call('delete_table', table_name, TableName=table_name)
             logger.debug('deleted %s' % table_name)
         except ReferenceError:
             # This method is always called when the class is destroyed
@@ -226,39 +509,168 @@ class BotocoreAdapter(object):
             pass
 
 
-    def get_item(self, table_name, primary_key):
+    def projection(self, table_name, attributes):
+        """ ProjectionExpression arguments fetching only attributes, key attributes are always
+            included so the record can still be identified
+
+        Parameters:
+        table_name (string):
+        attributes (list): attribute names or document paths such as 'charts.us' or 'tags[0]'
+
+        Returns:
+        dict: ProjectionExpression and ExpressionAttributeNames, empty when attributes is empty
+        """
+        if not attributes:
+            return {}
+        key_names = self._key_names(table_name)
+        names = {}
+
+        def name(attribute_name):
+            if attribute_name not in names:
+                names[attribute_name] = '#p%d' % len(names)
+            return names[attribute_name]
+
+        paths = key_names + [path for path in attributes if path not in key_names]
+        return {
+            'ProjectionExpression': ', '.join(RENDER_PATH(path, name) for path in paths),
+            'ExpressionAttributeNames': {placeholder: attribute for attribute, placeholder in names.items()},
+        }
+
+
+    def get_item(self, table_name, primary_key, attributes=None):
         # WIP - figure out key with _get_keys function
-        logger.info('fetching: %s' % str(primary_key))
+        logger.debug('fetching: %s', primary_key)
         keys = self._get_keys(table_name, primary_key)
-        logger.info('_get_keys: %s' % str(keys))
+        logger.debug('_get_keys: %s', keys)
         try:
-            response = self.client.get_item(
+            response = self._call(
+                'get_item', table_name,
                 TableName=table_name,
-                Key=keys
+                Key=keys,
+                **self.projection(table_name, attributes)
             )
             if 'Item' in response:
-                return UNFLUFF(response)
+                return self.codec(table_name).decode_item(response['Item'])
             else:
                 raise KeyError("Record doesn't exist with key: %s" % str(primary_key))
         except self.client.exceptions.ResourceNotFoundException as e:
             # botocore.exceptions.ClientError
             logger.error(e)
-            logger.info(table_name)
+            logger.debug(table_name)
             raise KeyError(str(e))
 
 
+    def _build_item(self, table_name, primary_key, attributes):
+        items = self.codec(table_name).encode_item(attributes)
+        return {**items, **self._get_keys(table_name, primary_key)}
+
+
+    def _key_value(self, table_name, key, value):
+        """ Encodes a value of the partition_key or sort_key using its declared type
+        """
+        key_encoder = self._metadata(table_name)['key_encoder']
+        if key == 'partition_key':
+            return key_encoder.encode_partition(value)
+        return key_encoder.encode_sort(value)
+
+
+    def has_sort_key(self, table_name):
+        return self._metadata(table_name)['key_encoder'].sort_name is not None
+
+
+    def _key_names(self, table_name):
+        return list(self._metadata(table_name)['key_encoder'].names)
+
+
+    def _key_signature(self, keys):
+        """ Hashable form of an encoded key, numbers are normalised so that
+            keys echoed back by DynamoDB match the ones sent
+        """
+        signature = []
+        for name, value in sorted(keys.items()):
+            db_type, db_value = list(value.items())[0]
+            if db_type == 'N':
+                db_value = decimal.Decimal(db_value).normalize()
+            signature.append((name, db_type, db_value))
+        return tuple(signature)
+
+
+    def _split_row(self, table_name, row):
+        """ Splits a record containing its key attributes into (primary_key, attributes)
+        """
+        key_names = self._key_names(table_name)
+        try:
+            key_values = tuple(row[name] for name in key_names)
+        except KeyError as e:
+            raise KeyError('Record is missing key attribute %s: %s' % (e, row))
+        attributes = {k: v for k, v in row.items() if k not in key_names}
+        primary_key = key_values if len(key_values) > 1 else key_values[0]
+        return primary_key, attributes
+
+
+    def batch_get(self, table_name, primary_keys, attributes=None, default=None):
+        """ Fetches many records using BatchGetItem
+
+        Duplicate keys are only requested once, keys are sent 100 at a time and
+        any UnprocessedKeys are requested again with jittered exponential backoff.
+
+        Parameters:
+        table_name (string):
+        primary_keys (iterable): composite/primary keys for the records
+        attributes (list): only fetch these attributes, key attributes are always included
+        default: returned in place of records that don't exist
+
+        Returns:
+        list: records in the same order as primary_keys
+        """
+        signatures = []
+        unique_keys = {}
+        for primary_key in primary_keys:
+            keys = self._get_keys(table_name, primary_key)
+            signature = self._key_signature(keys)
+            signatures.append(signature)
+            unique_keys.setdefault(signature, keys)
+
+        request = self.projection(table_name, attributes)
+        key_names = self._key_names(table_name)
+
+        found = {}
+        codec = self.codec(table_name)
+        for chunk in CHUNKS(unique_keys.values(), BATCH_GET_SIZE):
+            request_items = {table_name: dict(request, Keys=chunk)}
+            attempt = 0
+            while request_items:
+                logger.debug('batch fetching %d records from %s' % (len(request_items[table_name]['Keys']), table_name))
+                response = self._call('batch_get_item', table_name, RequestItems=request_items)
+                for item in response['Responses'].get(table_name, []):
+                    signature = self._key_signature({name: item[name] for name in key_names})
+                    found[signature] = codec.decode_item(item)
+                request_items = response.get('UnprocessedKeys')
+                if request_items:
+                    self._unprocessed(table_name, 'read')
+                    attempt += 1
+                    if attempt > BATCH_RETRIES:
+                        raise RuntimeError('Unable to fetch %d records from %s after %d retries' % (
+                            len(request_items[table_name]['Keys']), table_name, BATCH_RETRIES))
+                    time.sleep(BACKOFF(attempt))
+
+        return [found.get(signature, default) for signature in signatures]
+
+
+    def _unprocessed(self, table_name, kind):
+        # part of a batch left unprocessed means the table is being throttled
+        limiter = self.rate_limiter(table_name)
+        if limiter is not None:
+            limiter.throttled(kind)
+
+
     def put_item(self, table_name, primary_key, attributes):
         # WIP - figure out key with _get_keys function
-        logger.info('inserting: {%s : %s}' % (str(primary_key), attributes))
-        items = {
-            attribute_name:
-            {
-                DYNAMODB_DATATYPES_LOOKUP[type(attribute_value).__name__]: str(attribute_value)
-            } for attribute_name, attribute_value in attributes.items()
-        }
-        items = {**items, **self._get_keys(table_name, primary_key)}
+        logger.debug('inserting: {%s : %s}', primary_key, attributes)
+        items = self._build_item(table_name, primary_key, attributes)
         try:
-            self.describe = self.client.put_item(
+            self.describe = self._call(
+                'put_item', table_name,
                 TableName=table_name,
                 Item=items
             )
@@ -266,62 +678,269 @@ class BotocoreAdapter(object):
             logger.error(e)
             raise KeyError(str(e))
 
+
+    def batch_write(self, table_name, items, max_workers=1):
+        """ Inserts or replaces many records using BatchWriteItem
+
+        Records are consumed lazily and sent in chunks of 25, so items can be a
+        generator of any size. Requests DynamoDB leaves unprocessed are retried
+        with jittered exponential backoff.
+
+        Parameters:
+        table_name (string):
+        items (iterable): dicts containing the key attributes and any other attributes
+        max_workers (int): number of chunks written concurrently
+
+        Returns:
+        int: number of records written
+        """
+        chunks = CHUNKS((self._split_row(table_name, row) for row in items), BATCH_WRITE_SIZE)
+        if max_workers <= 1:
+            return sum(self._batch_write_chunk(table_name, chunk) for chunk in chunks)
+
+        written = 0
+        pending = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk in chunks:
+                # keep a bounded number of chunks in flight so generators aren't drained into memory
+                if len(pending) >= max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    written += sum(future.result() for future in done)
+                pending.add(executor.submit(self._batch_write_chunk, table_name, chunk))
+            written += sum(future.result() for future in pending)
+        return written
+
+
+    def _batch_write_chunk(self, table_name, rows):
+        # BatchWriteItem rejects duplicate keys within a request, the last write wins
+        requests = {}
+        for primary_key, attributes in rows:
+            item = self._build_item(table_name, primary_key, attributes)
+            requests[self._key_signature(self._get_keys(table_name, primary_key))] = {'PutRequest': {'Item': item}}
+
+        request_items = {table_name: list(requests.values())}
+        attempt = 0
+        while request_items:
+            logger.debug('batch writing %d records to %s' % (len(request_items[table_name]), table_name))
+            response = self._call('batch_write_item', table_name, RequestItems=request_items)
+            request_items = response.get('UnprocessedItems')
+            if request_items:
+                self._unprocessed(table_name, 'write')
+                attempt += 1
+                if attempt > BATCH_RETRIES:
+                    raise RuntimeError('Unable to write %d records to %s after %d retries' % (
+                        len(request_items[table_name]), table_name, BATCH_RETRIES))
+                time.sleep(BACKOFF(attempt))
+        return len(requests)
+
     def update_item(self, table_name, primary_key, key, value):
-        logger.info('setitem: %s - %s' % (str(key), value))
-        self.client.update_item(
-            TableName=table_name,
-            Key=self._get_keys(table_name, primary_key),
-            ExpressionAttributeNames={
-                '#X': str(key)
-            },
-            ExpressionAttributeValues={
-                ':y': {
-                    DYNAMODB_DATATYPES_LOOKUP[type(value).__name__]: str(value),
-                },
-            },
-            UpdateExpression='SET #X = :y',
-        )
+        logger.debug('setitem: %s - %s', key, value)
+        self.update(table_name, primary_key, UpdateExpression().set(key, value))
+
+
+    def update(self, table_name, primary_key, update, return_values='NONE', condition=None):
+        """ Applies every action of an UpdateExpression with a single UpdateItem call
+
+        Parameters:
+        table_name (string):
+        primary_key (tuple/string): composite/primary key for the record
+        update (UpdateExpression): SET, REMOVE, ADD and DELETE actions
+        return_values (string): NONE, ALL_OLD, UPDATED_OLD, ALL_NEW or UPDATED_NEW
+        condition (Condition): only update when the stored record satisfies it, raises
+            ConditionFailedError otherwise
+
+        Returns:
+        dict: the attributes requested by return_values
+        """
+        params = update.compile()
+        if condition is not None:
+            # own placeholder prefixes so the condition can't collide with the update's #n/:v
+            compiled = Condition.coerce(condition).compile('ConditionExpression', '#c', ':c')
+            for option in ('ExpressionAttributeNames', 'ExpressionAttributeValues'):
+                if option in compiled:
+                    params.setdefault(option, {}).update(compiled.pop(option))
+            params.update(compiled)
+        try:
+            response = self._call(
+                'update_item', table_name,
+                TableName=table_name,
+                Key=self._get_keys(table_name, primary_key),
+                ReturnValues=return_values,
+                **params
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            raise ConditionFailedError(table_name, primary_key)
+        return self.codec(table_name).decode_item(response.get('Attributes', {}))
 
 
     def delete_item(self, table_name, primary_key):
-        self.client.delete_item(
+        self._call(
+            'delete_item', table_name,
             TableName=table_name,
             Key=self._get_keys(table_name, primary_key)
         )
 
-    def filter(self, table_name, filter_expression):
-        import inspect
-        import re
-
-        #logger.info(self.queries)
-        logger.info(filter_expression)
+    def paginate(self, operation, table_name, **params):
+        """ Calls a scan or query operation, following LastEvaluatedKey
 
-        exp_attribute, exp_operator, exp_value = filter_expression
+        Parameters:
+        operation (string): name of the client method, scan or query
+        table_name (string):
+        params: additional arguments for the client method
 
-        filter_expression_values = "{} {} :{}".format(
-            exp_attribute,
-            exp_operator,
-            ATTRIBUTE_VALUES[0]
-        )
-
-        expression_attribute_values = {
-            ':{}'.format(ATTRIBUTE_VALUES[0]): {
-                DYNAMODB_DATATYPES_LOOKUP[type(exp_value).__name__]: str(exp_value)
-            }
+        Returns:
+        generator: of raw responses, one per page
+        """
+        params['TableName'] = table_name
+        while True:
+            response = self._call(operation, table_name, **params)
+            yield response
+            if 'LastEvaluatedKey' not in response:
+                return
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+    def parallel_paginate(self, operation, table_name, segments, buffer_size=None, **params):
+        """ Scans a table as several segments at once, merging the pages into one stream
+
+        Each segment is paginated on its own worker thread. Pages are handed over
+        through a bounded buffer so workers pause while the consumer falls behind,
+        closing the generator cancels every segment.
+
+        Parameters:
+        operation (string): name of the client method, only scan supports segments
+        table_name (string):
+        segments (int): TotalSegments, one worker is used per segment
+        buffer_size (int): pages held before workers block, defaults to 2 per segment
+        params: additional arguments for the client method
+
+        Returns:
+        generator: of raw responses, in the order they arrive
+
+        Raises:
+        ScanSegmentError: when a segment fails
+        """
+        pages = queue.Queue(maxsize=buffer_size or segments * 2)
+        cancelled = threading.Event()
+        finished = object()
+
+        def offer(page):
+            while not cancelled.is_set():
+                try:
+                    pages.put(page, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def scan_segment(segment):
+            try:
+                for response in self.paginate(operation, table_name, Segment=segment, TotalSegments=segments, **params):
+                    if not offer(response):
+                        return
+            except Exception as e:
+                offer(ScanSegmentError(segment, e))
+            finally:
+                offer(finished)
+
+        executor = ThreadPoolExecutor(max_workers=segments)
+        try:
+            for segment in range(segments):
+                executor.submit(scan_segment, segment)
+            remaining = segments
+            while remaining:
+                page = pages.get()
+                if page is finished:
+                    remaining -= 1
+                elif isinstance(page, ScanSegmentError):
+                    raise page
+                else:
+                    yield page
+        finally:
+            cancelled.set()
+            executor.shutdown(wait=False)
+
+
+    def query(self, table_name, partition_key, sort_key=None, begins_with=None, reverse=False, page_size=None, limit=None):
+        """ Reads the records of one partition using Query
+
+        Parameters:
+        table_name (string):
+        partition_key: value of the partition key
+        sort_key (slice/value): either an exact sort key or a slice of sort keys,
+            slice bounds are inclusive and either one can be left open, a step of -1 reverses
+        begins_with (string): only records whose sort key starts with this prefix
+        reverse (bool): return records in descending sort key order
+        page_size (int): number of records DynamoDB evaluates per request
+        limit (int): maximum number of records returned
+
+        Returns:
+        DynoResult: lazy iterator over the records
+        """
+        logger.debug('query: %s %s', partition_key, sort_key)
+        names = {'#pk': self._metadata(table_name)['partition_key'][0]}
+        values = {':pk': self._key_value(table_name, 'partition_key', partition_key)}
+        conditions = ['#pk = :pk']
+
+        if sort_key is not None or begins_with is not None:
+            if not self.has_sort_key(table_name):
+                raise KeyError('Table was not defined with a sort key')
+            names['#sk'] = self._metadata(table_name)['sort_key'][0]
+
+        if begins_with is not None:
+            values[':prefix'] = self._key_value(table_name, 'sort_key', begins_with)
+            conditions.append('begins_with(#sk, :prefix)')
+        elif isinstance(sort_key, slice):
+            # a Query can only read a range forwards or backwards, it can't skip records
+            if sort_key.step not in (None, -1):
+                raise ValueError('Sort key slices only support a step of -1 (descending), got %r' % (sort_key.step,))
+            if sort_key.step == -1:
+                reverse = True
+            if sort_key.start is not None:
+                values[':low'] = self._key_value(table_name, 'sort_key', sort_key.start)
+            if sort_key.stop is not None:
+                values[':high'] = self._key_value(table_name, 'sort_key', sort_key.stop)
+            if sort_key.start is not None and sort_key.stop is not None:
+                conditions.append('#sk BETWEEN :low AND :high')
+            elif sort_key.start is not None:
+                conditions.append('#sk >= :low')
+            elif sort_key.stop is not None:
+                conditions.append('#sk <= :high')
+            else:
+                del names['#sk']
+        elif sort_key is not None:
+            values[':sk'] = self._key_value(table_name, 'sort_key', sort_key)
+            conditions.append('#sk = :sk')
+
+        params = {
+            'KeyConditionExpression': ' AND '.join(conditions),
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values,
+            'ScanIndexForward': not reverse,
         }
+        return DynoResult(self, table_name, 'query', params, page_size=page_size, limit=limit)
 
-        logger.info(filter_expression_values)
-        logger.info(expression_attribute_values)
 
-        response =  self.client.scan(
-            TableName=table_name,
-            ExpressionAttributeValues=expression_attribute_values,
-            FilterExpression=filter_expression_values
-        )
-        logger.info(response)
-        logger.info(UNFLUFF(response))
-
-        return UNFLUFF(response)
+    def filter(self, table_name, filter_expression=None, page_size=None, limit=None, parallel=None):
+        """ Reads the records matching filter_expression
 
+        An equality on the hash key of the table or of a secondary index turns
+        the read into a Query, anything else is a Scan, see QueryPlan.
 
+        Parameters:
+        table_name (string):
+        filter_expression (Condition): built from DynoAttributes, an (attribute, operator, value) tuple is also accepted
+        page_size (int): number of records DynamoDB evaluates per request
+        limit (int): maximum number of records returned
+        parallel (int): number of segments scanned concurrently, ignored when the plan is a Query
 
+        Returns:
+        DynoResult: lazy iterator over the records, its plan attribute tells how they are read
+        """
+        plan = self.plan(table_name, filter_expression)
+        params = plan.params()
+        logger.debug('%s: %s', plan.operation, params)
+        if plan.operation != 'scan':
+            parallel = None
+        return DynoResult(self, table_name, plan.operation, params, page_size=page_size, limit=limit,
+                          parallel=parallel, plan=plan)
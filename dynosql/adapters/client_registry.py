@@ -0,0 +1,97 @@
+import botocore.config
+import botocore.session
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+CLIENT_DEFAULTS = {
+    'region_name': None,
+    'max_pool_connections': 10,
+    'connect_timeout': 60,
+    'read_timeout': 60,
+    'tcp_keepalive': False,
+    'retry_mode': 'legacy',
+    'max_attempts': None,
+}
+
+
+class ClientRegistry(object):
+    """ Process-wide cache of botocore DynamoDB clients
+
+    Creating a botocore session and client is slow and every client owns its
+    own HTTP connection pool, so adapters pointing at the same endpoint with
+    the same configuration share a single client. botocore clients are
+    thread safe.
+    """
+    def __init__(self):
+        self._clients = {}
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def options(**options):
+        """ Client options with the defaults filled in
+
+        Raises TypeError for unknown options.
+        """
+        unknown = set(options) - set(CLIENT_DEFAULTS)
+        if unknown:
+            raise TypeError('unknown client options: {}'.format(', '.join(sorted(unknown))))
+        return dict(CLIENT_DEFAULTS, **options)
+
+
+    def get(self, endpoint_url, **options):
+        """ Fetch the shared client for an endpoint and configuration, creating it on first use
+
+        Parameters:
+        endpoint_url (string):
+        region_name (string): defaults to the region of the botocore session
+        max_pool_connections (int): size of the HTTP connection pool
+        connect_timeout (int/float): seconds to wait for a connection
+        read_timeout (int/float): seconds to wait for a response
+        tcp_keepalive (bool): enable TCP keepalive on pooled connections
+        retry_mode (string): 'legacy', 'standard' or 'adaptive'
+        max_attempts (int): retry attempts, botocore's default for the mode when None
+
+        Return:
+        botocore.client.DynamoDB:
+        """
+        options = self.options(**options)
+        key = (endpoint_url,) + tuple(sorted(options.items()))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create(endpoint_url, options)
+                self._clients[key] = client
+                logger.debug('created client for %s', endpoint_url)
+        return client
+
+
+    def _create(self, endpoint_url, options):
+        retries = {'mode': options['retry_mode']}
+        if options['max_attempts'] is not None:
+            retries['max_attempts'] = options['max_attempts']
+        config = botocore.config.Config(max_pool_connections=options['max_pool_connections'],
+                                        connect_timeout=options['connect_timeout'],
+                                        read_timeout=options['read_timeout'],
+                                        tcp_keepalive=options['tcp_keepalive'],
+                                        retries=retries)
+        session = botocore.session.get_session()
+        return session.create_client('dynamodb', endpoint_url=endpoint_url,
+                                     region_name=options['region_name'], config=config)
+
+
+    def clear(self):
+        """ Forget every client, later adapters create new ones
+        """
+        with self._lock:
+            self._clients.clear()
+
+
+    def __len__(self):
+        return len(self._clients)
+
+
+CLIENTS = ClientRegistry()
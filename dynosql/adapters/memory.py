@@ -0,0 +1,1081 @@
+import bisect
+import botocore.exceptions
+import copy
+import logging
+import re
+import threading
+import zlib
+
+from decimal import Decimal
+
+from dynosql.adapters.botocore import BotocoreAdapter
+from dynosql.adapters.table_metadata import TableMetadata
+
+logger = logging.getLogger(__name__)
+
+
+MAX_PAGE_BYTES = 1024 * 1024
+
+
+class _Exceptions(object):
+    """ Mirrors ``client.exceptions`` on a botocore DynamoDB client
+    """
+    def __init__(self):
+        for name in ('ResourceNotFoundException', 'ResourceInUseException',
+                     'ConditionalCheckFailedException', 'ValidationException',
+                     'ProvisionedThroughputExceededException', 'ThrottlingException'):
+            setattr(self, name, type(name, (botocore.exceptions.ClientError,), {}))
+
+
+def _error(exception_class, code, message, operation):
+    return exception_class({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _canonical(attribute_value):
+    """ Hashable, orderable form of a scalar key attribute value
+    """
+    (db_type, value), = attribute_value.items()
+    if db_type == 'N':
+        return (db_type, Decimal(value))
+    if db_type == 'B':
+        return (db_type, bytes(value))
+    return (db_type, value)
+
+
+def _item_size(item):
+    return len(repr(item))
+
+
+# -------------------------------------------------------------------------
+# expression parsing
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<op><>|<=|>=|=|<|>|\(|\)|\[|\]|,|\.|\+|-)
+      | (?P<value>:[A-Za-z0-9_]+)
+      | (?P<name>\#[A-Za-z0-9_]+)
+      | (?P<number>[0-9]+)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+
+_KEYWORDS = ('AND', 'OR', 'NOT', 'BETWEEN', 'IN', 'SET', 'REMOVE', 'ADD', 'DELETE')
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise ValueError('Invalid expression: %s' % expression[position:])
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'word' and text.upper() in _KEYWORDS:
+            kind, text = 'keyword', text.upper()
+        tokens.append((kind, text))
+    return tokens
+
+
+class _Parser(object):
+
+
+    def __init__(self, expression, names, values):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+
+    def peek(self, offset=0):
+        try:
+            return self.tokens[self.position + offset]
+        except IndexError:
+            return (None, None)
+
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+
+    def accept(self, kind, text=None):
+        token_kind, token_text = self.peek()
+        if token_kind == kind and (text is None or token_text == text):
+            self.position += 1
+            return True
+        return False
+
+
+    def expect(self, kind, text=None):
+        if not self.accept(kind, text):
+            raise ValueError('Expected %s but found %s' % (text or kind, self.peek()[1]))
+
+
+    def done(self):
+        return self.position >= len(self.tokens)
+
+
+    # paths and operands
+
+
+    def path(self):
+        kind, text = self.next()
+        if kind == 'name':
+            part = self.names[text]
+        elif kind == 'word':
+            part = text
+        else:
+            raise ValueError('Expected attribute path but found %s' % text)
+        path = [part]
+        while True:
+            if self.accept('op', '.'):
+                kind, text = self.next()
+                path.append(self.names[text] if kind == 'name' else text)
+            elif self.accept('op', '['):
+                path.append(int(self.next()[1]))
+                self.expect('op', ']')
+            else:
+                return ('path', path)
+
+
+    def operand(self):
+        kind, text = self.peek()
+        if kind == 'value':
+            self.next()
+            return ('value', self.values[text])
+        if kind == 'word' and text == 'size' and self.peek(1) == ('op', '('):
+            self.next()
+            self.expect('op', '(')
+            path = self.path()
+            self.expect('op', ')')
+            return ('size', path)
+        return self.path()
+
+
+    # conditions
+
+
+    def condition(self):
+        node = self.conjunction()
+        while self.accept('keyword', 'OR'):
+            node = ('or', node, self.conjunction())
+        return node
+
+
+    def conjunction(self):
+        node = self.negation()
+        while self.accept('keyword', 'AND'):
+            node = ('and', node, self.negation())
+        return node
+
+
+    def negation(self):
+        if self.accept('keyword', 'NOT'):
+            return ('not', self.negation())
+        return self.predicate()
+
+
+    def predicate(self):
+        if self.accept('op', '('):
+            node = self.condition()
+            self.expect('op', ')')
+            return node
+        kind, text = self.peek()
+        if kind == 'word' and self.peek(1) == ('op', '(') and text != 'size':
+            self.next()
+            self.expect('op', '(')
+            arguments = [self.operand()]
+            while self.accept('op', ','):
+                arguments.append(self.operand())
+            self.expect('op', ')')
+            return ('function', text, arguments)
+        left = self.operand()
+        if self.accept('keyword', 'BETWEEN'):
+            low = self.operand()
+            self.expect('keyword', 'AND')
+            return ('between', left, low, self.operand())
+        if self.accept('keyword', 'IN'):
+            self.expect('op', '(')
+            options = [self.operand()]
+            while self.accept('op', ','):
+                options.append(self.operand())
+            self.expect('op', ')')
+            return ('in', left, options)
+        kind, comparator = self.next()
+        if comparator not in ('=', '<>', '<', '<=', '>', '>='):
+            raise ValueError('Unknown comparator %s' % comparator)
+        return ('compare', comparator, left, self.operand())
+
+
+    # update expressions
+
+
+    def update(self):
+        actions = []
+        while not self.done():
+            kind, clause = self.next()
+            if kind != 'keyword' or clause not in ('SET', 'REMOVE', 'ADD', 'DELETE'):
+                raise ValueError('Unknown update clause %s' % clause)
+            while True:
+                path = self.path()
+                if clause == 'SET':
+                    self.expect('op', '=')
+                    actions.append(('SET', path, self.set_value()))
+                elif clause == 'REMOVE':
+                    actions.append(('REMOVE', path, None))
+                else:
+                    actions.append((clause, path, self.operand()))
+                if not self.accept('op', ','):
+                    break
+        return actions
+
+
+    def set_value(self):
+        node = self.set_operand()
+        if self.accept('op', '+'):
+            return ('+', node, self.set_operand())
+        if self.accept('op', '-'):
+            return ('-', node, self.set_operand())
+        return node
+
+
+    def set_operand(self):
+        kind, text = self.peek()
+        if kind == 'word' and text in ('if_not_exists', 'list_append') and self.peek(1) == ('op', '('):
+            self.next()
+            self.expect('op', '(')
+            first = self.set_value() if text == 'list_append' else self.path()
+            self.expect('op', ',')
+            second = self.set_value()
+            self.expect('op', ')')
+            return (text, first, second)
+        return self.operand()
+
+
+    def projection(self):
+        paths = [self.path()[1]]
+        while self.accept('op', ','):
+            paths.append(self.path()[1])
+        return paths
+
+
+def parse_condition(expression, names=None, values=None):
+    parser = _Parser(expression, names, values)
+    node = parser.condition()
+    if not parser.done():
+        raise ValueError('Unexpected token %s' % parser.peek()[1])
+    return node
+
+
+def parse_update(expression, names=None, values=None):
+    return _Parser(expression, names, values).update()
+
+
+def parse_projection(expression, names=None):
+    return _Parser(expression, names, None).projection()
+
+
+# -------------------------------------------------------------------------
+# expression evaluation over AttributeValue items
+
+_MISSING = object()
+
+
+def _resolve(item, path):
+    current = {'M': item}
+    for part in path:
+        if isinstance(part, int):
+            if 'L' not in current or part >= len(current['L']):
+                return _MISSING
+            current = current['L'][part]
+        else:
+            if 'M' not in current or part not in current['M']:
+                return _MISSING
+            current = current['M'][part]
+    return current
+
+
+def _operand(item, node):
+    kind = node[0]
+    if kind == 'value':
+        return node[1]
+    if kind == 'path':
+        return _resolve(item, node[1])
+    if kind == 'size':
+        value = _resolve(item, node[1][1])
+        if value is _MISSING:
+            return _MISSING
+        (db_type, raw), = value.items()
+        if db_type == 'B':
+            return {'N': str(len(bytes(raw)))}
+        return {'N': str(len(raw))}
+    raise ValueError('Unknown operand %s' % kind)
+
+
+def _compare(left, right):
+    """ Returns -1, 0, 1 or None when the values are not comparable
+    """
+    if left is _MISSING or right is _MISSING:
+        return None
+    (left_type, left_value), = left.items()
+    (right_type, right_value), = right.items()
+    if left_type != right_type:
+        return None
+    if left_type == 'N':
+        left_value, right_value = Decimal(left_value), Decimal(right_value)
+    elif left_type in ('S', 'B'):
+        pass
+    else:
+        return 0 if _equal(left, right) else None
+    return (left_value > right_value) - (left_value < right_value)
+
+
+def _equal(left, right):
+    if left is _MISSING or right is _MISSING:
+        return False
+    (left_type, left_value), = left.items()
+    (right_type, right_value), = right.items()
+    if left_type != right_type:
+        return False
+    if left_type == 'N':
+        return Decimal(left_value) == Decimal(right_value)
+    if left_type == 'NS':
+        return set(map(Decimal, left_value)) == set(map(Decimal, right_value))
+    if left_type in ('SS', 'BS'):
+        return set(left_value) == set(right_value)
+    if left_type == 'M':
+        return (left_value.keys() == right_value.keys()
+                and all(_equal(v, right_value[k]) for k, v in left_value.items()))
+    if left_type == 'L':
+        return (len(left_value) == len(right_value)
+                and all(_equal(a, b) for a, b in zip(left_value, right_value)))
+    return left_value == right_value
+
+
+_COMPARATORS = {
+    '<': lambda c: c < 0,
+    '<=': lambda c: c <= 0,
+    '>': lambda c: c > 0,
+    '>=': lambda c: c >= 0,
+}
+
+
+def evaluate(item, node):
+    kind = node[0]
+    if kind == 'and':
+        return evaluate(item, node[1]) and evaluate(item, node[2])
+    if kind == 'or':
+        return evaluate(item, node[1]) or evaluate(item, node[2])
+    if kind == 'not':
+        return not evaluate(item, node[1])
+    if kind == 'compare':
+        comparator, left, right = node[1:]
+        left, right = _operand(item, left), _operand(item, right)
+        if comparator == '=':
+            return _equal(left, right)
+        if comparator == '<>':
+            return left is not _MISSING and right is not _MISSING and not _equal(left, right)
+        result = _compare(left, right)
+        return result is not None and _COMPARATORS[comparator](result)
+    if kind == 'between':
+        value = _operand(item, node[1])
+        low = _compare(value, _operand(item, node[2]))
+        high = _compare(value, _operand(item, node[3]))
+        return low is not None and high is not None and low >= 0 and high <= 0
+    if kind == 'in':
+        value = _operand(item, node[1])
+        return any(_equal(value, _operand(item, option)) for option in node[2])
+    if kind == 'function':
+        name, arguments = node[1], node[2]
+        if name == 'attribute_exists':
+            return _operand(item, arguments[0]) is not _MISSING
+        if name == 'attribute_not_exists':
+            return _operand(item, arguments[0]) is _MISSING
+        value = _operand(item, arguments[0])
+        if value is _MISSING:
+            return False
+        argument = _operand(item, arguments[1])
+        if name == 'attribute_type':
+            return list(value)[0] == argument['S']
+        if name == 'begins_with':
+            (db_type, raw), = value.items()
+            (_, prefix), = argument.items()
+            return db_type in ('S', 'B') and raw[:len(prefix)] == prefix
+        if name == 'contains':
+            (db_type, raw), = value.items()
+            if db_type == 'S':
+                return argument.get('S', None) is not None and argument['S'] in raw
+            if db_type in ('SS', 'NS', 'BS'):
+                (_, needle), = argument.items()
+                if db_type == 'NS':
+                    return Decimal(needle) in set(map(Decimal, raw))
+                return needle in raw
+            if db_type == 'L':
+                return any(_equal(element, argument) for element in raw)
+            return False
+        raise ValueError('Unknown function %s' % name)
+    raise ValueError('Unknown condition %s' % kind)
+
+
+def _number(value):
+    text = str(value)
+    if 'E' in text or 'e' in text:
+        text = format(value, 'f')
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return text or '0'
+
+
+def _set_value(item, node):
+    kind = node[0]
+    if kind in ('+', '-'):
+        left, right = _set_value(item, node[1]), _set_value(item, node[2])
+        if left is _MISSING or right is _MISSING or 'N' not in left or 'N' not in right:
+            raise ValueError('Arithmetic requires two numbers')
+        total = Decimal(left['N']) + Decimal(right['N']) if kind == '+' else Decimal(left['N']) - Decimal(right['N'])
+        return {'N': _number(total)}
+    if kind == 'if_not_exists':
+        existing = _resolve(item, node[1][1])
+        return existing if existing is not _MISSING else _set_value(item, node[2])
+    if kind == 'list_append':
+        left, right = _set_value(item, node[1]), _set_value(item, node[2])
+        if left is _MISSING or right is _MISSING:
+            raise ValueError('list_append requires two lists')
+        return {'L': left['L'] + right['L']}
+    return _operand(item, node)
+
+
+def _parent(item, path, create=False):
+    current = {'M': item}
+    for part in path[:-1]:
+        if isinstance(part, int):
+            current = current['L'][part]
+        else:
+            if part not in current['M']:
+                raise ValueError('The document path provided in the update expression is invalid for update')
+            current = current['M'][part]
+    return current
+
+
+def apply_update(item, actions):
+    for clause, path_node, value_node in actions:
+        path = path_node[1]
+        if clause == 'SET':
+            value = copy.deepcopy(_set_value(item, value_node))
+            parent = _parent(item, path)
+            if isinstance(path[-1], int):
+                elements = parent['L']
+                if path[-1] >= len(elements):
+                    elements.append(value)
+                else:
+                    elements[path[-1]] = value
+            else:
+                parent['M'][path[-1]] = value
+        elif clause == 'REMOVE':
+            try:
+                parent = _parent(item, path)
+            except (ValueError, KeyError, IndexError):
+                continue
+            if isinstance(path[-1], int):
+                if 'L' in parent and path[-1] < len(parent['L']):
+                    del parent['L'][path[-1]]
+            else:
+                parent.get('M', {}).pop(path[-1], None)
+        else:
+            value = _operand(item, value_node)
+            existing = _resolve(item, path)
+            (db_type, raw), = value.items()
+            if clause == 'ADD' and db_type == 'N':
+                base = Decimal(existing['N']) if existing is not _MISSING else Decimal(0)
+                result = {'N': _number(base + Decimal(raw))}
+            elif clause == 'ADD':
+                current = list(existing[db_type]) if existing is not _MISSING else []
+                result = {db_type: current + [v for v in raw if v not in current]}
+            else:
+                if existing is _MISSING:
+                    continue
+                remaining = [v for v in existing[db_type] if v not in raw]
+                if not remaining:
+                    _parent(item, path)['M'].pop(path[-1], None)
+                    continue
+                result = {db_type: remaining}
+            _parent(item, path)['M'][path[-1]] = result
+    return item
+
+
+def _project(item, paths):
+    """ Builds a projected copy of ``item`` containing only ``paths``
+    """
+    result = {'M': {}}
+    for path in paths:
+        value = _resolve(item, path)
+        if value is _MISSING:
+            continue
+        source = {'M': item}
+        target = result
+        for depth, part in enumerate(path):
+            last = depth == len(path) - 1
+            if isinstance(part, int):
+                source = source['L'][part]
+                elements = target.setdefault('L', [])
+                if last:
+                    elements.append(copy.deepcopy(source))
+                else:
+                    child = {}
+                    elements.append(child)
+                    target = child
+            else:
+                source = source['M'][part]
+                members = target.setdefault('M', {})
+                if last:
+                    members[part] = copy.deepcopy(source)
+                else:
+                    target = members.setdefault(part, {})
+    return result['M']
+
+
+# -------------------------------------------------------------------------
+# storage
+
+
+class _Index(object):
+    """ Items of one table or secondary index grouped by partition, each
+        partition kept sorted by its sort key
+    """
+    def __init__(self, name, hash_name, range_name, table_keys):
+        self.name = name
+        self.hash_name = hash_name
+        self.range_name = range_name
+        self.table_keys = table_keys
+        self.partition_keys = []
+        self.partitions = {}
+
+
+    def _position(self, item):
+        order = []
+        if self.range_name:
+            order.append(_canonical(item[self.range_name]))
+        order.extend(_canonical(item[name]) for name in self.table_keys
+                     if name not in (self.hash_name, self.range_name))
+        return tuple(order)
+
+
+    def covers(self, item):
+        return self.hash_name in item and (not self.range_name or self.range_name in item)
+
+
+    def insert(self, item):
+        if not self.covers(item):
+            return
+        partition_key = _canonical(item[self.hash_name])
+        if partition_key not in self.partitions:
+            bisect.insort(self.partition_keys, partition_key)
+            self.partitions[partition_key] = ([], [])
+        positions, items = self.partitions[partition_key]
+        position = self._position(item)
+        index = bisect.bisect_left(positions, position)
+        if index < len(positions) and positions[index] == position:
+            items[index] = item
+        else:
+            positions.insert(index, position)
+            items.insert(index, item)
+
+
+    def remove(self, item):
+        if not self.covers(item):
+            return
+        partition_key = _canonical(item[self.hash_name])
+        positions, items = self.partitions.get(partition_key, ([], []))
+        position = self._position(item)
+        index = bisect.bisect_left(positions, position)
+        if index < len(positions) and positions[index] == position:
+            del positions[index]
+            del items[index]
+            if not positions:
+                del self.partitions[partition_key]
+                self.partition_keys.remove(partition_key)
+
+
+    def lookup(self, key):
+        positions, items = self.partitions.get(_canonical(key[self.hash_name]), ([], []))
+        position = self._position(key)
+        index = bisect.bisect_left(positions, position)
+        if index < len(positions) and positions[index] == position:
+            return items[index]
+        return None
+
+
+    def key_of(self, item):
+        names = [self.hash_name] + ([self.range_name] if self.range_name else []) + list(self.table_keys)
+        return {name: item[name] for name in names if name}
+
+
+    def scan(self, start_key=None, segment=None, total_segments=None):
+        partition_index = 0
+        start_partition = start_position = None
+        if start_key:
+            start_partition = _canonical(start_key[self.hash_name])
+            start_position = self._position(start_key)
+            partition_index = bisect.bisect_left(self.partition_keys, start_partition)
+        for partition_key in list(self.partition_keys[partition_index:]):
+            if total_segments and zlib.crc32(repr(partition_key).encode()) % total_segments != segment:
+                continue
+            positions, items = self.partitions.get(partition_key, ([], []))
+            index = 0
+            if partition_key == start_partition:
+                index = bisect.bisect_right(positions, start_position)
+            for item in list(items[index:]):
+                yield item
+
+
+    def query(self, partition_value, sort_node=None, forward=True, start_key=None):
+        positions, items = self.partitions.get(_canonical(partition_value), ([], []))
+        positions, items = list(positions), list(items)
+        low, high = 0, len(positions)
+        if sort_node is not None:
+            low, high = self._bounds(positions, sort_node)
+        if start_key:
+            position = self._position(start_key)
+            if forward:
+                low = max(low, bisect.bisect_right(positions, position))
+            else:
+                high = min(high, bisect.bisect_left(positions, position))
+        indexes = range(low, high) if forward else range(high - 1, low - 1, -1)
+        for index in indexes:
+            if sort_node is None or evaluate(items[index], sort_node):
+                yield items[index]
+
+
+    def _bounds(self, positions, node):
+        kind = node[0]
+        if kind == 'compare':
+            comparator, value = node[1], _canonical(node[3][1])
+            if comparator == '=':
+                return (bisect.bisect_left(positions, (value,)),
+                        bisect.bisect_right(positions, (value, _TOP)))
+            if comparator in ('>', '>='):
+                return (bisect.bisect_left(positions, (value,)), len(positions))
+            return (0, bisect.bisect_right(positions, (value, _TOP)))
+        if kind == 'between':
+            return (bisect.bisect_left(positions, (_canonical(node[2][1]),)),
+                    bisect.bisect_right(positions, (_canonical(node[3][1]), _TOP)))
+        if kind == 'function' and node[1] == 'begins_with':
+            return (bisect.bisect_left(positions, (_canonical(node[2][1][1]),)), len(positions))
+        return (0, len(positions))
+
+
+class _Top(object):
+    """ Sorts after every canonical key component
+    """
+    def __lt__(self, other):
+        return False
+
+
+    def __gt__(self, other):
+        return True
+
+
+    def __eq__(self, other):
+        return isinstance(other, _Top)
+
+
+_TOP = (_Top(),)
+
+
+class _Table(object):
+
+
+    def __init__(self, description):
+        self.description = description
+        key_schema = description['KeySchema']
+        self.hash_name = [k['AttributeName'] for k in key_schema if k['KeyType'] == 'HASH'][0]
+        ranges = [k['AttributeName'] for k in key_schema if k['KeyType'] == 'RANGE']
+        self.range_name = ranges[0] if ranges else None
+        self.key_names = [self.hash_name] + ranges
+        self.primary = _Index(None, self.hash_name, self.range_name, [])
+        self.indexes = {}
+        for index in description.get('GlobalSecondaryIndexes', []) + description.get('LocalSecondaryIndexes', []):
+            schema = index['KeySchema']
+            index_hash = [k['AttributeName'] for k in schema if k['KeyType'] == 'HASH'][0]
+            index_range = [k['AttributeName'] for k in schema if k['KeyType'] == 'RANGE']
+            self.indexes[index['IndexName']] = _Index(
+                index['IndexName'], index_hash, index_range[0] if index_range else None, self.key_names)
+
+
+    def key(self, item):
+        return {name: item[name] for name in self.key_names}
+
+
+    def get(self, key):
+        return self.primary.lookup(key)
+
+
+    def put(self, item):
+        existing = self.primary.lookup(item)
+        if existing is not None:
+            self.remove(existing)
+        self.primary.insert(item)
+        for index in self.indexes.values():
+            index.insert(item)
+        return existing
+
+
+    def remove(self, item):
+        self.primary.remove(item)
+        for index in self.indexes.values():
+            index.remove(item)
+
+
+    def count(self):
+        return sum(len(items) for _, items in self.primary.partitions.values())
+
+
+class InMemoryClient(object):
+    """ In process stand-in for a botocore DynamoDB client
+
+        Implements the subset of the low level DynamoDB API that the adapters use.
+        Items are stored in their wire format, grouped by partition and kept sorted
+        by sort key so point lookups, range queries and scans behave like DynamoDB.
+    """
+
+
+    def __init__(self, max_page_bytes=MAX_PAGE_BYTES):
+        self.max_page_bytes = max_page_bytes
+        self.exceptions = _Exceptions()
+        self.tables = {}
+        self.lock = threading.RLock()
+
+
+    # helpers
+
+
+    def _table(self, table_name, operation):
+        try:
+            return self.tables[table_name]
+        except KeyError:
+            raise _error(self.exceptions.ResourceNotFoundException, 'ResourceNotFoundException',
+                         'Requested resource not found: Table: %s not found' % table_name, operation)
+
+
+    def _validation(self, message, operation):
+        return _error(self.exceptions.ValidationException, 'ValidationException', message, operation)
+
+
+    def _check_key(self, table, key, operation):
+        if set(key) != set(table.key_names):
+            raise self._validation('The provided key element does not match the schema', operation)
+
+
+    def _response(self, table_name=None, capacity=None, return_consumed=None, **response):
+        response['ResponseMetadata'] = {
+            'HTTPStatusCode': 200,
+            'RetryAttempts': 0,
+            'HTTPHeaders': {'content-length': str(_item_size(response))},
+        }
+        if return_consumed and return_consumed != 'NONE' and table_name:
+            response['ConsumedCapacity'] = {'TableName': table_name, 'CapacityUnits': float(capacity or 0)}
+        return response
+
+
+    def _condition(self, item, kwargs, operation):
+        expression = kwargs.get('ConditionExpression')
+        if expression and not evaluate(item or {}, parse_condition(
+                expression, kwargs.get('ExpressionAttributeNames'), kwargs.get('ExpressionAttributeValues'))):
+            raise _error(self.exceptions.ConditionalCheckFailedException, 'ConditionalCheckFailedException',
+                         'The conditional request failed', operation)
+
+
+    def _projected(self, item, kwargs, names=None):
+        expression = kwargs.get('ProjectionExpression')
+        if not expression:
+            return copy.deepcopy(item)
+        return _project(item, parse_projection(expression, names or kwargs.get('ExpressionAttributeNames')))
+
+
+    # tables
+
+
+    def create_table(self, **kwargs):
+        if not kwargs.get('KeySchema') or not kwargs.get('AttributeDefinitions'):
+            raise botocore.exceptions.ParamValidationError(
+                report='Invalid length for parameter KeySchema, value: 0, valid min length: 1')
+        with self.lock:
+            if kwargs['TableName'] in self.tables:
+                raise _error(self.exceptions.ResourceInUseException, 'ResourceInUseException',
+                             'Table already exists: %s' % kwargs['TableName'], 'CreateTable')
+            description = {
+                'TableName': kwargs['TableName'],
+                'KeySchema': kwargs['KeySchema'],
+                'AttributeDefinitions': kwargs['AttributeDefinitions'],
+                'TableStatus': 'ACTIVE',
+                'ItemCount': 0,
+                'ProvisionedThroughput': kwargs.get('ProvisionedThroughput', {}),
+            }
+            for option in ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes'):
+                if kwargs.get(option):
+                    description[option] = [dict(index, IndexStatus='ACTIVE') for index in kwargs[option]]
+            self.tables[kwargs['TableName']] = _Table(description)
+            return self._response(TableDescription=copy.deepcopy(description))
+
+
+    def describe_table(self, TableName):
+        with self.lock:
+            table = self._table(TableName, 'DescribeTable')
+            description = copy.deepcopy(table.description)
+            description['ItemCount'] = table.count()
+            return self._response(Table=description)
+
+
+    def delete_table(self, TableName):
+        with self.lock:
+            table = self._table(TableName, 'DeleteTable')
+            del self.tables[TableName]
+            return self._response(TableDescription=copy.deepcopy(table.description))
+
+
+    def list_tables(self, **kwargs):
+        with self.lock:
+            return self._response(TableNames=sorted(self.tables))
+
+
+    # items
+
+
+    def get_item(self, TableName, Key, **kwargs):
+        with self.lock:
+            table = self._table(TableName, 'GetItem')
+            self._check_key(table, Key, 'GetItem')
+            item = table.get(Key)
+            response = {}
+            if item is not None:
+                response['Item'] = self._projected(item, kwargs)
+            return self._response(TableName, 1 if item else 0, kwargs.get('ReturnConsumedCapacity'), **response)
+
+
+    def put_item(self, TableName, Item, **kwargs):
+        with self.lock:
+            table = self._table(TableName, 'PutItem')
+            missing = [name for name in table.key_names if name not in Item]
+            if missing:
+                raise self._validation('One of the required keys was not given a value', 'PutItem')
+            existing = table.get(Item)
+            self._condition(existing, kwargs, 'PutItem')
+            table.put(copy.deepcopy(Item))
+            response = {}
+            if kwargs.get('ReturnValues') == 'ALL_OLD' and existing is not None:
+                response['Attributes'] = copy.deepcopy(existing)
+            return self._response(TableName, 1 + _item_size(Item) // 1024,
+                                  kwargs.get('ReturnConsumedCapacity'), **response)
+
+
+    def update_item(self, TableName, Key, **kwargs):
+        with self.lock:
+            table = self._table(TableName, 'UpdateItem')
+            self._check_key(table, Key, 'UpdateItem')
+            existing = table.get(Key)
+            self._condition(existing, kwargs, 'UpdateItem')
+            item = copy.deepcopy(existing) if existing is not None else copy.deepcopy(Key)
+            actions = parse_update(kwargs.get('UpdateExpression', ''),
+                                   kwargs.get('ExpressionAttributeNames'), kwargs.get('ExpressionAttributeValues'))
+            for clause, path, _ in actions:
+                if path[1][0] in table.key_names:
+                    raise self._validation('Cannot update attribute %s. This attribute is part of the key' % path[1][0],
+                                           'UpdateItem')
+            try:
+                apply_update(item, actions)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                raise self._validation(str(e), 'UpdateItem')
+            table.put(item)
+            response = {}
+            return_values = kwargs.get('ReturnValues', 'NONE')
+            if return_values == 'ALL_NEW':
+                response['Attributes'] = copy.deepcopy(item)
+            elif return_values == 'ALL_OLD' and existing is not None:
+                response['Attributes'] = copy.deepcopy(existing)
+            elif return_values in ('UPDATED_NEW', 'UPDATED_OLD'):
+                source = item if return_values == 'UPDATED_NEW' else (existing or {})
+                updated = {path[1][0] for _, path, _ in actions}
+                attributes = {name: copy.deepcopy(source[name]) for name in updated if name in source}
+                if attributes:
+                    response['Attributes'] = attributes
+            return self._response(TableName, 1 + _item_size(item) // 1024,
+                                  kwargs.get('ReturnConsumedCapacity'), **response)
+
+
+    def delete_item(self, TableName, Key, **kwargs):
+        with self.lock:
+            table = self._table(TableName, 'DeleteItem')
+            self._check_key(table, Key, 'DeleteItem')
+            existing = table.get(Key)
+            self._condition(existing, kwargs, 'DeleteItem')
+            response = {}
+            if existing is not None:
+                table.remove(existing)
+                if kwargs.get('ReturnValues') == 'ALL_OLD':
+                    response['Attributes'] = copy.deepcopy(existing)
+            return self._response(TableName, 1, kwargs.get('ReturnConsumedCapacity'), **response)
+
+
+    # batches
+
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise self._validation('Too many items requested for the BatchWriteItem call', 'BatchWriteItem')
+        with self.lock:
+            capacity = []
+            for table_name, requests in RequestItems.items():
+                table = self._table(table_name, 'BatchWriteItem')
+                seen = set()
+                for request in requests:
+                    item = request.get('PutRequest', {}).get('Item') or request['DeleteRequest']['Key']
+                    key = tuple(_canonical(item[name]) for name in table.key_names)
+                    if key in seen:
+                        raise self._validation('Provided list of item keys contains duplicates', 'BatchWriteItem')
+                    seen.add(key)
+                for request in requests:
+                    if 'PutRequest' in request:
+                        table.put(copy.deepcopy(request['PutRequest']['Item']))
+                    else:
+                        existing = table.get(request['DeleteRequest']['Key'])
+                        if existing is not None:
+                            table.remove(existing)
+                capacity.append({'TableName': table_name, 'CapacityUnits': float(len(requests))})
+            response = self._response(UnprocessedItems={})
+            if kwargs.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+                response['ConsumedCapacity'] = capacity
+            return response
+
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        if sum(len(request['Keys']) for request in RequestItems.values()) > 100:
+            raise self._validation('Too many items requested for the BatchGetItem call', 'BatchGetItem')
+        with self.lock:
+            responses = {}
+            capacity = []
+            for table_name, request in RequestItems.items():
+                table = self._table(table_name, 'BatchGetItem')
+                seen = set()
+                found = []
+                for key in request['Keys']:
+                    signature = tuple(_canonical(key[name]) for name in table.key_names)
+                    if signature in seen:
+                        raise self._validation('Provided list of item keys contains duplicates', 'BatchGetItem')
+                    seen.add(signature)
+                    item = table.get(key)
+                    if item is not None:
+                        found.append(self._projected(item, request, request.get('ExpressionAttributeNames')))
+                responses[table_name] = found
+                capacity.append({'TableName': table_name, 'CapacityUnits': float(len(request['Keys']))})
+            response = self._response(Responses=responses, UnprocessedKeys={})
+            if kwargs.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+                response['ConsumedCapacity'] = capacity
+            return response
+
+
+    # reads
+
+
+    def _read(self, table_name, kwargs, operation, candidates_for):
+        with self.lock:
+            table = self._table(table_name, operation)
+            index = None
+            if kwargs.get('IndexName'):
+                try:
+                    index = table.indexes[kwargs['IndexName']]
+                except KeyError:
+                    raise self._validation('The table does not have the specified index: %s' % kwargs['IndexName'],
+                                           operation)
+            candidates = candidates_for(table, index or table.primary)
+            names = kwargs.get('ExpressionAttributeNames')
+            values = kwargs.get('ExpressionAttributeValues')
+            condition = None
+            if kwargs.get('FilterExpression'):
+                condition = parse_condition(kwargs['FilterExpression'], names, values)
+            limit = kwargs.get('Limit')
+            count_only = kwargs.get('Select') == 'COUNT'
+            items = []
+            matched = 0
+            scanned = 0
+            size = 0
+            last = None
+            exhausted = True
+            for item in candidates:
+                if (limit is not None and scanned >= limit) or size >= self.max_page_bytes:
+                    exhausted = False
+                    break
+                scanned += 1
+                size += _item_size(item)
+                last = item
+                if condition is None or evaluate(item, condition):
+                    matched += 1
+                    if not count_only:
+                        items.append(self._projected(item, kwargs))
+            response = {'Count': matched, 'ScannedCount': scanned}
+            if not count_only:
+                response['Items'] = items
+            if not exhausted and last is not None:
+                source = index or table.primary
+                names = set(table.key_names) | {source.hash_name}
+                if source.range_name:
+                    names.add(source.range_name)
+                response['LastEvaluatedKey'] = copy.deepcopy({name: last[name] for name in names})
+            return self._response(table_name, max(1, size // 4096), kwargs.get('ReturnConsumedCapacity'),
+                                  **response)
+
+
+    def scan(self, TableName, **kwargs):
+        segment, total_segments = kwargs.get('Segment'), kwargs.get('TotalSegments')
+        if (segment is None) != (total_segments is None):
+            raise self._validation('Segment and TotalSegments must be provided together', 'Scan')
+        return self._read(TableName, kwargs, 'Scan', lambda table, index: index.scan(
+            kwargs.get('ExclusiveStartKey'), segment, total_segments))
+
+
+    def query(self, TableName, KeyConditionExpression, **kwargs):
+        condition = parse_condition(KeyConditionExpression, kwargs.get('ExpressionAttributeNames'),
+                                    kwargs.get('ExpressionAttributeValues'))
+
+        def candidates(table, index):
+            conditions = []
+            pending = [condition]
+            while pending:
+                node = pending.pop()
+                if node[0] == 'and':
+                    pending.extend(node[1:])
+                else:
+                    conditions.append(node)
+            partition_value = sort_node = None
+            for node in conditions:
+                if node[0] == 'compare' and node[1] == '=' and node[2] == ('path', [index.hash_name]):
+                    partition_value = node[3][1]
+                else:
+                    sort_node = node
+            if partition_value is None:
+                raise self._validation('Query condition missed key schema element: %s' % index.hash_name, 'Query')
+            return index.query(partition_value, sort_node, kwargs.get('ScanIndexForward', True),
+                               kwargs.get('ExclusiveStartKey'))
+
+        return self._read(TableName, kwargs, 'Query', candidates)
+
+
+
+class InMemoryAdapter(BotocoreAdapter):
+    """ BotocoreAdapter backed by an InMemoryClient instead of DynamoDB
+
+    Every adapter feature works the same way, only the requests never leave the
+    process. Useful for tests and as a network free baseline when measuring
+    client side overhead.
+
+        dyno = Dynosql(adapter=InMemoryAdapter())
+
+    Parameters:
+    max_page_bytes (int): size at which scan and query pages are cut, DynamoDB uses 1MB
+    """
+    def __init__(self, max_page_bytes=MAX_PAGE_BYTES):
+        # every adapter has its own tables, so it can't share their descriptions
+        super(InMemoryAdapter, self).__init__(endpoint_url=None, client=InMemoryClient(max_page_bytes=max_page_bytes),
+                                              metadata=TableMetadata())
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# parts of a DescribeTable response the adapter needs, everything else
+# (item counts, sizes, timestamps) goes stale and isn't JSON serialisable
+DESCRIPTION_FIELDS = ('TableName', 'KeySchema', 'AttributeDefinitions', 'ProvisionedThroughput',
+                      'GlobalSecondaryIndexes', 'LocalSecondaryIndexes')
+THROUGHPUT_FIELDS = ('ReadCapacityUnits', 'WriteCapacityUnits')
+INDEX_FIELDS = ('IndexName', 'KeySchema', 'Projection')
+
+
+def SCHEMA(description):
+    """ Strips a table description down to its key schema, indexes and throughput
+
+    Parameters:
+    description (dict): the Table of a DescribeTable or CreateTable response
+
+    Returns:
+    dict:
+    """
+    schema = {field: description[field] for field in DESCRIPTION_FIELDS if field in description}
+    if 'ProvisionedThroughput' in schema:
+        schema['ProvisionedThroughput'] = {field: schema['ProvisionedThroughput'][field]
+                                           for field in THROUGHPUT_FIELDS
+                                           if field in schema['ProvisionedThroughput']}
+    for option in ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes'):
+        if option in schema:
+            schema[option] = [{field: index[field] for field in INDEX_FIELDS if field in index}
+                              for index in schema[option]]
+    return schema
+
+
+class TableMetadata(object):
+    """ Cache of table key schemas shared by every adapter in the process
+
+    Binding a DynoTable to an existing table needs its key schema, which
+    costs a DescribeTable round trip. Descriptions are cached per endpoint
+    and table so adapters pointing at the same endpoint only describe a
+    table once. With a path the cache is also kept in a JSON file so later
+    processes skip the describe as well; entries older than ttl seconds are
+    described again.
+
+        TABLE_METADATA.configure(path='~/.cache/dynosql/tables.json', ttl=3600)
+
+    Parameters:
+    path (string): JSON file the cache is loaded from and saved to, None keeps it in memory
+    ttl (int/float): seconds an entry stays valid, None keeps entries until invalidated
+    """
+    def __init__(self, path=None, ttl=None):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.configure(path, ttl)
+
+
+    def configure(self, path=None, ttl=None):
+        """ Changes the file and ttl of the cache, entries in the file are loaded
+        """
+        with self._lock:
+            self.path = os.path.expanduser(path) if path else None
+            self.ttl = ttl
+            if self.path is not None:
+                self._entries.update(self._load())
+
+
+    def _load(self):
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            logger.warning('ignoring table metadata cache %s: %s', self.path, error)
+            return {}
+
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # written next to the file then renamed so readers never see half a file
+        temporary = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(temporary, 'w') as cache_file:
+                json.dump(self._entries, cache_file)
+            os.replace(temporary, self.path)
+        except OSError as error:
+            logger.warning('could not save table metadata cache %s: %s', self.path, error)
+
+
+    @staticmethod
+    def key(scope, table_name):
+        return '{} {}'.format(scope, table_name)
+
+
+    def get(self, scope, table_name):
+        """ Cached description of a table
+
+        Parameters:
+        scope (string): identifies the endpoint and region
+        table_name (string):
+
+        Returns:
+        dict: description as returned by SCHEMA, None when missing or expired
+        """
+        entry = self._entries.get(self.key(scope, table_name))
+        if entry is None:
+            return None
+        if self.ttl is not None and time.time() - entry['described_at'] > self.ttl:
+            return None
+        return entry['table']
+
+
+    def set(self, scope, table_name, description):
+        """ Caches the description of a table
+
+        Parameters:
+        scope (string): identifies the endpoint and region
+        table_name (string):
+        description (dict): the Table of a DescribeTable or CreateTable response
+        """
+        with self._lock:
+            self._entries[self.key(scope, table_name)] = {'table': SCHEMA(description),
+                                                          'described_at': time.time()}
+            if self.path is not None:
+                self._save()
+
+
+    def invalidate(self, scope, table_name):
+        """ Forgets a table, e.g. after it was deleted
+        """
+        with self._lock:
+            if self._entries.pop(self.key(scope, table_name), None) is not None and self.path is not None:
+                self._save()
+
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.path is not None:
+                self._save()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+TABLE_METADATA = TableMetadata()
@@ -0,0 +1,76 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.expressions import UpdateExpression
+
+
+class AsyncDynoRecord(object):
+    """ asyncio counterpart of DynoRecord
+
+    Nothing is fetched until fetch() or get() is awaited, updates are sent
+    as a single UpdateItem and keep the local copy current.
+    """
+    __slots__ = ('adapter', 'table_name', 'primary_key', '_json')
+
+    def __init__(self, adapter, table_name, primary_key):
+        self.adapter = adapter
+        self.table_name = table_name
+        self.primary_key = primary_key
+        self._json = None
+
+
+    async def fetch(self, attributes=None):
+        """ Fetch the record, or only some of its attributes
+
+        Parameters:
+        attributes (list): only fetch these attributes
+
+        Return:
+        dict: the fetched attributes
+        """
+        record = await self.adapter.get_item(self.table_name, self.primary_key, attributes=attributes)
+        if not attributes:
+            self._json = record
+        return record
+
+
+    async def get(self, key, default=None):
+        """ Value of a single attribute, only that attribute is fetched
+        """
+        if self._json is not None:
+            return self._json.get(key, default)
+        return (await self.fetch([key])).get(key, default)
+
+
+    async def update(self, values=None, return_values='UPDATED_NEW', **kwargs):
+        """ Set several attributes with a single UpdateItem call
+
+        Parameters:
+        values (dict): attributes to set, keyword arguments are also accepted
+        return_values (string): ReturnValues used to keep the local copy current
+
+        Return:
+        dict: the attributes returned by DynamoDB
+        """
+        update = UpdateExpression()
+        for name, value in dict(values or {}, **kwargs).items():
+            update.set(name, value)
+        attributes = await self.adapter.update(self.table_name, self.primary_key, update, return_values=return_values)
+        if update.nested():
+            # only the updated parts of nested attributes are returned, fetch() again to see the record
+            self._json = None
+        elif self._json is not None:
+            self._json.update(attributes)
+        return attributes
+
+
+    @property
+    def json(self):
+        """ The record as last fetched, None until fetch() has been awaited
+        """
+        return self._json
+
+
+    def __repr__(self):
+        return '<AsyncDynoRecord %s %s>' % (self.table_name, str(self.primary_key))
@@ -0,0 +1,88 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDynoResult(object):
+    """ asyncio counterpart of DynoResult
+
+        async for record in table.filter(table.released == 1984):
+            ...
+
+    Wraps the DynoResult built by the sync adapter, pages are fetched one at
+    a time on the async adapter's thread pool as they are consumed. The
+    DynoResult itself is built on the thread pool too, when the result is
+    first used, since planning a filter on a table bound with
+    AsyncDynosql.table may describe the table first.
+
+    Parameters:
+    adapter (AsyncBotocoreAdapter):
+    table_name (string):
+    build (function): returns the sync DynoResult, called on the thread pool
+    """
+    def __init__(self, adapter, table_name, build):
+        self.adapter = adapter
+        self.table_name = table_name
+        self.build = build
+        self.result = None
+
+
+    def _built(self):
+        # only called on the thread pool
+        if self.result is None:
+            self.result = self.build()
+        return self.result
+
+
+    async def resolve(self):
+        """ The sync DynoResult, built on the thread pool the first time
+
+        Returns:
+        DynoResult:
+        """
+        if self.result is None:
+            await self.adapter.run(self._built)
+        return self.result
+
+
+    async def pages(self):
+        """ Async generator of lists of records, one per page returned by DynamoDB
+        """
+        result = await self.resolve()
+        async for page in self.adapter.pages(result):
+            yield page
+
+
+    def select(self, *attributes):
+        """ Only fetch and decode some attributes of each record, see DynoResult.select
+        """
+        return AsyncDynoResult(self.adapter, self.table_name, lambda: self._built().select(*attributes))
+
+
+    async def count(self, parallel=None):
+        """ Number of matching records counted by DynamoDB, see DynoResult.count
+        """
+        result = await self.resolve()
+        return await self.adapter.run(result.count, parallel=parallel)
+
+
+    async def _records(self):
+        async for page in self.pages():
+            for record in page:
+                yield record
+
+
+    def __aiter__(self):
+        return self._records()
+
+
+    async def list(self):
+        """ Collects every record into a list
+        """
+        return [record async for record in self]
+
+
+    def __repr__(self):
+        if self.result is None:
+            return '<AsyncDynoResult %s>' % self.table_name
+        return '<AsyncDynoResult %s %s>' % (self.result.operation, self.table_name)
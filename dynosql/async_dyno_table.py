@@ -0,0 +1,100 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.async_dyno_record import AsyncDynoRecord
+from dynosql.dyno_attribute import DynoAttribute
+
+
+class AsyncDynoTable(object):
+    """ asyncio counterpart of DynoTable, created by awaiting AsyncDynosql
+
+        music = await dyno('music', partition_key=('artist', 'str'), sort_key=('song', 'str'))
+        await music.put(('Prince', 'Kiss'), {'released': 1986})
+        await music.get(('Prince', 'Kiss'))
+        async for record in music.filter(music.released == 1986):
+            ...
+
+    Item operations are coroutines instead of dict operators since
+    __getitem__ and __setitem__ can't be awaited.
+    """
+    def __init__(self, adapter, table_name, info=None):
+        self.adapter = adapter
+        self.table_name = table_name
+        self.info = info
+
+
+    async def get(self, primary_key, attributes=None):
+        """ Retreive record with key
+
+        Parameters:
+        primary_key (tuple/string): composite/primary key for the record
+        attributes (list): only fetch these attributes
+
+        Return:
+        dict: Returns record from DynamoDB, raises KeyError if it doesn't exist
+        """
+        return await self.adapter.get_item(self.table_name, primary_key, attributes=attributes)
+
+
+    async def put(self, primary_key, attributes):
+        """ Inserts a new record or replaces an existing one
+        """
+        await self.adapter.put_item(self.table_name, primary_key, attributes)
+
+
+    async def delete(self, primary_key):
+        """ Delete record from a table
+        """
+        await self.adapter.delete_item(self.table_name, primary_key)
+
+
+    def record(self, primary_key):
+        """ Lazy reference to a single record
+
+        Return:
+        AsyncDynoRecord:
+        """
+        return AsyncDynoRecord(self.adapter, self.table_name, primary_key)
+
+
+    async def get_many(self, primary_keys, attributes=None, default=None):
+        return await self.adapter.batch_get(self.table_name, primary_keys, attributes=attributes, default=default)
+
+
+    async def extend(self, records, max_workers=1):
+        await self.adapter.batch_write(self.table_name, records, max_workers=max_workers)
+
+
+    def filter(self, filter_expression=None, page_size=None, limit=None, parallel=None):
+        """ Scan the table for records matching a condition on their attributes
+
+        Return:
+        AsyncDynoResult: use async for to iterate over the records
+        """
+        return self.adapter.filter(self.table_name, filter_expression, page_size=page_size, limit=limit,
+                                   parallel=parallel)
+
+
+    def scan(self, page_size=None, limit=None, parallel=None):
+        return self.filter(None, page_size=page_size, limit=limit, parallel=parallel)
+
+
+    def query(self, partition_key, sort_key=None, begins_with=None, reverse=False, page_size=None, limit=None):
+        """ Retreive the records of a partition, optionally within a range of sort keys
+
+        Return:
+        AsyncDynoResult: use async for to iterate over the records
+        """
+        return self.adapter.query(self.table_name, partition_key, sort_key=sort_key, begins_with=begins_with,
+                                  reverse=reverse, page_size=page_size, limit=limit)
+
+
+    async def drop(self):
+        """ Deletes the referenced table from database
+        """
+        await self.adapter.delete_table(self.table_name)
+
+
+    def __getattr__(self, name):
+        return DynoAttribute(name)
@@ -0,0 +1,68 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.async_dyno_table import AsyncDynoTable
+from dynosql.adapters.async_botocore import AsyncBotocoreAdapter
+
+
+class AsyncDynosql(object):
+    """ asyncio counterpart of Dynosql, awaiting a call creates a table reference
+
+        dyno = AsyncDynosql(max_concurrency=20)
+        music = await dyno('music', partition_key=('artist', 'str'), sort_key=('song', 'str'))
+
+    Parameters:
+    endpoint_url (string):
+    max_concurrency (int): maximum number of requests in flight at once
+    adapter (BotocoreAdapter): sync adapter to delegate to, e.g. an InMemoryAdapter
+    client_options (dict): same connection pool, timeout and retry options as Dynosql,
+        max_pool_connections defaults to max_concurrency so requests never wait for a connection
+    """
+
+    def __init__(self, endpoint_url='http://localhost:8000/', max_concurrency=10, adapter=None, **client_options):
+        if adapter is None:
+            client_options.setdefault('max_pool_connections', max(max_concurrency, 10))
+            client_options['endpoint_url'] = endpoint_url
+        self.adapter = AsyncBotocoreAdapter(adapter=adapter, max_concurrency=max_concurrency, **client_options)
+
+    async def __call__(self, table_name, partition_key=None, sort_key=None, **attributes):
+        """ After AsyncDynosql is initiated it can be awaited to create a table
+
+        Parameters:
+        table_name (string):
+        partition_key (tuple):
+        sort_key (tuple):
+        attributes (dict):
+
+        Returns:
+        AsyncDynoTable:
+        """
+        logger.info('creating table: %s', table_name)
+        info = await self.adapter.create_table(table_name, partition_key=partition_key, sort_key=sort_key,
+                                               **attributes)
+        return AsyncDynoTable(self.adapter, table_name, info)
+
+    def table(self, table_name, **attributes):
+        """ References an existing table without creating or describing it, see Dynosql.table
+
+        Returns:
+        AsyncDynoTable:
+        """
+        self.adapter.bind_table(table_name, **attributes)
+        return AsyncDynoTable(self.adapter, table_name)
+
+    async def list_tables(self):
+        """ Fetches a list of table names from database
+        """
+        return await self.adapter.list_tables()
+
+    async def warm_up(self, connections=None):
+        """ Opens pooled connections ahead of the first requests
+        """
+        return await self.adapter.warm_up(connections)
+
+    def close(self):
+        """ Stops the thread pool used for requests
+        """
+        self.adapter.close()
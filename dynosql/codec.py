@@ -0,0 +1,269 @@
+import functools
+import logging
+
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# https://docs.aws.amazon.com/amazondynamodb/latest/developerguide/HowItWorks.NamingRulesDataTypes.html#HowItWorks.DataTypes
+#
+# Values are converted with a dispatch table keyed on the DynamoDB type when
+# decoding and on the python type when encoding, documents (M, L) are handled
+# recursively. Numbers without a fraction or exponent decode to int, anything
+# else decodes to float.
+
+
+def decode_number(value):
+    if '.' in value or 'e' in value or 'E' in value:
+        return float(value)
+    return int(value)
+
+
+def decode_value(attribute_value):
+    """ Convert a single DynamoDB attribute value e.g. {'N': '1984'} into python
+    """
+    (db_type, value), = attribute_value.items()
+    return DECODERS[db_type](value)
+
+
+def decode_item(item):
+    """ Convert a DynamoDB item into a dict of python values
+    """
+    return {name: decode_value(value) for name, value in item.items()}
+
+
+DECODERS = {
+    'S': str,
+    'N': decode_number,
+    'B': bytes,
+    'BOOL': bool,
+    'NULL': lambda value: None,
+    'M': decode_item,
+    'L': lambda value: [decode_value(v) for v in value],
+    'SS': set,
+    'NS': lambda value: {decode_number(v) for v in value},
+    'BS': lambda value: {bytes(v) for v in value},
+}
+
+
+def _encode_set(value):
+    if not value:
+        raise ValueError('DynamoDB does not support empty sets')
+    element = next(iter(value))
+    if isinstance(element, str):
+        return {'SS': list(value)}
+    if isinstance(element, (bytes, bytearray)):
+        return {'BS': [bytes(v) for v in value]}
+    if isinstance(element, (int, float, Decimal)) and not isinstance(element, bool):
+        return {'NS': [str(v) for v in value]}
+    raise TypeError('Unsupported set element type: %s' % type(element).__name__)
+
+
+ENCODERS = {
+    str: lambda value: {'S': value},
+    bool: lambda value: {'BOOL': value},
+    int: lambda value: {'N': str(value)},
+    float: lambda value: {'N': str(value)},
+    Decimal: lambda value: {'N': str(value)},
+    bytes: lambda value: {'B': value},
+    bytearray: lambda value: {'B': bytes(value)},
+    type(None): lambda value: {'NULL': True},
+    dict: lambda value: {'M': encode_item(value)},
+    list: lambda value: {'L': [encode_value(v) for v in value]},
+    tuple: lambda value: {'L': [encode_value(v) for v in value]},
+    set: _encode_set,
+    frozenset: _encode_set,
+}
+
+
+def encode_value(value):
+    """ Convert a python value into a DynamoDB attribute value
+    """
+    try:
+        return ENCODERS[type(value)](value)
+    except KeyError:
+        # subclasses of the supported types e.g. OrderedDict
+        for cls in type(value).__mro__:
+            if cls in ENCODERS:
+                return ENCODERS[cls](value)
+        raise TypeError('Unsupported attribute type: %s' % type(value).__name__)
+
+
+def encode_item(attributes):
+    """ Convert a dict of python values into a DynamoDB item
+    """
+    return {name: encode_value(value) for name, value in attributes.items()}
+
+
+# Type hints accepted by create_table(**attributes) e.g. released='int'
+# maps to the DynamoDB type the attribute is stored as and the conversion
+# applied to it, skipping type inference when decoding
+TYPE_HINTS = {
+    'str': ('S', str),
+    'int': ('N', int),
+    'long': ('N', int),
+    'float': ('N', float),
+    'decimal': ('N', Decimal),
+    'bool': ('BOOL', bool),
+    'bytes': ('B', bytes),
+    'dict': ('M', decode_item),
+    'list': ('L', DECODERS['L']),
+}
+
+
+def _hinted_decoder(db_type, convert):
+    def decode(attribute_value):
+        value = attribute_value.get(db_type)
+        if value is None:
+            # stored as a different type than declared, e.g. NULL
+            return decode_value(attribute_value)
+        try:
+            return convert(value)
+        except (ValueError, TypeError, ArithmeticError):
+            # doesn't fit the declared type, e.g. 1.5 stored in an int attribute
+            return decode_value(attribute_value)
+    return decode
+
+
+def hinted_decoder(type_name=None):
+    """ Decoder of a single attribute value declared as type_name, None infers the type
+    """
+    if type_name is None:
+        return decode_value
+    return _hinted_decoder(*TYPE_HINTS[type_name])
+
+
+class Codec(object):
+    """ Encodes and decodes the items of one table
+
+    Parameters:
+    hints (dict): attribute name to type name e.g. {'released': 'int'}
+    """
+    def __init__(self, hints=None):
+        self.hints = dict(hints or {})
+        self.decoders = {}
+        for name, type_name in self.hints.items():
+            try:
+                db_type, convert = TYPE_HINTS[type_name]
+            except KeyError:
+                raise ValueError('Unsupported type %s for attribute %s' % (type_name, name))
+            self.decoders[name] = _hinted_decoder(db_type, convert)
+
+
+    def decode_item(self, item):
+        decoders = self.decoders
+        if not decoders:
+            return decode_item(item)
+        return {name: decoders.get(name, decode_value)(value) for name, value in item.items()}
+
+
+    def decode_items(self, items):
+        decode = self.decode_item
+        return [decode(item) for item in items]
+
+
+    def encode_item(self, attributes):
+        return encode_item(attributes)
+
+
+# Key attributes can only be strings, numbers or binary
+KEY_TYPES = {
+    'str': ('S', (str,), str),
+    'int': ('N', (int, float, Decimal), str),
+    'long': ('N', (int, float, Decimal), str),
+    'float': ('N', (int, float, Decimal), str),
+    'decimal': ('N', (int, float, Decimal), str),
+    'bytes': ('B', (bytes, bytearray), bytes),
+}
+
+
+class KeyEncoder(object):
+    """ Turns a python key into the DynamoDB Key dict of one table
+
+    The key schema is validated once when the encoder is built, encoding is
+    then a couple of isinstance checks and the most recently used keys are
+    cached. Composite keys may be lists, e.g. keys decoded from JSON.
+
+    Parameters:
+    partition_key (tuple): (name, type) e.g. ('artist', 'str')
+    sort_key (tuple): (name, type) or None
+    cache_size (int): number of encoded keys to cache, 0 disables the cache
+    """
+    def __init__(self, partition_key, sort_key=None, cache_size=1024):
+        self.partition_name, self.partition_type, self._partition_types, self._partition_convert = \
+            self._compile(partition_key)
+        if sort_key:
+            self.sort_name, self.sort_type, self._sort_types, self._sort_convert = self._compile(sort_key)
+            self.names = (self.partition_name, self.sort_name)
+        else:
+            self.sort_name = self.sort_type = None
+            self.names = (self.partition_name,)
+
+        self._encode = self._encode_composite if sort_key else self._encode_simple
+        self._cached = None
+        if cache_size:
+            # typed so that True isn't served the cached key for 1
+            self._cached = functools.lru_cache(maxsize=cache_size, typed=True)(self._encode)
+
+
+    def encode(self, primary_key):
+        """ DynamoDB Key dict of a python key
+
+        Parameters:
+        primary_key: partition key value, or a (partition, sort) tuple or list
+
+        Return:
+        dict: a new dict on every call, callers may modify it
+        """
+        if isinstance(primary_key, list):
+            primary_key = tuple(primary_key)
+        if self._cached is None:
+            return self._encode(primary_key)
+        try:
+            key = self._cached(primary_key)
+        except TypeError:
+            # unhashable parts, e.g. a list given as the sort key, raise the key's own error
+            return self._encode(primary_key)
+        return {name: dict(value) for name, value in key.items()}
+
+
+    @staticmethod
+    def _compile(key):
+        name, type_name = key
+        try:
+            db_type, types, convert = KEY_TYPES[type_name]
+        except KeyError:
+            raise ValueError('Key attribute %s cannot be of type %s' % (name, type_name))
+        return name, db_type, types, convert
+
+
+    def _value(self, value, db_type, types, convert, name):
+        if not isinstance(value, types) or isinstance(value, bool):
+            raise TypeError('Key attribute %s expects %s, got %s' % (name, db_type, type(value).__name__))
+        return {db_type: convert(value)}
+
+
+    def encode_partition(self, value):
+        return self._value(value, self.partition_type, self._partition_types, self._partition_convert,
+                           self.partition_name)
+
+
+    def encode_sort(self, value):
+        if self.sort_name is None:
+            raise KeyError('Table was not defined with a sort key')
+        return self._value(value, self.sort_type, self._sort_types, self._sort_convert, self.sort_name)
+
+
+    def _encode_simple(self, primary_key):
+        if isinstance(primary_key, tuple):
+            raise KeyError('Table was not defined with a sort key')
+        return {self.partition_name: self.encode_partition(primary_key)}
+
+
+    def _encode_composite(self, primary_key):
+        if not isinstance(primary_key, tuple) or len(primary_key) != 2:
+            raise KeyError('Table requires a (partition key, sort key) tuple, got: %s' % str(primary_key))
+        return {
+            self.partition_name: self.encode_partition(primary_key[0]),
+            self.sort_name: self.encode_sort(primary_key[1]),
+        }
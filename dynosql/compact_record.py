@@ -0,0 +1,98 @@
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.codec import hinted_decoder
+
+
+@functools.lru_cache(maxsize=256)
+def RECORD_TYPE(fields):
+    """ CompactRecord subclass for a tuple of field names, created once per schema
+        so every record of a result shares the same field metadata
+    """
+    return type('CompactRecord', (CompactRecord,), {
+        '__slots__': (),
+        'fields': fields,
+        'positions': {name: position for position, name in enumerate(fields)},
+    })
+
+
+def RECORD(fields, values):
+    """ Rebuilds a pickled CompactRecord
+    """
+    return tuple.__new__(RECORD_TYPE(fields), values)
+
+
+class CompactRecord(tuple):
+    """ Read only record stored as a tuple of values, created by DynoResult.compact
+
+        for record in music.scan().compact():
+            record['released'], record.get('album')
+
+    Field names and positions live on a class shared by every record with the
+    same fields, so a record costs a tuple and its values instead of a dict.
+    Records are looked up like dicts, dict(record) converts one, and they
+    iterate over their values like the tuples they are so lists of them can
+    be handed straight to pandas.DataFrame.from_records(records, columns=records[0].fields).
+    Attributes a record doesn't have are None.
+    """
+    __slots__ = ()
+    fields = ()
+    positions = {}
+
+    @classmethod
+    def decoder(cls, fields, types):
+        """ Function decoding a DynamoDB item into a record of fields
+
+        Parameters:
+        fields (list): attribute names, in the order they are stored
+        types (dict): declared type of each attribute, undeclared attributes are inferred
+
+        Return:
+        function:
+        """
+        record_type = RECORD_TYPE(tuple(fields))
+        decoders = [(name, hinted_decoder(types.get(name))) for name in fields]
+        new = tuple.__new__
+
+        def decode(item):
+            return new(record_type, [convert(item[name]) if name in item else None for name, convert in decoders])
+        return decode
+
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self.positions[key]
+            except KeyError:
+                raise KeyError(key)
+        return tuple.__getitem__(self, key)
+
+
+    def get(self, key, default=None):
+        position = self.positions.get(key)
+        if position is None:
+            return default
+        value = tuple.__getitem__(self, position)
+        return default if value is None else value
+
+
+    def keys(self):
+        return self.fields
+
+
+    def values(self):
+        return tuple(self)
+
+
+    def items(self):
+        return zip(self.fields, self)
+
+
+    def __reduce__(self):
+        return RECORD, (self.fields, tuple(self))
+
+
+    def __repr__(self):
+        return 'CompactRecord(%s)' % ', '.join('%s=%r' % item for item in self.items())
@@ -2,42 +2,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-class DynoAttribute(object):
+from dynosql.expressions import Path
 
-    def __init__(self, name):
-        self.name = name
-        self.query = None
 
-    def __eq__(self, value):
-        logger.info('%s = %s' % (self.name, value))
-        self.query = (self.name, '=', value)
-        return self.query
+class DynoAttribute(Path):
+    """ Reference to an attribute of a table, returned by table.attribute_name
 
-    def __ne__(self, value):
-        logger.info('%s != %s' % (self.name, value))
-        self.query = (self.name, '<>', value)
-        return self.query
+    Comparisons and the Path methods build Conditions which are combined with
+    & | and ~ and passed to filter:
 
-    def __gt__(self, value):
-        logger.info('%s  %s' % (self.name, value))
-        self.query = (self.name, '>', value)
-        return self.query
-
-    def __ge__(self, value):
-        logger.info('%s  %s' % (self.name, value))
-        self.query = (self.name, '>=', value)
-        return self.query
-
-    def __lt__(self, value):
-        logger.info('%s  %s' % (self.name, value))
-        self.query = (self.name, '<', value)
-        return self.query
-
-    def __le__(self, value):
-        logger.info('%s  %s' % (self.name, value))
-        self.query = (self.name, '<=', value)
-        return self.query
-
-    # def __and__(self, value):
-    #     logger.info('%s and %s' % (self.name, value))
-        
+        music.filter((music.released >= 1990) & music.album.begins_with('Purple'))
+    """
+    __slots__ = ()
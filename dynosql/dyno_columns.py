@@ -0,0 +1,293 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from dynosql.codec import hinted_decoder
+
+
+# declared attribute type to (type the column is decoded as, pyarrow type, numpy dtype),
+# numpy numbers are float64 so that missing values can be NaN, as pandas does
+COLUMN_TYPES = {
+    'str': ('str', 'string', 'O'),
+    'int': ('int', 'int64', 'f8'),
+    'long': ('int', 'int64', 'f8'),
+    'float': ('float', 'float64', 'f8'),
+    'decimal': ('float', 'float64', 'f8'),
+    'bool': ('bool', 'bool_', 'O'),
+    'bytes': ('bytes', 'binary', 'O'),
+}
+
+
+def REQUIRE(name, module, alternative):
+    """ Raises ImportError when an optional dependency isn't installed
+    """
+    if module is None:
+        raise ImportError('{0} is not installed, pip install {0} or use {1} instead'.format(name, alternative))
+
+
+class DynoColumns(object):
+    """ Columnar export of a DynoResult, created by DynoResult.columns
+
+        music.filter(music.released > 1990).to_arrow(columns=['artist', 'released'])
+        music.scan(parallel=4).to_parquet('music.parquet')
+        music.scan().to_numpy()     # record array, when pyarrow isn't installed
+
+    Every page is decoded straight from the DynamoDB items into one list per
+    column, no dict is built per record. Declared attribute types (key types
+    and the attributes given when the table was created) pick the decoder and
+    the column type. Other columns are discovered from the records, their
+    types are inferred from their first values, numbers are float64.
+
+    Only one page is held at a time while writing parquet, so exports of any
+    size use bounded memory, unless an undeclared column has no value on the
+    first pages. Its columns are fixed once the first page is written, an
+    attribute first seen later raises ValueError: pass columns when items
+    have different attributes. to_arrow and to_numpy return the whole result
+    and have a column for every attribute.
+
+    pyarrow and numpy are optional, each export raises ImportError when the
+    library it needs isn't installed.
+
+    Parameters:
+    result (DynoResult):
+    columns (list): attribute names, only these are fetched. Defaults to the key and declared
+        attributes followed by every other attribute, in the order they are first seen
+    """
+    def __init__(self, result, columns=None):
+        self.result = result
+        self.columns = list(columns) if columns else None
+        self.types = result.adapter.attribute_types(result.table_name)
+
+
+    def _discover(self, items):
+        """ Key attributes, declared attributes then the other attributes of a page
+        """
+        table_schema = self.result.adapter.key_schemas(self.result.table_name)[0]
+        keys = [name for name in table_schema[1:] if name is not None]
+        seen = set(keys)
+        names = set(self.types)
+        for item in items:
+            names.update(item)
+        return keys + sorted(names - seen)
+
+
+    def _decoder(self, name):
+        column_type = COLUMN_TYPES.get(self.types.get(name))
+        return hinted_decoder(column_type[0] if column_type else None)
+
+
+    def batches(self):
+        """ Yields a dict of column name to list of values for each page, missing
+            attributes are None. When columns weren't given, attributes first seen on
+            a later page are added as columns from that page on, earlier batches
+            don't have them
+
+        Return:
+        generator: of dicts
+        """
+        item_pages = self.result.item_pages(self.columns)
+        columns = self.columns
+        discovered = self.columns is None
+        decoders = None
+        try:
+            for items in item_pages:
+                if columns is None:
+                    if not items:
+                        # filtered pages can be empty, wait for records to discover the columns
+                        continue
+                    columns = self.columns = self._discover(items)
+                    known = set(columns)
+                elif discovered:
+                    added = set().union(*items) - known
+                    if added:
+                        logger.debug('%s: new columns %s', self.result.table_name, sorted(added))
+                        columns = self.columns = columns + sorted(added)
+                        known.update(added)
+                        decoders = None
+                if decoders is None:
+                    decoders = [(name, self._decoder(name)) for name in columns]
+                yield {name: [decode(item[name]) if name in item else None for item in items]
+                       for name, decode in decoders}
+        finally:
+            item_pages.close()
+
+
+    def _empty(self):
+        return {name: [] for name in self.columns or self._discover([])}
+
+
+    @staticmethod
+    def _column(batch, name):
+        """ Values of a column in a batch, None for a column added after the batch
+        """
+        values = batch.get(name)
+        if values is None:
+            values = [None] * len(next(iter(batch.values()), []))
+        return values
+
+
+    def _arrow_schema(self, batches, final=True):
+        """ Column types of the export, declared types are used as is. Undeclared
+            numbers are float64 so pages mixing whole and fractional numbers fit,
+            other undeclared columns take the type of their first values
+
+        Parameters:
+        batches (list): the first batches of the export
+        final (bool): no batch follows, columns without any value are strings
+
+        Return:
+        pyarrow.Schema: None when final is False and a column has no value yet
+        """
+        fields = []
+        for name in self.columns if self.columns is not None else batches[0]:
+            column_type = COLUMN_TYPES.get(self.types.get(name))
+            if column_type:
+                arrow_type = getattr(pyarrow, column_type[1])()
+            else:
+                values = next((batch[name] for batch in batches
+                               if any(value is not None for value in batch.get(name, ()))), None)
+                if values is None:
+                    if not final:
+                        return None
+                    arrow_type = pyarrow.string()
+                else:
+                    arrow_type = pyarrow.array(values).type
+                    if pyarrow.types.is_integer(arrow_type) or pyarrow.types.is_floating(arrow_type):
+                        arrow_type = pyarrow.float64()
+            fields.append(pyarrow.field(name, arrow_type))
+        return pyarrow.schema(fields)
+
+
+    def _record_batch(self, batch, schema):
+        if len(batch) > len(schema):
+            added = [name for name in batch if schema.get_field_index(name) < 0]
+            raise ValueError('Attributes {} first appear after the export started, pass columns to '
+                             'export them'.format(', '.join(added)))
+        arrays = []
+        for field in schema:
+            try:
+                arrays.append(pyarrow.array(self._column(batch, field.name), type=field.type))
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as error:
+                raise ValueError('Values of {} don\'t fit its {} column, declare the attribute type on the '
+                                 'table: {}'.format(field.name, field.type, error))
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+    def arrow_batches(self):
+        """ Yields a pyarrow.RecordBatch for each page, every batch has the same schema
+
+        Pages are held back while an undeclared column has no value yet, so its
+        type can be taken from a later page. Without columns, an attribute first
+        seen once batches were yielded raises ValueError, pass columns for
+        tables whose items have different attributes.
+
+        Return:
+        generator: of pyarrow.RecordBatch
+        """
+        REQUIRE('pyarrow', pyarrow, 'to_numpy')
+        schema = None
+        pending = []
+        for batch in self.batches():
+            if schema is None:
+                pending.append(batch)
+                schema = self._arrow_schema(pending, final=False)
+                if schema is None:
+                    continue
+                held, pending = pending, []
+                for page in held:
+                    yield self._record_batch(page, schema)
+            else:
+                yield self._record_batch(batch, schema)
+        if pending:
+            schema = self._arrow_schema(pending)
+            for page in pending:
+                yield self._record_batch(page, schema)
+
+
+    def to_arrow(self):
+        """ Whole result as a pyarrow.Table, with a column for every attribute of the result
+            when columns weren't given
+        """
+        REQUIRE('pyarrow', pyarrow, 'to_numpy')
+        batches = list(self.batches())
+        schema = self._arrow_schema(batches or [self._empty()])
+        return pyarrow.Table.from_batches([self._record_batch(batch, schema) for batch in batches], schema=schema)
+
+
+    def to_parquet(self, path, **options):
+        """ Writes the result to a parquet file page by page, see arrow_batches
+
+        Parameters:
+        path (string): file to write
+        options (dict): passed to pyarrow.parquet.ParquetWriter, e.g. compression='zstd'
+
+        Return:
+        int: number of records written
+        """
+        writer = None
+        rows = 0
+        try:
+            for batch in self.arrow_batches():
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(path, batch.schema, **options)
+                writer.write_batch(batch)
+                rows += batch.num_rows
+            if writer is None:
+                # nothing matched, write an empty file without scanning again
+                schema = self._arrow_schema([self._empty()])
+                pyarrow.parquet.write_table(pyarrow.Table.from_batches([], schema=schema), path, **options)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                # don't leave a file missing records behind
+                os.remove(path)
+            raise
+        if writer is not None:
+            writer.close()
+        logger.debug('wrote %d records to %s', rows, path)
+        return rows
+
+
+    def to_numpy(self):
+        """ Whole result as a numpy record array, numbers are float64 with NaN for missing
+            values and other columns hold python objects
+
+        Return:
+        numpy.recarray:
+        """
+        REQUIRE('numpy', numpy, 'to_arrow')
+        batches = list(self.batches())
+        dtype = self._numpy_dtype(self.columns or self._empty())
+        pages = []
+        for batch in batches:
+            page = numpy.empty(len(next(iter(batch.values()), [])), dtype=dtype)
+            for name in dtype.names:
+                values = self._column(batch, name)
+                if dtype[name].hasobject:
+                    # element by element so that list values aren't turned into extra dimensions
+                    column = page[name]
+                    for i, value in enumerate(values):
+                        column[i] = value
+                else:
+                    page[name] = numpy.array(values, dtype=dtype[name])
+            pages.append(page)
+        if not pages:
+            return numpy.empty(0, dtype=dtype).view(numpy.recarray)
+        return numpy.concatenate(pages).view(numpy.recarray)
+
+
+    def _numpy_dtype(self, batch):
+        return numpy.dtype([(name, COLUMN_TYPES.get(self.types.get(name), (None, None, 'O'))[2])
+                            for name in batch])
@@ -0,0 +1,54 @@
+import collections
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.expressions import PATH_VALUE, FETCHED_PATH
+
+
+class DynoGroupBy(object):
+    """ Aggregates the records of a DynoResult per group, created by DynoResult.group_by
+
+        music.scan().group_by('album').count()               # {'Purple Rain': 9, 'Parade': 12}
+        music.scan().group_by('artist', 'album').sum('plays')  # {('Prince', 'Parade'): 1200, ...}
+
+    Only the grouping and aggregated attributes are fetched and every page is
+    folded into the totals as it arrives, so memory grows with the number of
+    groups rather than the number of records. Records missing a grouping
+    attribute are grouped under None.
+    """
+    def __init__(self, result, attributes):
+        if not attributes:
+            raise ValueError('group_by needs at least one attribute')
+        self.result = result
+        self.attributes = list(attributes)
+
+
+    def _groups(self, *aggregated):
+        """ Yields (group, record) for every record, fetching only the attributes needed
+        """
+        paths = [FETCHED_PATH(path) for path in self.attributes + list(aggregated)]
+        for record in self.result.select(*paths):
+            values = tuple(PATH_VALUE(record, path) for path in self.attributes)
+            yield (values if len(values) > 1 else values[0]), record
+
+
+    def count(self):
+        """ Number of records in each group
+
+        Return:
+        dict: group value, or tuple of values, to count
+        """
+        counts = collections.Counter(group for group, record in self._groups())
+        return dict(counts)
+
+
+    def sum(self, attribute):
+        """ Sum of a numeric attribute in each group, records without it are skipped
+        """
+        totals = {}
+        for group, record in self._groups(attribute):
+            value = PATH_VALUE(record, attribute)
+            if value is not None:
+                totals[group] = totals.get(group, 0) + value
+        return totals
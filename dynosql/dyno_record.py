@@ -1,5 +1,6 @@
 import botocore
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -7,23 +8,37 @@ from dynosql.helper_methods import DYNAMODB_DATATYPES_LOOKUP
 from dynosql.helper_methods import DYNAMODB_DATATYPES_LOOKUP2
 from dynosql.helper_methods import DYNAMODB_DATATYPES_REVERSE_LOOKUP
 from dynosql.helper_methods import UNFLUFF
+from dynosql.expressions import PATH_VALUE, UpdateExpression
 
 class DynoRecord(object):
     """ DynoRecord is the wrapper class around each record
 
+        Records are lazy, nothing is fetched until an attribute is read.
+        The first attribute read only fetches that attribute using a
+        ProjectionExpression (unless the table caches records), reading any
+        other attribute then fetches the whole record once, as .json does.
+        record.fetch(['album', 'released']) fetches several attributes in one
+        request and later reads of them are served locally. Assigning
+        attributes never fetches the record.
+
+        Instances are slotted, they carry no __dict__.
     """
-    def __init__(self, adapter, table_name, primary_key, attributes=None):
+    __slots__ = ('adapter', 'table_name', 'primary_key', 'cache', '_json', '_partial')
+
+    def __init__(self, adapter, table_name, primary_key, attributes=None, cache=None):
         self.adapter = adapter
         self.table_name = table_name
         self.primary_key = primary_key
-        self._json = { }
+        self.cache = cache
+        self._json = None
+        # attributes fetched by projection before the whole record was needed
+        self._partial = {}
 
-        if not attributes:
-            # Fetching data
-            self._json = self.adapter.get_item(table_name, primary_key)
-        else:
+        if attributes:
             # Inserting data
             self.adapter.put_item(table_name, primary_key, attributes)
+            if self.cache is not None:
+                self.cache.invalidate(primary_key)
 
 
     # def __new__(cls, table, key, attributes=None):
@@ -33,25 +48,246 @@ class DynoRecord(object):
     #          pass
 
 
+    def fetch(self, attributes=None):
+        """ Fetch the record, or only some of its attributes, from DynamoDB
+
+        Parameters:
+        attributes (list): only fetch these attributes, document paths such as 'charts.us' are accepted
+
+        Return:
+        dict: the fetched attributes
+        """
+        if attributes:
+            record = self.adapter.get_item(self.table_name, self.primary_key, attributes=attributes)
+            # a document path only fetches part of its top level attribute, don't remember that as its value
+            nested = {re.split(r'[.\[]', path, 1)[0] for path in attributes if re.search(r'[.\[]', path)}
+            self._partial.update((name, value) for name, value in record.items()
+                                 if name not in nested or name in attributes)
+            return record
+
+        cached = self.cache.get(self.primary_key) if self.cache is not None else None
+        if cached is not None:
+            self._json = cached
+        else:
+            self._json = self.adapter.get_item(self.table_name, self.primary_key)
+            if self.cache is not None:
+                self.cache.set(self.primary_key, self._json)
+        self._partial = {}
+        return self._json
+
+
     def __getitem__(self, key):
         """
         """
-        logger.info('getitem: %s' % str(key))
+        logger.debug('getitem: %s', key)
+        if self._json is None:
+            if key in self._partial:
+                return self._partial[key]
+            # only the first read is projected, one GetItem per attribute would cost more than the record.
+            # With a cache the whole record is worth fetching so that it can be cached
+            if not self._partial and (self.cache is None or not self.cache.enabled) and key in self.fetch([key]):
+                return self._partial[key]
         try:
-            return self._json[key]
+            return self.json[key]
         except KeyError:
-            return self._json
+            return self.json
 
 
     def __setitem__(self, key, attributes):
         """
         """
-        logger.info('setitem: %s - %s' % (key, attributes))
+        logger.debug('setitem: %s - %s', key, attributes)
         # logger.info(self.primary_key)
         self.adapter.update_item(self.table_name, self.primary_key, key, attributes)
+        if self.cache is not None:
+            self.cache.invalidate(self.primary_key)
+        if re.search(r'[.\[]', key):
+            self._forget([re.split(r'[.\[]', key, 1)[0]])
+        elif self._json is not None:
+            self._json[key] = attributes
+        elif key in self._partial:
+            self._partial[key] = attributes
+
+
+    def update(self, values=None, return_values='UPDATED_NEW', **kwargs):
+        """ Set several attributes with a single UpdateItem call
+
+        Parameters:
+        values (dict): attributes to set, keyword arguments are also accepted
+        return_values (string): ReturnValues used to keep the local copy current
+
+        Return:
+        dict: the attributes returned by DynamoDB
+        """
+        update = UpdateExpression()
+        for name, value in dict(values or {}, **kwargs).items():
+            update.set(name, value)
+        return self._apply(update, return_values)
+
+
+    def increment(self, key, amount=1, condition=None):
+        """ Adds amount to a numeric attribute on the server with ADD, a missing
+            attribute counts as 0. One UpdateItem call, safe under concurrency:
+
+            table['Prince', 'Purple Rain'].increment('plays')
+
+        Parameters:
+        key (string): attribute name or document path, e.g. 'stats.plays'
+        amount (int/float): negative amounts decrement
+        condition (Condition): only update when the stored record satisfies it,
+            raises ConditionFailedError otherwise
+
+        Return:
+        int/float: the new value
+        """
+        return PATH_VALUE(self._apply(UpdateExpression().add(key, amount), 'UPDATED_NEW', condition), key)
+
+
+    def append(self, key, values, condition=None):
+        """ Appends values to a list attribute on the server with list_append, the
+            list is created when the record doesn't have it
+
+        Parameters:
+        key (string): attribute name
+        values (list): elements to append
+        condition (Condition): only update when the stored record satisfies it
+
+        Return:
+        list: the whole list after the append
+        """
+        return PATH_VALUE(self._apply(UpdateExpression().append(key, values), 'UPDATED_NEW', condition), key)
+
+
+    def set_if_not_exists(self, key, value, condition=None):
+        """ Sets an attribute with if_not_exists, an existing value is kept
+
+        Parameters:
+        key (string): attribute name
+        value: value used when the attribute doesn't exist
+        condition (Condition): only update when the stored record satisfies it
+
+        Return:
+        the value of the attribute after the update
+        """
+        update = UpdateExpression().set_if_not_exists(key, value)
+        return PATH_VALUE(self._apply(update, 'UPDATED_NEW', condition), key)
+
+
+    def remove(self, *keys, condition=None):
+        """ Removes attributes from the record with REMOVE
+
+        Parameters:
+        keys (string): attribute names
+        condition (Condition): only update when the stored record satisfies it
+        """
+        update = UpdateExpression()
+        for key in keys:
+            update.remove(key)
+        self._apply(update, 'UPDATED_NEW', condition)
+
+
+    def batch(self, return_values='UPDATED_NEW', condition=None):
+        """ Collects assignments, deletions and additions and sends them as one UpdateItem
+            when the with block exits without an exception
+
+            with table['Prince', 'Purple Rain'].batch() as record:
+                record['released'] = 1984
+                record.add('plays', 1)
+                del record['label']
+        """
+        return DynoRecordBatch(self, return_values, condition)
+
+
+    def _apply(self, update, return_values, condition=None):
+        if not len(update):
+            return {}
+        attributes = self.adapter.update(self.table_name, self.primary_key, update, return_values=return_values,
+                                         condition=condition)
+        if self.cache is not None:
+            self.cache.invalidate(self.primary_key)
+
+        if return_values == 'ALL_NEW':
+            self._json = dict(attributes)
+            self._partial = {}
+        elif return_values == 'UPDATED_NEW':
+            # only the updated parts of nested attributes are returned
+            nested = update.nested()
+            if nested:
+                self._forget(nested)
+            local = self._json if self._json is not None else self._partial
+            local.update((name, value) for name, value in attributes.items() if name not in nested)
+            for name in update.removed():
+                local.pop(name, None)
+        else:
+            # the local copy can't be trusted any more
+            self._json = None
+            self._partial = {}
+        return attributes
+
+
+    def _forget(self, names):
+        """ Drops the local copy of attributes whose value isn't known any more
+        """
+        if self._json is not None:
+            self._partial = self._json
+            self._json = None
+        for name in names:
+            self._partial.pop(name, None)
 
 
     @property
     def json(self):
+        if self._json is None:
+            self.fetch()
         return self._json
 
+
+    def __repr__(self):
+        return '<DynoRecord %s %s>' % (self.table_name, str(self.primary_key))
+
+
+class DynoRecordBatch(object):
+    """ Context manager returned by DynoRecord.batch
+    """
+    def __init__(self, record, return_values, condition=None):
+        self.record = record
+        self.return_values = return_values
+        self.condition = condition
+        self.update = UpdateExpression()
+
+
+    def __setitem__(self, key, value):
+        self.update.set(key, value)
+
+
+    def __delitem__(self, key):
+        self.update.remove(key)
+
+
+    def add(self, key, value):
+        """ Add to a number or insert elements into a set
+        """
+        self.update.add(key, value)
+
+
+    def delete(self, key, value):
+        """ Remove elements from a set
+        """
+        self.update.delete(key, value)
+
+
+    def append(self, key, values):
+        self.update.append(key, values)
+
+
+    def set_if_not_exists(self, key, value):
+        self.update.set_if_not_exists(key, value)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.record._apply(self.update, self.return_values, self.condition)
@@ -0,0 +1,293 @@
+import itertools
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+from dynosql.compact_record import CompactRecord
+from dynosql.dyno_columns import DynoColumns
+from dynosql.dyno_group_by import DynoGroupBy
+from dynosql.expressions import PATH_VALUE, FETCHED_PATH
+from dynosql.query_plan import EXPLAIN
+
+
+class DynoResult(object):
+    """ DynoResult is a lazy iterator over the records returned by a scan
+        Nothing is fetched until it is iterated, each response page is decoded
+        only when it is reached and LastEvaluatedKey is followed until the
+        table is exhausted, so results of any size use constant memory.
+
+        It can be iterated record by record or page by page with pages().
+        Records can also be indexed, each lookup iterates from the start.
+
+        When parallel is set the scan is split into that many segments which
+        are read concurrently, records then arrive in no particular order.
+
+        count() is answered by DynamoDB with Select=COUNT, sum, min, max and
+        group_by fold each page into the result as it arrives, fetching only
+        the attributes they need.
+
+        to_arrow, to_parquet and to_numpy decode pages straight into columns.
+        compact() yields tuple backed CompactRecords instead of dicts.
+    """
+    def __init__(self, adapter, table_name, operation, params=None, page_size=None, limit=None, parallel=None,
+                 attributes=None, plan=None, compact=False):
+        self.adapter = adapter
+        self.table_name = table_name
+        self.operation = operation
+        self.params = params or {}
+        self.page_size = page_size
+        self.limit = limit
+        self.parallel = parallel
+        self.attributes = attributes
+        self.plan = plan
+        self.compact_records = compact
+
+
+    def _responses(self, parallel=None, **extra):
+        """ Raw responses of the scan or query, following LastEvaluatedKey
+        """
+        params = dict(self.params, **extra)
+        if self.page_size:
+            params['Limit'] = self.page_size
+        parallel = parallel or self.parallel
+        if parallel and parallel > 1 and self.operation == 'scan':
+            return self.adapter.parallel_paginate(self.operation, self.table_name, parallel, **params)
+        return self.adapter.paginate(self.operation, self.table_name, **params)
+
+
+    def _projected(self, attributes):
+        """ Request arguments fetching only attributes, merged with the names of any filter
+        """
+        projection = self.adapter.projection(self.table_name, attributes)
+        if projection:
+            names = dict(self.params.get('ExpressionAttributeNames', {}))
+            names.update(projection.pop('ExpressionAttributeNames'))
+            projection['ExpressionAttributeNames'] = names
+        return projection
+
+
+    def item_pages(self, attributes=None):
+        """ Yields the undecoded DynamoDB items of each page, at most limit items in total
+
+        Parameters:
+        attributes (list): only fetch these attributes, defaults to the result's selection
+
+        Return:
+        generator: of lists of items such as {'artist': {'S': 'Prince'}}
+        """
+        remaining = self.limit
+        if remaining is not None and remaining <= 0:
+            return
+        responses = self._responses(**self._projected(attributes or self.attributes))
+        try:
+            for response in responses:
+                items = response['Items']
+                if remaining is not None:
+                    items = items[:remaining]
+                    remaining -= len(items)
+                yield items
+                if remaining == 0:
+                    return
+        finally:
+            # stops any segment workers as soon as the consumer is done
+            responses.close()
+
+
+    def pages(self):
+        """ Yields a list of records for each page returned by DynamoDB
+
+        Return:
+        generator: of lists of records
+        """
+        if self.compact_records:
+            # a document path is kept as the part of its top level attribute that was fetched
+            fields = list(dict.fromkeys(re.split(r'[.\[]', path, 1)[0] for path in self.attributes))
+            decode = CompactRecord.decoder(fields, self.adapter.attribute_types(self.table_name))
+            decode_items = lambda items: [decode(item) for item in items]
+        else:
+            decode_items = self.adapter.codec(self.table_name).decode_items
+        item_pages = self.item_pages()
+        try:
+            for items in item_pages:
+                yield decode_items(items)
+        finally:
+            item_pages.close()
+
+
+    def select(self, *attributes):
+        """ Only fetch and decode some attributes of each record
+
+            table.filter(table.released > 1990).select('album', 'charts.us', 'tags[0]')
+
+        Key attributes are always included.
+
+        Parameters:
+        attributes (string): attribute names or document paths into maps and lists
+
+        Return:
+        DynoResult: a new result fetching only the selected attributes
+        """
+        if len(attributes) == 1 and isinstance(attributes[0], (list, tuple)):
+            attributes = attributes[0]
+        return DynoResult(self.adapter, self.table_name, self.operation, self.params, page_size=self.page_size,
+                          limit=self.limit, parallel=self.parallel, attributes=list(attributes), plan=self.plan,
+                          compact=self.compact_records)
+
+
+    def compact(self, *attributes):
+        """ Yield tuple backed CompactRecords sharing their field names instead of dicts,
+            a fraction of the memory for large results
+
+            music.scan().compact()                          # key and declared attributes
+            music.scan().compact('artist', 'song', 'plays')
+
+        Only the fields are fetched, they are decoded with the types declared
+        when the table was created.
+
+        Parameters:
+        attributes (string): top level attribute names, defaults to the key attributes
+            followed by the attributes declared when the table was created
+
+        Return:
+        DynoResult: a new result of CompactRecords
+        """
+        if len(attributes) == 1 and isinstance(attributes[0], (list, tuple)):
+            attributes = attributes[0]
+        fields = list(attributes or self.attributes or [])
+        if not fields:
+            table_schema = self.adapter.key_schemas(self.table_name)[0]
+            keys = [name for name in table_schema[1:] if name is not None]
+            fields = keys + sorted(set(self.adapter.attribute_types(self.table_name)) - set(keys))
+        return DynoResult(self.adapter, self.table_name, self.operation, self.params, page_size=self.page_size,
+                          limit=self.limit, parallel=self.parallel, attributes=fields, plan=self.plan, compact=True)
+
+
+    def explain(self):
+        """ Which operation and index are used to read the records
+
+            table.filter(table.album == 'Parade').explain()
+            # {'operation': 'query', 'index': 'album_index', 'key_condition': 'album = :k0', 'filter': None}
+
+        Return:
+        dict: operation, index, key_condition and filter
+        """
+        return EXPLAIN(self.operation, self.params)
+
+
+    def count(self, parallel=None):
+        """ Number of matching records, counted by DynamoDB with Select=COUNT so no
+            record is downloaded or decoded
+
+        Parameters:
+        parallel (int): number of segments counted concurrently, defaults to the result's parallel,
+                        ignored when the result is a Query
+
+        Return:
+        int: number of records, at most limit
+        """
+        if self.limit is not None and self.limit <= 0:
+            return 0
+        total = 0
+        responses = self._responses(parallel=parallel, Select='COUNT')
+        try:
+            for response in responses:
+                total += response['Count']
+                if self.limit is not None and total >= self.limit:
+                    return self.limit
+        finally:
+            responses.close()
+        return total
+
+
+    def values(self, attribute):
+        """ Streams the values of one attribute, only that attribute is fetched and
+            records without it are skipped
+        """
+        for record in self.select(FETCHED_PATH(attribute)):
+            value = PATH_VALUE(record, attribute)
+            if value is not None:
+                yield value
+
+
+    def sum(self, attribute):
+        """ Sum of a numeric attribute, accumulated page by page
+        """
+        return sum(self.values(attribute))
+
+
+    def min(self, attribute, default=None):
+        """ Smallest value of an attribute, default when no record has it
+        """
+        return min(self.values(attribute), default=default)
+
+
+    def max(self, attribute, default=None):
+        """ Largest value of an attribute, default when no record has it
+        """
+        return max(self.values(attribute), default=default)
+
+
+    def group_by(self, *attributes):
+        """ Groups the records by the values of some attributes
+
+            table.scan().group_by('album').count()   # {'Purple Rain': 9, 'Parade': 12}
+
+        Return:
+        DynoGroupBy:
+        """
+        return DynoGroupBy(self, attributes)
+
+
+    def columns(self, columns=None):
+        """ Columnar view of the records, see DynoColumns
+
+        Parameters:
+        columns (list): attribute names, defaults to every attribute
+
+        Return:
+        DynoColumns:
+        """
+        return DynoColumns(self, columns)
+
+
+    def to_arrow(self, columns=None):
+        """ Records as a pyarrow.Table, decoded column by column, requires pyarrow
+        """
+        return self.columns(columns).to_arrow()
+
+
+    def to_parquet(self, path, columns=None, **options):
+        """ Writes the records to a parquet file one page at a time, requires pyarrow
+
+        Return:
+        int: number of records written
+        """
+        return self.columns(columns).to_parquet(path, **options)
+
+
+    def to_numpy(self, columns=None):
+        """ Records as a numpy record array, requires numpy
+        """
+        return self.columns(columns).to_numpy()
+
+
+    def __iter__(self):
+        for page in self.pages():
+            for record in page:
+                yield record
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(itertools.islice(self, index.start, index.stop, index.step))
+        if index < 0:
+            raise IndexError('DynoResult does not support negative indexes')
+        try:
+            return next(itertools.islice(self, index, None))
+        except StopIteration:
+            raise IndexError('DynoResult index out of range')
+
+
+    def __repr__(self):
+        return '<DynoResult %s %s>' % (self.operation, self.table_name)
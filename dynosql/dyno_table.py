@@ -5,6 +5,8 @@ logger = logging.getLogger(__name__)
 
 from dynosql.dyno_record import DynoRecord
 from dynosql.dyno_attribute import DynoAttribute
+from dynosql.item_cache import ItemCache
+from dynosql.loader import Loader
 
 from dynosql.helper_methods import DYNAMODB_DATATYPES_LOOKUP
 from dynosql.helper_methods import DYNAMODB_DATATYPES_LOOKUP2
@@ -24,17 +26,37 @@ class DynoTable(object):
          * filtering by non primary key attributes
          * bulk inserting or updates
 
+        Records read by key can be kept in an in-process ItemCache, writes made
+        through the table and its records invalidate the cached copy.
+
+        A RateLimiter paces every read and write made for the table to its
+        target rates, backing off when DynamoDB throttles.
+
+        With create=False the table is bound to an existing DynamoDB table
+        without any request, it is described once its key schema is needed
+        and it is not deleted when the DynoTable is garbage collected.
+
     """
-    def __init__(self, adapter, table_name, partition_key=None, sort_key=None, **attributes):
+    def __init__(self, adapter, table_name, partition_key=None, sort_key=None, cache=None, rate_limiter=None,
+                 create=True, **attributes):
+        # set first so __del__ never drops a table this instance didn't create
+        self.owns_table = create
         self.adapter = adapter
         self.table_name = table_name
+        self.cache = cache if cache is not None else ItemCache()
         # self.partition_key = partition_key
         # self.sort_key = sort_key
         self.__info = None
         self.queries = []
-        logger.info(partition_key)
-        logger.info(sort_key)
-        self.__info = self.adapter.create_table(table_name=table_name, partition_key=partition_key, sort_key=sort_key, attributes=attributes)
+        logger.debug(partition_key)
+        logger.debug(sort_key)
+        if create:
+            self.__info = self.adapter.create_table(table_name=table_name, partition_key=partition_key, sort_key=sort_key, **attributes)
+        else:
+            self.adapter.bind_table(table_name, **attributes)
+        if rate_limiter is not None:
+            self.adapter.set_rate_limiter(table_name, rate_limiter,
+                                          self.info['Table'].get('ProvisionedThroughput'))
 
 
     def __setitem__(self, primary_key, attributes):
@@ -48,22 +70,51 @@ class DynoTable(object):
         Return:
         None: It is an assignment operator so cannot return a response
         """
-        logger.info('setitem: %s - %s' % (primary_key, attributes))
-        DynoRecord(self.adapter, self.table_name, primary_key, attributes)
+        logger.debug('setitem: %s - %s', primary_key, attributes)
+        DynoRecord(self.adapter, self.table_name, primary_key, attributes, cache=self.cache)
 
 
     def __getitem__(self, primary_key):
         """ Retreive record with key
 
+        On a table with a sort key, a partition key on its own returns every
+        record in the partition and a slice of sort keys returns a range:
+            table['Prince']
+            table['Prince', 'A':'M']    # sort key between 'A' and 'M' inclusive
+            table['Prince', ::-1]       # descending sort key order
+
         Parameters:
         primary_key (tuple/string): composite/primary key for the record
             otherwise a string containing the partition key
 
         Return:
-        dict: Returns record from DynamoDB
+        DynoRecord: Returns record from DynamoDB
+        DynoResult: when primary_key covers a partition or a range of sort keys
         """
-        logger.info('getitem: %s' % str(primary_key))
-        return DynoRecord(self.adapter, self.table_name, primary_key)
+        logger.debug('getitem: %s', primary_key)
+        if isinstance(primary_key, tuple) and len(primary_key) == 2 and isinstance(primary_key[1], slice):
+            return self.query(primary_key[0], primary_key[1])
+        if not isinstance(primary_key, tuple) and self.adapter.has_sort_key(self.table_name):
+            return self.query(primary_key)
+        return DynoRecord(self.adapter, self.table_name, primary_key, cache=self.cache)
+
+
+    def get(self, primary_key, attributes=None):
+        """ Fetch a record as a dict, optionally only some of its attributes
+
+            table.get(('Prince', 'Kiss'), attributes=['album', 'charts.us', 'tags[0]'])
+
+        Parameters:
+        primary_key (tuple/string): composite/primary key for the record
+        attributes (list): attribute names or document paths into maps and lists,
+            key attributes are always included
+
+        Return:
+        dict: the record, raises KeyError if it doesn't exist
+        """
+        if not attributes:
+            return DynoRecord(self.adapter, self.table_name, primary_key, cache=self.cache).fetch()
+        return self.adapter.get_item(self.table_name, primary_key, attributes=attributes)
 
 
     def __delitem__(self, primary_key):
@@ -72,12 +123,88 @@ class DynoTable(object):
         Parameters:
         primary_key (string/tuple): composite/primary key for the record
         """
-        logger.info('delete: %s' % str(primary_key))
+        logger.debug('delete: %s', primary_key)
         self.adapter.delete_item(self.table_name, primary_key)
+        self.cache.invalidate(primary_key)
+
+
+    def query(self, partition_key, sort_key=None, begins_with=None, reverse=False, page_size=None, limit=None):
+        """ Retreive the records of a partition, optionally within a range of sort keys
+
+        Parameters:
+        partition_key: value of the partition key
+        sort_key (slice/value): exact sort key or a slice of sort keys, bounds are inclusive
+        begins_with (string): only records whose sort key starts with this prefix
+        reverse (bool): return records in descending sort key order
+        page_size (int): number of records DynamoDB evaluates per request
+        limit (int): maximum number of records returned
+
+        Return:
+        DynoResult: lazy iterator over the records
+        """
+        return self.adapter.query(self.table_name, partition_key, sort_key=sort_key, begins_with=begins_with,
+                                  reverse=reverse, page_size=page_size, limit=limit)
+
+
+    def get_many(self, primary_keys, attributes=None, default=None):
+        """ Retreive many records with a single round trip per 100 keys
+
+        Parameters:
+        primary_keys (iterable): composite/primary keys for the records
+        attributes (list): only fetch these attributes
+        default: returned in place of records that don't exist
+
+        Return:
+        list: records in the same order as primary_keys
+        """
+        logger.debug('get_many: %s', self.table_name)
+        return self.adapter.batch_get(self.table_name, primary_keys, attributes=attributes, default=default)
+
+
+    def extend(self, records, max_workers=1):
+        """ Bulk inserts records using BatchWriteItem
+
+        Parameters:
+        records (iterable): dicts containing the key attributes and any other attributes,
+            a generator is consumed lazily
+        max_workers (int): number of batches written concurrently
+
+        Return:
+        None
+        """
+        logger.debug('extend: %s', self.table_name)
+        try:
+            self.adapter.batch_write(self.table_name, records, max_workers=max_workers)
+        finally:
+            # bulk writes don't track individual keys, drop anything they may have replaced
+            self.cache.clear()
+
+
+    def load(self, path, format=None, workers=4, checkpoint=True, **options):
+        """ Bulk loads a CSV or JSON lines file with parallel BatchWriteItem workers,
+            a failed load resumes from its checkpoint when run again, see Loader
+
+        Parameters:
+        path (string): CSV file with a header row or one JSON object per line
+        format (string): csv or jsonl, guessed from the extension when None
+        workers (int): number of concurrent BatchWriteItem workers
+        checkpoint (bool/string): checkpoint file, True uses path + '.checkpoint', False disables it
+        options (dict): queue_size and checkpoint_interval
+
+        Return:
+        dict: rows loaded, resumed_from offset, offset and seconds taken
+        """
+        logger.debug('load: %s into %s', path, self.table_name)
+        try:
+            return Loader(self.adapter, self.table_name, path, format=format, workers=workers,
+                          checkpoint=checkpoint, **options).run()
+        finally:
+            self.cache.clear()
 
 
     def __del__(self):
-        """ Deletes the referenced table from database
+        """ Deletes the referenced table from database, unless the table was bound
+            with create=False
 
         Parameters:
         None
@@ -85,29 +212,128 @@ class DynoTable(object):
         Return:
         None
         """
-        self.adapter.delete_table(self.table_name)
+        if self.owns_table:
+            self.adapter.delete_table(self.table_name)
 
 
     @property
     def info(self):
+        if self.__info is None:
+            self.__info = self.adapter.describe_table(self.table_name)
         return self.__info
 
 
+    @property
+    def indexes(self):
+        """ Secondary indexes of the table, see BotocoreAdapter.indexes
+        """
+        return self.adapter.indexes(self.table_name)
+
+
+    def explain(self, filter_expression=None):
+        """ Shows whether filter would Query the table, Query an index or Scan
+
+        Return:
+        dict: operation, index, key_condition and filter
+        """
+        return self.adapter.plan(self.table_name, filter_expression).explain()
+
+
     def __getattr__(self, name):
-        logger.info(name)
+        logger.debug(name)
         #self.queries.append(DynoAttribute(name))
         return DynoAttribute(name) #self.queries[-1]
 
     def __setattr__(self, name, value):
-        logger.info(name)
-        logger.info(value)
+        logger.debug(name)
+        logger.debug(value)
         super(DynoTable, self).__setattr__(name, value)
 
 
-    def filter(self, filter_expression):
-        # logger.info(self.queries)
-        logger.info(filter_expression)
-        return self.adapter.filter(self.table_name, filter_expression)
+    def filter(self, filter_expression=None, page_size=None, limit=None, parallel=None):
+        """ Scan the table for records matching a condition on their attributes
+
+        Parameters:
+        filter_expression (Condition): built from table attributes e.g. (table.released >= 1984) & table.album.exists()
+        page_size (int): number of records DynamoDB evaluates per request
+        limit (int): maximum number of records returned
+        parallel (int): number of segments scanned concurrently
+
+        Return:
+        DynoResult: lazy iterator over the matching records, use .pages() to iterate page by page
+        """
+        logger.debug(filter_expression)
+        return self.adapter.filter(self.table_name, filter_expression, page_size=page_size, limit=limit, parallel=parallel)
+
+
+    def scan(self, page_size=None, limit=None, parallel=None):
+        """ Iterate over every record in the table
+
+        Parameters:
+        page_size (int): number of records DynamoDB evaluates per request
+        limit (int): maximum number of records returned
+        parallel (int): number of segments scanned concurrently
+
+        Return:
+        DynoResult: lazy iterator over the records
+        """
+        return self.filter(None, page_size=page_size, limit=limit, parallel=parallel)
+
+
+    def count(self, parallel=None):
+        """ Number of records in the table, counted by DynamoDB without downloading them
+
+        Parameters:
+        parallel (int): number of segments counted concurrently
+
+        Return:
+        int:
+        """
+        return self.scan().count(parallel=parallel)
+
+
+    def to_arrow(self, filter_expression=None, columns=None, parallel=None):
+        """ Matching records as a pyarrow.Table, see DynoColumns
+
+        Parameters:
+        filter_expression (Condition): None exports the whole table
+        columns (list): attribute names, defaults to every attribute
+        parallel (int): number of segments scanned concurrently
+
+        Return:
+        pyarrow.Table:
+        """
+        return self.filter(filter_expression, parallel=parallel).to_arrow(columns)
+
+
+    def to_parquet(self, path, filter_expression=None, columns=None, parallel=None, **options):
+        """ Writes matching records to a parquet file page by page, memory stays bounded
+            whatever the size of the table
+
+        Parameters:
+        path (string): file to write
+        filter_expression (Condition): None exports the whole table
+        columns (list): attribute names, defaults to every attribute
+        parallel (int): number of segments scanned concurrently
+        options (dict): passed to pyarrow.parquet.ParquetWriter
+
+        Return:
+        int: number of records written
+        """
+        return self.filter(filter_expression, parallel=parallel).to_parquet(path, columns, **options)
+
+
+    def to_numpy(self, filter_expression=None, columns=None, parallel=None):
+        """ Matching records as a numpy record array, for when pyarrow isn't installed
+
+        Return:
+        numpy.recarray:
+        """
+        return self.filter(filter_expression, parallel=parallel).to_numpy(columns)
+
+
+    def __iter__(self):
+        return iter(self.scan())
 
 
     def drop(self):
@@ -5,8 +5,6 @@
 import logging
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(format="%(asctime)s:%(name)s:%(lineno)s:%(levelname)s - %(message)s",
-                    level="INFO")
 
 from dynosql.dyno_table import DynoTable
 from dynosql.adapters.botocore import BotocoreAdapter
@@ -17,8 +15,23 @@ class Dynosql(object):
         through the call method creates a table reference
     """
 
-    def __init__(self, endpoint_url='http://localhost:8000/'):
-        self.adapter = BotocoreAdapter(endpoint_url=endpoint_url)
+    def __init__(self, endpoint_url='http://localhost:8000/', adapter=None, **client_options):
+        """ Instances with the same endpoint and client options share one botocore client
+
+        Parameters:
+        endpoint_url (string):
+        region_name (string):
+        max_pool_connections (int): size of the HTTP connection pool, defaults to 10
+        connect_timeout (int/float): seconds to wait for a connection, defaults to 60
+        read_timeout (int/float): seconds to wait for a response, defaults to 60
+        tcp_keepalive (bool): enable TCP keepalive, defaults to False
+        retry_mode (string): botocore retry mode 'legacy', 'standard' or 'adaptive'
+        max_attempts (int): botocore retry attempts
+        shared_client (bool): set to False for a private client
+        adapter (BotocoreAdapter): use this adapter, e.g. an InMemoryAdapter, instead of creating one
+        """
+        self.adapter = adapter if adapter is not None else BotocoreAdapter(endpoint_url=endpoint_url,
+                                                                           **client_options)
         # session = botocore.session.get_session()
         # self.client = session.create_client('dynamodb', endpoint_url=endpoint_url)
 
@@ -29,14 +42,47 @@ class Dynosql(object):
         table_name (string):
         partition_key (tuple):
         sort_key (tuple):
+        cache (ItemCache): optional cache of records read by key
+        rate_limiter (RateLimiter): optional pacing of the table's reads and writes
+        global_indexes (dict): index name to {'partition_key': (name, type), 'sort_key': (name, type),
+            'projection': 'ALL'}, filters on an index key are run as a Query on the index
+        local_indexes (dict): index name to {'sort_key': (name, type), 'projection': 'ALL'}
         attributes (dict):
 
         Returns:
         DynoTable: 
         """
-        logger.info('creating table: %s' % table_name)
+        logger.info('creating table: %s', table_name)
         return DynoTable(self.adapter, table_name, partition_key, sort_key, **attributes)
 
+    def table(self, table_name, **attributes):
+        """ References an existing table without creating or describing it, the key
+            schema is described on first use and shared through the metadata cache.
+            The table is not deleted when the reference is garbage collected.
+
+        Parameters:
+        table_name (string):
+        cache (ItemCache): optional cache of records read by key
+        rate_limiter (RateLimiter): optional pacing of the table's reads and writes
+        attributes (dict): types of other attributes, used when decoding
+
+        Returns:
+        DynoTable:
+        """
+        logger.info('binding table: %s', table_name)
+        return DynoTable(self.adapter, table_name, create=False, **attributes)
+
+    def warm_up(self, connections=None):
+        """ Opens pooled connections ahead of the first requests
+
+        Parameters:
+        connections (int): defaults to max_pool_connections
+
+        Returns:
+        int: number of connections warmed up
+        """
+        return self.adapter.warm_up(connections)
+
     # def __delitem__(self, key):
     #     self.client.delete_table(TableName=key)
     #     del self.__dict__[key]
@@ -51,7 +97,7 @@ class Dynosql(object):
         list: of tablenames in database
         """
         table_list = self.adapter.list_tables()
-        logger.info(table_list)
+        logger.debug(table_list)
         return table_list
 
 
@@ -0,0 +1,433 @@
+import functools
+import logging
+import re
+
+from dynosql.codec import encode_value
+
+logger = logging.getLogger(__name__)
+
+
+PATH_ELEMENT = re.compile(r'([^.\[\]]+)|\[(\d+)\]')
+
+
+def RENDER_PATH(attribute_path, name):
+    """ Renders a document path, name maps each attribute name to its placeholder
+    """
+    rendered = []
+    for attribute, index in PATH_ELEMENT.findall(attribute_path):
+        if index:
+            rendered.append('[%s]' % index)
+        else:
+            rendered.append(('.' if rendered else '') + name(attribute))
+    return ''.join(rendered)
+
+
+def PATH_VALUE(record, path):
+    """ Value at a document path such as 'charts.us' or 'tags[0]' of a decoded record, None when missing
+    """
+    value = record
+    for attribute, index in PATH_ELEMENT.findall(path):
+        try:
+            value = value[int(index)] if index else value[attribute]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+def FETCHED_PATH(path):
+    """ Part of a document path to project, DynamoDB compacts projected list
+        elements so the path is cut before the first list index
+    """
+    return path.split('[', 1)[0]
+
+
+class Placeholders(object):
+    """ Generates ExpressionAttributeNames (#n0, #n1, ...) and
+        ExpressionAttributeValues (:v0, :v1, ...) for an expression
+
+        Placeholders are numbered so they never run out, the same attribute
+        name is always given the same placeholder.
+    """
+    def __init__(self):
+        self.names = {}
+        self.values = {}
+        self._name_placeholders = {}
+
+
+    def path(self, attribute_path):
+        """ Placeholder form of a document path such as 'charts.us[0]', every
+            attribute name in the path gets its own placeholder
+        """
+        return RENDER_PATH(attribute_path, self.name)
+
+
+    def name(self, attribute_name):
+        try:
+            return self._name_placeholders[attribute_name]
+        except KeyError:
+            placeholder = '#n%d' % len(self.names)
+            self.names[placeholder] = attribute_name
+            self._name_placeholders[attribute_name] = placeholder
+            return placeholder
+
+
+    def value(self, value):
+        placeholder = ':v%d' % len(self.values)
+        self.values[placeholder] = encode_value(value)
+        return placeholder
+
+
+    def params(self):
+        """ Returns the ExpressionAttributeNames/Values arguments, omitting empty ones
+        """
+        params = {}
+        if self.names:
+            params['ExpressionAttributeNames'] = self.names
+        if self.values:
+            params['ExpressionAttributeValues'] = self.values
+        return params
+
+
+class UpdateExpression(object):
+    """ Collects SET, REMOVE, ADD and DELETE actions for a single UpdateItem call
+
+    DynamoDB rejects an update that touches the same attribute twice, so the
+    last action on an attribute replaces any earlier one.
+    """
+    CLAUSES = ('SET', 'REMOVE', 'ADD', 'DELETE')
+    # actions written as a SET of a function of the current value
+    SET_FUNCTIONS = ('APPEND', 'IF_NOT_EXISTS')
+
+    def __init__(self):
+        self.actions = {}
+
+
+    def set(self, name, value):
+        self.actions[name] = ('SET', value)
+        return self
+
+
+    def set_if_not_exists(self, name, value):
+        """ Sets an attribute only when the record doesn't have it yet
+        """
+        self.actions[name] = ('IF_NOT_EXISTS', value)
+        return self
+
+
+    def append(self, name, values):
+        """ Appends elements to a list attribute, the list is created when it doesn't exist
+        """
+        self.actions[name] = ('APPEND', list(values))
+        return self
+
+
+    def remove(self, name):
+        self.actions[name] = ('REMOVE', None)
+        return self
+
+
+    def add(self, name, value):
+        """ Adds a number to a numeric attribute or elements to a set attribute
+        """
+        self.actions[name] = ('ADD', value)
+        return self
+
+
+    def delete(self, name, value):
+        """ Removes elements from a set attribute
+        """
+        self.actions[name] = ('DELETE', value)
+        return self
+
+
+    def compile(self, placeholders=None):
+        """ Builds the UpdateItem arguments
+
+        Parameters:
+        placeholders (Placeholders): shared with a ConditionExpression on the same call
+
+        Returns:
+        dict: UpdateExpression, ExpressionAttributeNames and ExpressionAttributeValues
+        """
+        placeholders = placeholders or Placeholders()
+        clauses = {clause: [] for clause in self.CLAUSES}
+        for name, (clause, value) in self.actions.items():
+            # document paths like 'stats.plays' update nested attributes, as in conditions and projections
+            path = placeholders.path(name)
+            if clause == 'SET':
+                clauses[clause].append('%s = %s' % (path, placeholders.value(value)))
+            elif clause == 'IF_NOT_EXISTS':
+                clauses['SET'].append('%s = if_not_exists(%s, %s)' % (path, path, placeholders.value(value)))
+            elif clause == 'APPEND':
+                clauses['SET'].append('%s = list_append(if_not_exists(%s, %s), %s)' % (
+                    path, path, placeholders.value([]), placeholders.value(value)))
+            elif clause == 'REMOVE':
+                clauses[clause].append(path)
+            else:
+                clauses[clause].append('%s %s' % (path, placeholders.value(value)))
+
+        expression = ' '.join('%s %s' % (clause, ', '.join(clauses[clause]))
+                              for clause in self.CLAUSES if clauses[clause])
+        params = placeholders.params()
+        params['UpdateExpression'] = expression
+        return params
+
+
+    def removed(self):
+        """ Names of the attributes this update removes
+        """
+        return [name for name, (clause, value) in self.actions.items() if clause == 'REMOVE']
+
+
+    def nested(self):
+        """ Top level attributes this update only changes part of, through a document path
+        """
+        return {re.split(r'[.\[]', name, 1)[0] for name in self.actions if re.search(r'[.\[]', name)}
+
+
+    def __len__(self):
+        return len(self.actions)
+
+
+
+COMPARATORS = ('=', '<>', '<', '<=', '>', '>=')
+
+
+class Operand(object):
+    """ Something a condition can compare: an attribute path or the size of one
+
+    Comparison operators build Conditions instead of returning booleans.
+    """
+    # a table hands out an operand for every attribute reference, keep them small
+    __slots__ = ()
+
+    def __eq__(self, value):
+        return Condition('compare', '=', self, value)
+
+
+    def __ne__(self, value):
+        return Condition('compare', '<>', self, value)
+
+
+    def __lt__(self, value):
+        return Condition('compare', '<', self, value)
+
+
+    def __le__(self, value):
+        return Condition('compare', '<=', self, value)
+
+
+    def __gt__(self, value):
+        return Condition('compare', '>', self, value)
+
+
+    def __ge__(self, value):
+        return Condition('compare', '>=', self, value)
+
+
+    def between(self, low, high):
+        """ low <= attribute <= high
+        """
+        return Condition('between', self, low, high)
+
+
+    def isin(self, values):
+        values = list(values)
+        if not values:
+            raise ValueError('isin needs at least one value')
+        return Condition('in', self, *values)
+
+
+    __hash__ = object.__hash__
+
+
+
+class Path(Operand):
+    """ An attribute, or a path into a document attribute such as 'charts.us' or 'tags[0]'
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+    def begins_with(self, prefix):
+        return Condition('begins_with', self, prefix)
+
+
+    def contains(self, value):
+        """ The string contains a substring, or the set or list contains an element
+        """
+        return Condition('contains', self, value)
+
+
+    def exists(self):
+        return Condition('attribute_exists', self)
+
+
+    def not_exists(self):
+        return Condition('attribute_not_exists', self)
+
+
+    def size(self):
+        """ Length of a string, binary, set, list or map attribute, compare it like an attribute
+        """
+        return Size(self)
+
+
+    def signature(self, values):
+        return ('path', self.name)
+
+
+    def __repr__(self):
+        return '<%s %s>' % (type(self).__name__, self.name)
+
+
+
+class Size(Operand):
+    __slots__ = ('path',)
+
+    def __init__(self, path):
+        self.path = path
+
+
+    def signature(self, values):
+        return ('size', self.path.name)
+
+
+
+class Condition(object):
+    """ Node of a condition expression tree, combined with & | and ~
+
+        (music.released.between(1990, 1999) & music.genre.isin(['Pop', 'Rock'])) | ~music.album.exists()
+
+    Compiling only walks the tree to collect its values, the expression string
+    and attribute name placeholders are cached by the structure of the tree, so
+    a query built again with different values isn't rendered again.
+    """
+    def __init__(self, operator, *operands):
+        self.operator = operator
+        self.operands = operands
+
+
+    @classmethod
+    def coerce(cls, condition):
+        """ Accepts a Condition or an (attribute, operator, value) tuple
+        """
+        if isinstance(condition, Condition):
+            return condition
+        name, operator, value = condition
+        if operator not in COMPARATORS:
+            raise ValueError('Unknown comparison operator: {}'.format(operator))
+        return cls('compare', operator, Path(name), value)
+
+
+    def _combine(self, operator, other):
+        if not isinstance(other, Condition):
+            return NotImplemented
+        operands = []
+        for condition in (self, other):
+            operands.extend(condition.operands if condition.operator == operator else (condition,))
+        return Condition(operator, *operands)
+
+
+    def __and__(self, other):
+        return self._combine('AND', other)
+
+
+    def __or__(self, other):
+        return self._combine('OR', other)
+
+
+    def __invert__(self):
+        return Condition('NOT', self)
+
+
+    def __bool__(self):
+        raise TypeError('Conditions are combined with &, | and ~ instead of and, or and not')
+
+
+    def signature(self, values):
+        """ Structure of the tree with every value replaced by a marker, values are appended to values
+        """
+        operands = self.operands
+        signature = (self.operator,)
+        if self.operator == 'compare':
+            signature += (operands[0],)
+            operands = operands[1:]
+        for operand in operands:
+            if isinstance(operand, (Condition, Operand)):
+                signature += (operand.signature(values),)
+            else:
+                values.append(operand)
+                signature += (('value',),)
+        return signature
+
+
+    def compile(self, expression_name='FilterExpression', name_prefix='#n', value_prefix=':v'):
+        """ Builds the arguments of a scan, query or conditional write
+
+        Parameters:
+        expression_name (string): FilterExpression, ConditionExpression or KeyConditionExpression
+        name_prefix (string): prefix of the attribute name placeholders
+        value_prefix (string): prefix of the attribute value placeholders, prefixes let the
+            condition share a call with an UpdateExpression or another condition
+
+        Returns:
+        dict: the expression, ExpressionAttributeNames and ExpressionAttributeValues
+        """
+        values = []
+        expression, names = RENDER_CONDITION(self.signature(values), name_prefix, value_prefix)
+        params = {expression_name: expression}
+        if names:
+            params['ExpressionAttributeNames'] = dict(names)
+        if values:
+            params['ExpressionAttributeValues'] = {
+                '%s%d' % (value_prefix, i): encode_value(value) for i, value in enumerate(values)
+            }
+        return params
+
+
+    def __repr__(self):
+        return '<Condition %s>' % self.compile()['FilterExpression']
+
+
+@functools.lru_cache(maxsize=1024)
+def RENDER_CONDITION(signature, name_prefix, value_prefix):
+    """ Renders a condition signature
+
+    Returns:
+    tuple: (expression, ((placeholder, attribute name), ...))
+    """
+    names = {}
+    counter = [0]
+
+    def name(attribute_name):
+        if attribute_name not in names:
+            names[attribute_name] = '%s%d' % (name_prefix, len(names))
+        return names[attribute_name]
+
+    def render(node):
+        kind = node[0]
+        if kind == 'value':
+            counter[0] += 1
+            return '%s%d' % (value_prefix, counter[0] - 1)
+        if kind == 'path':
+            return RENDER_PATH(node[1], name)
+        if kind == 'size':
+            return 'size(%s)' % RENDER_PATH(node[1], name)
+        if kind == 'compare':
+            return '%s %s %s' % (render(node[2]), node[1], render(node[3]))
+        if kind == 'between':
+            return '%s BETWEEN %s AND %s' % (render(node[1]), render(node[2]), render(node[3]))
+        if kind == 'in':
+            return '%s IN (%s)' % (render(node[1]), ', '.join(render(option) for option in node[2:]))
+        if kind in ('AND', 'OR'):
+            return (' %s ' % kind).join('(%s)' % render(operand) for operand in node[1:])
+        if kind == 'NOT':
+            return 'NOT (%s)' % render(node[1])
+        # begins_with, contains, attribute_exists, attribute_not_exists
+        return '%s(%s)' % (kind, ', '.join(render(operand) for operand in node[1:]))
+
+    expression = render(signature)
+    return expression, tuple((placeholder, attribute) for attribute, placeholder in names.items())
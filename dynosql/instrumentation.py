@@ -0,0 +1,79 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Instrumentation(object):
+    """ Hands metrics about every adapter request to registered callbacks
+
+    Callbacks receive one dict per request, after it completes or fails:
+
+        {
+            'operation': 'query',        # botocore client method
+            'table': 'music',            # None for list_tables
+            'latency': 0.0123,           # seconds, including retries and rate limiting
+            'items': 25,                 # records returned or sent
+            'bytes': 4096,               # size of the response body
+            'consumed_capacity': 12.5,   # capacity units, None when not reported
+            'retries': 0,                # botocore retries plus throttling retries
+            'error': None,               # error code when the request failed
+        }
+
+    A Prometheus or StatsD shim only needs to be a callable:
+
+        dyno.adapter.instrumentation.subscribe(lambda m: histogram.labels(m['operation']).observe(m['latency']))
+
+    Nothing is measured while no callback is subscribed. Exceptions raised by
+    callbacks are logged and never reach the caller.
+    """
+    def __init__(self):
+        self._callbacks = ()
+        self._lock = threading.Lock()
+
+
+    @property
+    def enabled(self):
+        return bool(self._callbacks)
+
+
+    def subscribe(self, callback):
+        """ Registers a callback, returns it so it can be used as a decorator
+        """
+        with self._lock:
+            self._callbacks = self._callbacks + (callback,)
+        return callback
+
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._callbacks = tuple(c for c in self._callbacks if c != callback)
+
+
+    def emit(self, metrics):
+        # the tuple is replaced rather than mutated so it can be read without the lock
+        for callback in self._callbacks:
+            try:
+                callback(metrics)
+            except Exception:
+                logger.exception('instrumentation callback %r failed', callback)
+
+
+    @staticmethod
+    def count_items(operation, request, response):
+        """ Number of records returned by a read or written by a write
+        """
+        if 'Items' in response:
+            return len(response['Items'])
+        if 'Count' in response:
+            return response['Count']
+        if 'Responses' in response:
+            return sum(len(items) for items in response['Responses'].values())
+        if 'RequestItems' in request:
+            return sum(len(writes) for writes in request['RequestItems'].values()) - \
+                sum(len(writes) for writes in (response.get('UnprocessedItems') or {}).values())
+        if operation == 'get_item':
+            return 1 if 'Item' in response else 0
+        if 'Key' in request or 'Item' in request:
+            return 1
+        return 0
@@ -0,0 +1,132 @@
+import collections
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _sizeof(value):
+    """ Rough in-memory size of a decoded record
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(v) for v in value)
+    return size
+
+
+def _key(primary_key):
+    """ Hashable form of a primary key, composite keys may be given as lists
+    """
+    if isinstance(primary_key, list):
+        return tuple(primary_key)
+    return primary_key
+
+
+class ItemCache(object):
+    """ Thread safe LRU cache of records keyed by primary key
+
+    A cache created without max_entries is disabled, every lookup is a miss
+    and nothing is stored.
+
+    Parameters:
+    max_entries (int): maximum number of records held
+    max_bytes (int): maximum estimated size of the records held
+    ttl (float): seconds a record stays valid, None keeps records until evicted
+    """
+    def __init__(self, max_entries=0, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._records = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+
+    def get(self, primary_key):
+        """ Returns a copy of the cached record or None
+        """
+        if not self.enabled:
+            return None
+        primary_key = _key(primary_key)
+        with self._lock:
+            entry = self._records.get(primary_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, size, record = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(primary_key)
+                self.misses += 1
+                return None
+            self._records.move_to_end(primary_key)
+            self.hits += 1
+            return dict(record)
+
+
+    def set(self, primary_key, record):
+        if not self.enabled:
+            return
+        size = _sizeof(record)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        primary_key = _key(primary_key)
+        with self._lock:
+            if primary_key in self._records:
+                self._remove(primary_key)
+            self._records[primary_key] = (expires, size, dict(record))
+            self.bytes += size
+            while len(self._records) > self.max_entries or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                oldest = next(iter(self._records))
+                self._remove(oldest)
+                self.evictions += 1
+
+
+    def invalidate(self, primary_key):
+        if not self.enabled:
+            return
+        primary_key = _key(primary_key)
+        with self._lock:
+            if primary_key in self._records:
+                self._remove(primary_key)
+
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self.bytes = 0
+
+
+    def _remove(self, primary_key):
+        expires, size, record = self._records.pop(primary_key)
+        self.bytes -= size
+
+
+    def stats(self):
+        """ Returns the hit, miss and eviction counters
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._records),
+                'bytes': self.bytes,
+            }
+
+
+    def __len__(self):
+        return len(self._records)
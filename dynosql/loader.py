@@ -0,0 +1,265 @@
+import base64
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+
+# records sent per BatchWriteItem, the most DynamoDB accepts
+BATCH_SIZE = 25
+
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.json': 'jsonl',
+}
+
+# CSV fields are strings, declared attribute types say what to turn them into
+CONVERTERS = {
+    'str': str,
+    'int': int,
+    'long': int,
+    'float': float,
+    'decimal': Decimal,
+    'bool': lambda value: value.strip().lower() in ('true', '1', 'yes'),
+    'bytes': base64.b64decode,
+    'dict': json.loads,
+    'list': json.loads,
+}
+
+
+def FORMAT(path):
+    """ Input format of a file from its extension
+
+    Returns:
+    string: csv or jsonl
+    """
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        return FORMATS[extension]
+    except KeyError:
+        raise ValueError('Unknown input format for {}, pass format="csv" or format="jsonl"'.format(path))
+
+
+def OFFSET_LINES(stream, position):
+    """ Decodes the lines of a binary stream, position['offset'] is kept at the byte
+        offset right after the last line handed out
+    """
+    for line in stream:
+        position['offset'] += len(line)
+        yield line.decode('utf-8')
+
+
+class Loader(object):
+    """ Streams a CSV or JSON lines file into a table with parallel BatchWriteItem workers
+
+        stats = music.load('music.csv', workers=8)
+        python -m dynosql load music music.csv --workers 8
+
+    The file is parsed as a stream and cut into batches of 25 records that are
+    handed to the workers through a bounded queue, so memory stays flat
+    whatever the size of the file. CSV fields are converted with the types of
+    the table's key attributes and of the attributes declared when it was
+    created, other fields stay strings and empty fields are left out. JSON
+    numbers are loaded as Decimal so they are stored exactly.
+
+    Every few seconds the byte offset up to which every record has been
+    written is saved to a checkpoint file. Running the same load again after
+    a failure resumes from that offset, records after it that had already been
+    written are written again, which BatchWriteItem puts make harmless. The
+    checkpoint is removed once the whole file is loaded.
+
+    Parameters:
+    adapter (BotocoreAdapter):
+    table_name (string):
+    path (string): CSV file with a header row, or a file with one JSON object per line
+    format (string): csv or jsonl, guessed from the extension when None
+    workers (int): number of concurrent BatchWriteItem workers
+    checkpoint (bool/string): path of the checkpoint file, True uses path + '.checkpoint', False disables it
+    queue_size (int): batches waiting for a worker, defaults to 2 per worker
+    checkpoint_interval (float): seconds between checkpoint saves
+    """
+    def __init__(self, adapter, table_name, path, format=None, workers=4, checkpoint=True, queue_size=None,
+                 checkpoint_interval=5.0):
+        self.adapter = adapter
+        self.table_name = table_name
+        self.path = path
+        self.format = format or FORMAT(path)
+        if self.format not in ('csv', 'jsonl'):
+            raise ValueError('Unsupported format {}, use csv or jsonl'.format(self.format))
+        self.workers = max(1, workers)
+        self.checkpoint = path + '.checkpoint' if checkpoint is True else checkpoint or None
+        self.queue_size = queue_size or self.workers * 2
+        self.checkpoint_interval = checkpoint_interval
+
+        self.offset = 0
+        self.rows = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._done = {}
+        self._next = 0
+        self._saved = time.monotonic()
+
+
+    def _records(self, offset):
+        """ Yields (record, byte offset after the record) from offset onwards
+        """
+        position = {'offset': offset}
+        with open(self.path, 'rb') as stream:
+            if self.format == 'jsonl':
+                stream.seek(offset)
+                for line in OFFSET_LINES(stream, position):
+                    if line.strip():
+                        yield json.loads(line, parse_float=Decimal), position['offset']
+                return
+
+            header_position = {'offset': 0}
+            header = next(csv.reader(OFFSET_LINES(stream, header_position)), None)
+            if header is None:
+                return
+            position['offset'] = max(offset, header_position['offset'])
+            stream.seek(position['offset'])
+            converters = self._converters(header)
+            for row in csv.reader(OFFSET_LINES(stream, position)):
+                if row:
+                    yield {name: convert(value) for (name, convert), value in zip(converters, row) if value != ''}, \
+                        position['offset']
+
+
+    def _converters(self, header):
+        types = self.adapter.attribute_types(self.table_name)
+        return [(name, CONVERTERS.get(types.get(name), str)) for name in header]
+
+
+    def _load_checkpoint(self):
+        """ Offset and row count saved by an earlier run of the same load, 0 when there is none
+        """
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0, 0
+        with open(self.checkpoint) as checkpoint_file:
+            state = json.load(checkpoint_file)
+        stat = os.stat(self.path)
+        if state.get('table') != self.table_name or state.get('size') != stat.st_size or \
+                state.get('mtime') != stat.st_mtime:
+            logger.warning('ignoring checkpoint %s, it was saved for a different file or table', self.checkpoint)
+            return 0, 0
+        logger.info('resuming %s at byte %d, %d records already loaded', self.path, state['offset'], state['rows'])
+        return state['offset'], state['rows']
+
+
+    def _save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        stat = os.stat(self.path)
+        state = {'table': self.table_name, 'path': os.path.abspath(self.path), 'size': stat.st_size,
+                 'mtime': stat.st_mtime, 'offset': self.offset, 'rows': self.rows}
+        # written next to the checkpoint then renamed so a crash never leaves half a file
+        temporary = self.checkpoint + '.tmp'
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump(state, checkpoint_file)
+        os.replace(temporary, self.checkpoint)
+        self._saved = time.monotonic()
+
+
+    def _completed(self, sequence, offset, written):
+        """ Records a written batch, the checkpoint only moves past batches whose
+            predecessors are all written too
+        """
+        with self._lock:
+            self._done[sequence] = (offset, written)
+            while self._next in self._done:
+                self.offset, written = self._done.pop(self._next)
+                self.rows += written
+                self._next += 1
+            if time.monotonic() - self._saved >= self.checkpoint_interval:
+                self._save_checkpoint()
+
+
+    def _work(self, tasks, stop):
+        while not stop.is_set():
+            try:
+                task = tasks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if task is None:
+                return
+            sequence, records, offset = task
+            try:
+                written = self.adapter.batch_write(self.table_name, records)
+            except Exception as e:
+                with self._lock:
+                    self.error = self.error or e
+                stop.set()
+                return
+            self._completed(sequence, offset, written)
+
+
+    def run(self):
+        """ Loads the file, resuming from the checkpoint when there is one
+
+        Returns:
+        dict: rows loaded in total, resumed_from offset, bytes read up to and seconds taken
+
+        Raises:
+        the first error of a worker, the checkpoint then holds the offset to resume from
+        """
+        started = time.perf_counter()
+        resumed_from, self.rows = self._load_checkpoint()
+        self.offset = resumed_from
+        tasks = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        def offer(task):
+            # gives up when a worker failed so the reader never blocks on a full queue
+            while not stop.is_set():
+                try:
+                    tasks.put(task, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        threads = [threading.Thread(target=self._work, args=(tasks, stop), name='dynosql-loader-%d' % i, daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            sequence = 0
+            batch = []
+            for record, offset in self._records(resumed_from):
+                batch.append(record)
+                if len(batch) == BATCH_SIZE:
+                    if not offer((sequence, batch, offset)):
+                        break
+                    sequence += 1
+                    batch = []
+            if batch:
+                offer((sequence, batch, offset))
+            for _ in threads:
+                offer(None)
+        except BaseException:
+            # the file couldn't be parsed or the load was interrupted, workers finish the batch they hold
+            stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            if self.error is not None or stop.is_set():
+                self._save_checkpoint()
+
+        if self.error is not None:
+            raise self.error
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        stats = {'rows': self.rows, 'resumed_from': resumed_from, 'offset': self.offset,
+                 'seconds': time.perf_counter() - started}
+        logger.info('loaded %d records into %s', self.rows, self.table_name)
+        return stats
@@ -0,0 +1,163 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.expressions import Condition, Operand, Path
+
+
+# comparisons DynamoDB accepts on a sort key in a KeyConditionExpression
+RANGE_COMPARATORS = ('=', '<', '<=', '>', '>=')
+
+
+def EXPLAIN(operation, params):
+    """ Readable summary of the arguments of a scan or query, attribute name
+        placeholders are replaced by the names they stand for
+
+    Returns:
+    dict: operation, index, key_condition and filter
+    """
+    names = params.get('ExpressionAttributeNames', {})
+
+    def readable(expression):
+        if expression is None:
+            return None
+        # longest placeholders first so #n1 doesn't clobber #n10
+        for placeholder in sorted(names, key=len, reverse=True):
+            expression = expression.replace(placeholder, names[placeholder])
+        return expression
+
+    return {
+        'operation': operation,
+        'index': params.get('IndexName'),
+        'key_condition': readable(params.get('KeyConditionExpression')),
+        'filter': readable(params.get('FilterExpression')),
+    }
+
+
+class QueryPlan(object):
+    """ How a filter is executed: a Query on the table or one of its indexes, or a Scan
+
+    A Query is chosen whenever the top level of the condition (the operands of
+    an & chain) compares the hash key of the table or of an index for equality.
+    A comparison, between or begins_with on the range key of the same index is
+    moved into the KeyConditionExpression as well, the rest of the condition
+    stays a FilterExpression. The table itself is preferred, then indexes
+    whose range key can be used. Indexes that don't project every attribute
+    are never chosen since they couldn't return whole records, and neither
+    are indexes with a range key the condition doesn't constrain: an index
+    only holds the items that have its key attributes, so records without
+    the range attribute would be missing.
+
+    Parameters:
+    operation (string): query or scan
+    index_name (string): None for the table itself
+    key_condition (Condition): KeyConditionExpression of a query
+    filter_condition (Condition): what is left for the FilterExpression
+    """
+    def __init__(self, operation, index_name=None, key_condition=None, filter_condition=None):
+        self.operation = operation
+        self.index_name = index_name
+        self.key_condition = key_condition
+        self.filter_condition = filter_condition
+
+
+    @classmethod
+    def choose(cls, key_schemas, condition):
+        """ Picks the cheapest plan for a condition
+
+        Parameters:
+        key_schemas (list): (index name, hash key name, range key name) tuples, the table
+            itself first with index name None
+        condition (Condition): the filter, None scans everything
+
+        Return:
+        QueryPlan:
+        """
+        if condition is None:
+            return cls('scan')
+        condition = Condition.coerce(condition)
+        operands = list(condition.operands) if condition.operator == 'AND' else [condition]
+
+        best = None
+        for index_name, hash_name, range_name in key_schemas:
+            hash_condition = next((operand for operand in operands
+                                   if cls._is_key_condition(operand, hash_name)), None)
+            if hash_condition is None:
+                continue
+            range_condition = None
+            if range_name is not None:
+                range_condition = next((operand for operand in operands if operand is not hash_condition and
+                                        cls._is_key_condition(operand, range_name, range_key=True)), None)
+                if range_condition is None and index_name is not None:
+                    # sparse, items without range_name aren't in the index
+                    continue
+            score = 1 if range_condition is not None else 0
+            if best is None or score > best[0]:
+                best = (score, index_name, hash_condition, range_condition)
+
+        if best is None:
+            return cls('scan', filter_condition=condition)
+        score, index_name, hash_condition, range_condition = best
+        key_operands = [operand for operand in (hash_condition, range_condition) if operand is not None]
+        rest = [operand for operand in operands if not any(operand is key for key in key_operands)]
+        return cls(
+            'query',
+            index_name=index_name,
+            key_condition=key_operands[0] if len(key_operands) == 1 else Condition('AND', *key_operands),
+            filter_condition=None if not rest else rest[0] if len(rest) == 1 else Condition('AND', *rest),
+        )
+
+
+    @staticmethod
+    def _is_key_condition(condition, key_name, range_key=False):
+        """ Whether condition compares key_name with values in a way a KeyConditionExpression
+            allows, only equality is allowed on a hash key
+        """
+        operator, operands = condition.operator, condition.operands
+        if operator == 'compare':
+            comparator, operands = operands[0], operands[1:]
+            if comparator != '=' and not (range_key and comparator in RANGE_COMPARATORS):
+                return False
+        elif not (range_key and operator in ('between', 'begins_with')):
+            return False
+        subject, values = operands[0], operands[1:]
+        return isinstance(subject, Path) and subject.name == key_name and \
+            not any(isinstance(value, Operand) for value in values)
+
+
+    def params(self):
+        """ Request arguments of the plan, FilterExpression and KeyConditionExpression
+            use separate placeholder prefixes so they can share a request
+        """
+        params = {}
+        names = {}
+        values = {}
+        parts = []
+        if self.key_condition is not None:
+            parts.append(self.key_condition.compile('KeyConditionExpression', '#k', ':k'))
+        if self.filter_condition is not None:
+            parts.append(self.filter_condition.compile('FilterExpression'))
+        for part in parts:
+            names.update(part.pop('ExpressionAttributeNames', {}))
+            values.update(part.pop('ExpressionAttributeValues', {}))
+            params.update(part)
+        if names:
+            params['ExpressionAttributeNames'] = names
+        if values:
+            params['ExpressionAttributeValues'] = values
+        if self.index_name is not None:
+            params['IndexName'] = self.index_name
+        return params
+
+
+    def explain(self):
+        """ Readable description of the plan
+
+        Return:
+        dict: operation, index, key_condition and filter with attribute names filled in
+        """
+        return EXPLAIN(self.operation, self.params())
+
+
+    def __repr__(self):
+        return '<QueryPlan %s>' % self.explain()
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket(object):
+    """ Thread safe token bucket whose rate adapts to throttling (AIMD)
+
+    Tokens are capacity units. The cost of a request is only known once
+    DynamoDB reports its consumed capacity, so acquire() waits until the
+    bucket is out of debt and consume() charges the actual cost afterwards,
+    letting the balance go negative.
+
+    The rate is cut multiplicatively every time a request is throttled and
+    grows back linearly, by increase units per second every second, until it
+    reaches the target rate.
+
+    Parameters:
+    rate (float): target capacity units per second
+    burst (float): bucket size, defaults to one second worth of tokens
+    min_rate (float): the rate is never cut below this
+    increase (float): units per second the rate grows by each second, defaults to 10% of rate
+    decrease (float): factor the rate is multiplied by when throttled
+    """
+    def __init__(self, rate, burst=None, min_rate=1.0, increase=None, decrease=0.5):
+        self.target = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.min_rate = min(float(min_rate), self.target)
+        self.increase = float(increase if increase is not None else max(self.target * 0.1, 1.0))
+        self.decrease = decrease
+        self.tokens = self.burst
+        self.throttles = 0
+        self.consumed_units = 0.0
+        self.waited = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rate < self.target:
+            self.rate = min(self.target, self.rate + self.increase * elapsed)
+        self.tokens = min(self.burst, self.tokens + self.rate * elapsed)
+
+
+    def acquire(self, units=1.0):
+        """ Blocks until the bucket has tokens left then takes units from it
+
+        Parameters:
+        units (float): estimated cost of the request
+
+        Return:
+        float: seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens > 0:
+                    self.tokens -= units
+                    self.waited += waited
+                    return waited
+                delay = (-self.tokens + min(units, self.burst)) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+    def consume(self, units, estimate=0.0):
+        """ Charges capacity units reported by DynamoDB
+
+        Parameters:
+        units (float): capacity units consumed
+        estimate (float): units already taken by acquire(), they are refunded
+        """
+        with self._lock:
+            self.tokens -= units - estimate
+            self.consumed_units += units
+
+
+    def throttled(self):
+        """ Cuts the rate after DynamoDB rejected or left part of a request unprocessed
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+            self.throttles += 1
+            logger.debug('throttled, rate cut to %.1f units/s', self.rate)
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'target': self.target,
+                'tokens': self.tokens,
+                'consumed': self.consumed_units,
+                'throttles': self.throttles,
+                'waited': self.waited,
+            }
+
+
+
+class RateLimiter(object):
+    """ Paces the reads and writes made to one table
+
+    Every request the adapter makes for the table asks for ReturnConsumedCapacity
+    and is charged against the read or write bucket. Throttled requests cut the
+    rate of their bucket and are retried with backoff.
+
+        limiter = RateLimiter(read_rate=100, write_rate=50)
+        music = dyno('music', partition_key=('artist', 'str'), rate_limiter=limiter)
+
+    Parameters:
+    read_rate (float): read capacity units per second, defaults to the table's provisioned RCU
+    write_rate (float): write capacity units per second, defaults to the table's provisioned WCU
+    bucket_options (dict): burst, min_rate, increase and decrease passed to each TokenBucket
+    """
+    KINDS = ('read', 'write')
+
+    def __init__(self, read_rate=None, write_rate=None, **bucket_options):
+        self.bucket_options = bucket_options
+        self.buckets = {}
+        for kind, rate in zip(self.KINDS, (read_rate, write_rate)):
+            if rate:
+                self.buckets[kind] = TokenBucket(rate, **bucket_options)
+
+
+    def provision(self, throughput):
+        """ Uses the table's provisioned throughput for rates that weren't given
+
+        Parameters:
+        throughput (dict): ProvisionedThroughput from DescribeTable
+        """
+        throughput = throughput or {}
+        units = {'read': throughput.get('ReadCapacityUnits'), 'write': throughput.get('WriteCapacityUnits')}
+        for kind in self.KINDS:
+            # on-demand tables report 0 units
+            if kind not in self.buckets and units[kind]:
+                self.buckets[kind] = TokenBucket(units[kind], **self.bucket_options)
+
+
+    def acquire(self, kind, units=1.0):
+        bucket = self.buckets.get(kind)
+        return bucket.acquire(units) if bucket is not None else 0.0
+
+
+    def consume(self, kind, units, estimate=0.0):
+        bucket = self.buckets.get(kind)
+        if bucket is not None:
+            bucket.consume(units, estimate)
+
+
+    def throttled(self, kind):
+        bucket = self.buckets.get(kind)
+        if bucket is not None:
+            bucket.throttled()
+
+
+    def stats(self):
+        """ Current rate, token balance, consumed units and throttle count of each bucket
+        """
+        return {kind: bucket.stats() for kind, bucket in self.buckets.items()}
@@ -0,0 +1,14 @@
+import os
+
+from dynosql.adapters.memory import InMemoryAdapter
+
+# set DYNOSQL_ENDPOINT_URL (e.g. http://localhost:8000/) to run the tests against DynamoDB
+ENDPOINT_URL = os.environ.get('DYNOSQL_ENDPOINT_URL')
+
+
+def dyno_options():
+    """ Dynosql arguments used by the tests, an InMemoryAdapter unless an endpoint is configured
+    """
+    if ENDPOINT_URL:
+        return {'endpoint_url': ENDPOINT_URL}
+    return {'adapter': InMemoryAdapter()}
@@ -0,0 +1,75 @@
+#!env/bin/python3
+import asyncio
+import threading
+import unittest
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+from dynosql.async_dynosql import AsyncDynosql
+from dynosql.adapters.botocore import BotocoreAdapter
+from tests import ENDPOINT_URL, dyno_options
+
+
+class AsyncFunctionalTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.dyno = AsyncDynosql(max_concurrency=4, **dyno_options())
+        self.music = await self.dyno(table_name='music', partition_key=('artist', 'str',), sort_key=('song', 'str',))
+
+    async def asyncTearDown(self):
+        await self.music.drop()
+        self.dyno.close()
+
+    async def test_put_get_delete(self):
+        await self.music.put(('Prince', 'Purple Rain'), {'released': 1984, 'album': 'Purple Rain'})
+        self.assertEqual((await self.music.get(('Prince', 'Purple Rain')))['released'], 1984)
+        self.assertEqual(await self.music.get(('Prince', 'Purple Rain'), attributes=['album']),
+                         {'artist': 'Prince', 'song': 'Purple Rain', 'album': 'Purple Rain'})
+        await self.music.delete(('Prince', 'Purple Rain'))
+        with self.assertRaises(KeyError):
+            await self.music.get(('Prince', 'Purple Rain'))
+
+    async def test_concurrent_puts_and_filter(self):
+        await asyncio.gather(*(
+            self.music.put(('Prince', 'Song %d' % i), {'released': 1980 + i % 2}) for i in range(20)
+        ))
+        records = [record async for record in self.music.filter(self.music.released == 1981, page_size=3)]
+        self.assertEqual(len(records), 10)
+        self.assertEqual(len(await self.music.query('Prince', slice('Song 3', 'Song 4')).list()), 2)
+        self.assertEqual(await self.music.query('Prince').count(parallel=3), 20)
+
+    async def test_bound_table_described_off_loop(self):
+        await self.music.put(('Prince', 'Kiss'), {'released': 1986})
+        adapter = self.dyno.adapter.adapter
+        adapter.metadata.invalidate(adapter.metadata_scope, 'music')
+        other = AsyncDynosql(adapter=BotocoreAdapter(endpoint_url=ENDPOINT_URL, client=adapter.client,
+                                                     metadata=adapter.metadata))
+        threads = []
+        describe_table = other.adapter.adapter.describe_table
+
+        def describe(table_name):
+            threads.append(threading.current_thread())
+            return describe_table(table_name)
+
+        other.adapter.adapter.describe_table = describe
+        try:
+            music = other.table('music')
+            self.assertEqual(await music.filter(music.released == 1986).count(), 1)
+            self.assertEqual(len(await music.query('Prince').select('released').list()), 1)
+        finally:
+            other.close()
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    async def test_record_update(self):
+        await self.music.put(('Prince', 'Kiss'), {'released': 1985})
+        record = self.music.record(('Prince', 'Kiss'))
+        await record.update({'released': 1986, 'album': 'Parade'})
+        self.assertEqual(await record.get('album'), 'Parade')
+        self.assertEqual((await record.fetch())['released'], 1986)
+
+
+if __name__ == '__main__':
+    unittest.main()
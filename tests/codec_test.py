@@ -0,0 +1,80 @@
+#!env/bin/python3
+import unittest
+
+from decimal import Decimal
+
+from dynosql.codec import Codec, KeyEncoder, decode_item, encode_item, encode_value
+
+
+class CodecTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        record = {
+            'album': 'Purple Rain',
+            'released': 1984,
+            'rating': 4.5,
+            'offset': -3,
+            'explicit': False,
+            'producer': None,
+            'cover': b'\x89PNG',
+            'charts': {'us': 1, 'uk': [7, 'gold']},
+            'tags': {'funk', 'rock'},
+            'weeks': {12, 24},
+        }
+        self.assertEqual(decode_item(encode_item(record)), record)
+
+    def test_encode_types(self):
+        self.assertEqual(encode_value(True), {'BOOL': True})
+        self.assertEqual(encode_value(Decimal('1.50')), {'N': '1.50'})
+        self.assertEqual(encode_value((1, 'a')), {'L': [{'N': '1'}, {'S': 'a'}]})
+        self.assertEqual(encode_value({'a': {'b': 1}}), {'M': {'a': {'M': {'b': {'N': '1'}}}}})
+        with self.assertRaises(ValueError):
+            encode_value(set())
+        with self.assertRaises(TypeError):
+            encode_value(object())
+
+    def test_type_hints(self):
+        codec = Codec({'released': 'float', 'song': 'str'})
+        item = codec.decode_item({'song': {'S': 'Kiss'}, 'released': {'N': '1986'}, 'producer': {'NULL': True}})
+        self.assertEqual(item, {'song': 'Kiss', 'released': 1986.0, 'producer': None})
+        self.assertIsInstance(item['released'], float)
+        self.assertIsNone(codec.decode_item({'released': {'NULL': True}})['released'])
+        # values that don't fit the declared type are inferred instead of failing the read
+        codec = Codec({'released': 'int'})
+        self.assertEqual(codec.decode_item({'released': {'N': '1.5'}}), {'released': 1.5})
+        self.assertEqual(codec.decode_item({'released': {'N': '1986'}}), {'released': 1986})
+        with self.assertRaises(ValueError):
+            Codec({'released': 'date'})
+
+    def test_key_encoder(self):
+        composite = KeyEncoder(('artist', 'str'), ('released', 'int'))
+        self.assertEqual(composite.encode(('Prince', 1984)),
+                         {'artist': {'S': 'Prince'}, 'released': {'N': '1984'}})
+        self.assertEqual(composite.encode(['Prince', 1984]), composite.encode(('Prince', 1984)))
+        key = composite.encode(('Prince', 1984))
+        key['artist']['S'] = 'Madonna'
+        del key['released']
+        self.assertEqual(composite.encode(('Prince', 1984)),
+                         {'artist': {'S': 'Prince'}, 'released': {'N': '1984'}})
+        with self.assertRaises(KeyError):
+            composite.encode(['Prince'])
+        with self.assertRaises(TypeError) as error:
+            composite.encode(['Prince', [1984]])
+        self.assertIn('released', str(error.exception))
+        with self.assertRaises(KeyError):
+            composite.encode('Prince')
+        with self.assertRaises(TypeError):
+            composite.encode(('Prince', '1984'))
+
+        simple = KeyEncoder(('song', 'str'))
+        self.assertEqual(simple.encode('ab'), {'song': {'S': 'ab'}})
+        with self.assertRaises(KeyError):
+            simple.encode(('Prince', 'Kiss'))
+        with self.assertRaises(KeyError):
+            simple.encode(['Prince', 'Kiss'])
+        with self.assertRaises(ValueError):
+            KeyEncoder(('song', 'list'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+#!env/bin/python3
+import os
+import tempfile
+import unittest
+
+from dynosql import dynosql
+from dynosql import dyno_columns
+from tests import dyno_options
+
+
+class ColumnsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dyno = dynosql.Dynosql(**dyno_options())
+        self.music = self.dyno(table_name='music', partition_key=('artist', 'str',), sort_key=('song', 'str',),
+                               released='int', rating='float')
+        self.music.extend({'artist': 'Prince', 'song': 'Song %02d' % i, 'released': 1980 + i, 'rating': i / 2,
+                           'tags': ['pop'] * (i % 3)} for i in range(30))
+        self.music['Prince', 'Untitled'] = {'label': 'Warner'}
+
+    def tearDown(self):
+        self.music.drop()
+
+    def test_batches(self):
+        result = self.music.filter(page_size=7)
+        batches = list(result.columns().batches())
+        self.assertEqual(len(batches), 5)
+        self.assertEqual(list(batches[0]), ['artist', 'song', 'rating', 'released', 'tags'])
+        columns = {name: sum((batch[name] for batch in batches), []) for name in batches[0]}
+        self.assertEqual(len(columns['song']), 31)
+        self.assertEqual(columns['released'][:3], [1980, 1981, 1982])
+        self.assertEqual(columns['tags'][2], ['pop', 'pop'])
+        self.assertIsNone(columns['released'][-1])
+
+        batches = list(self.music.filter(self.music.released > 2005).columns(['released']).batches())
+        self.assertEqual(sum((batch['released'] for batch in batches), []), [2006, 2007, 2008, 2009])
+
+    @unittest.skipIf(dyno_columns.pyarrow is None, 'pyarrow is not installed')
+    def test_to_arrow_and_parquet(self):
+        table = self.music.to_arrow(columns=['released', 'rating'])
+        self.assertEqual(table.num_rows, 31)
+        self.assertEqual(str(table.schema.field('released').type), 'int64')
+        self.assertEqual(table.column('rating').null_count, 1)
+        self.assertEqual(self.music.to_arrow(self.music.released < 0).num_rows, 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'music.parquet')
+            self.assertEqual(self.music.filter(page_size=40).to_parquet(path), 31)
+            written = dyno_columns.pyarrow.parquet.read_table(path)
+            self.assertEqual(written.num_rows, 31)
+            self.assertEqual(written.column_names, ['artist', 'song', 'label', 'rating', 'released', 'tags'])
+
+    @unittest.skipIf(dyno_columns.pyarrow is None, 'pyarrow is not installed')
+    def test_undeclared_types_across_pages(self):
+        # whole numbers on the first pages then fractions, no plays at all on the first page
+        for i in range(30):
+            self.music['Prince', 'Song %02d' % i]['score'] = i if i < 20 else i + 0.5
+            if i >= 10:
+                self.music['Prince', 'Song %02d' % i]['plays'] = i * 100
+        columns = ['song', 'score', 'plays']
+        table = self.music.filter(page_size=7).to_arrow(columns=columns)
+        self.assertEqual(table.num_rows, 31)
+        self.assertEqual(str(table.schema.field('score').type), 'double')
+        self.assertEqual(str(table.schema.field('plays').type), 'double')
+        self.assertEqual(table.column('score').to_pylist()[29], 29.5)
+        self.assertEqual(table.column('plays').to_pylist()[:11], [None] * 10 + [1000])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'music.parquet')
+            self.assertEqual(self.music.filter(page_size=4).to_parquet(path, columns=columns), 31)
+            self.assertEqual(dyno_columns.pyarrow.parquet.read_table(path).column('score').to_pylist()[29], 29.5)
+
+    @unittest.skipIf(dyno_columns.pyarrow is None, 'pyarrow is not installed')
+    def test_empty_parquet(self):
+        adapter = self.dyno.adapter
+        paginate = adapter.paginate
+        calls = []
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return paginate(*args, **kwargs)
+
+        adapter.paginate = counting
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'music.parquet')
+                self.assertEqual(self.music.filter(self.music.released < 0).to_parquet(path), 0)
+                written = dyno_columns.pyarrow.parquet.read_table(path)
+        finally:
+            del adapter.paginate
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(written.num_rows, 0)
+        self.assertEqual(written.column_names, ['artist', 'song', 'rating', 'released'])
+
+    def test_late_attributes(self):
+        self.music['Prince', 'Song 29']['producer'] = 'Prince'
+        batches = list(self.music.filter(page_size=7).columns().batches())
+        self.assertNotIn('producer', batches[0])
+        self.assertEqual(list(batches[-1])[-2:], ['label', 'producer'])
+
+    @unittest.skipIf(dyno_columns.pyarrow is None, 'pyarrow is not installed')
+    def test_late_attributes_arrow(self):
+        self.music['Prince', 'Song 29']['producer'] = 'Prince'
+        table = self.music.filter(page_size=7).to_arrow()
+        self.assertEqual(table.column_names, ['artist', 'song', 'rating', 'released', 'tags', 'label', 'producer'])
+        self.assertEqual(table.column('producer').to_pylist().count('Prince'), 1)
+        self.assertEqual(table.column('label').to_pylist()[-1], 'Warner')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'music.parquet')
+            with self.assertRaises(ValueError):
+                self.music.filter(page_size=7).to_parquet(path)
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(self.music.filter(page_size=7).to_parquet(path, columns=table.column_names), 31)
+
+    @unittest.skipIf(dyno_columns.numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        records = self.music.to_numpy(columns=['released', 'tags'])
+        self.assertEqual(len(records), 31)
+        self.assertEqual(records.released[0], 1980)
+        self.assertEqual(records.tags[2], ['pop', 'pop'])
+
+        self.music['Prince', 'Song 29']['producer'] = 'Prince'
+        records = self.music.filter(page_size=7).to_numpy()
+        self.assertEqual(records.dtype.names[-2:], ('label', 'producer'))
+        self.assertEqual(list(records.producer).count('Prince'), 1)
+
+    @unittest.skipIf(dyno_columns.pyarrow is not None, 'pyarrow is installed')
+    def test_missing_pyarrow(self):
+        with self.assertRaises(ImportError):
+            self.music.to_arrow()
+
+
+if __name__ == '__main__':
+    unittest.main()
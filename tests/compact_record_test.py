@@ -0,0 +1,51 @@
+#!env/bin/python3
+import pickle
+import unittest
+
+from dynosql import dynosql
+from dynosql.compact_record import CompactRecord
+from tests import dyno_options
+
+
+class CompactRecordTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dyno = dynosql.Dynosql(**dyno_options())
+        self.music = self.dyno(table_name='music', partition_key=('artist', 'str',), sort_key=('song', 'str',),
+                               released='int', album='str')
+        self.music.extend({'artist': 'Prince', 'song': 'Song %02d' % i, 'released': 1980 + i, 'album': 'Album %d' % (i % 3),
+                           'charts': {'us': i}} for i in range(20))
+
+    def tearDown(self):
+        self.music.drop()
+
+    def test_compact_scan(self):
+        records = list(self.music.scan(page_size=6).compact())
+        self.assertEqual(len(records), 20)
+        record = records[1]
+        self.assertIsInstance(record, CompactRecord)
+        self.assertIs(type(record), type(records[0]))
+        self.assertEqual(record.fields, ('artist', 'song', 'album', 'released'))
+        self.assertEqual(record['released'], 1981)
+        self.assertEqual(record[0], 'Prince')
+        self.assertEqual(dict(record), {'artist': 'Prince', 'song': 'Song 01', 'album': 'Album 1', 'released': 1981})
+        self.assertIsNone(record.get('charts'))
+        with self.assertRaises(KeyError):
+            record['charts']
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_compact_selection_and_aggregates(self):
+        result = self.music.filter(self.music.released >= 1990).compact('song', 'charts.us')
+        record = result[0]
+        self.assertEqual(record.fields, ('song', 'charts'))
+        self.assertEqual(record['charts'], {'us': 10})
+        self.assertEqual(result.sum('charts.us'), sum(range(10, 20)))
+        self.assertEqual(result.group_by('album').count(), {'Album 0': 3, 'Album 1': 4, 'Album 2': 3})
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.music['Prince', 'Song 01'], '__dict__'))
+        self.assertFalse(hasattr(self.music.released, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
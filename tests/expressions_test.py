@@ -0,0 +1,62 @@
+#!env/bin/python3
+import unittest
+
+from dynosql.dyno_attribute import DynoAttribute
+from dynosql.expressions import RENDER_CONDITION, Condition, Placeholders, UpdateExpression
+
+
+class ExpressionsTestCase(unittest.TestCase):
+
+    def test_compile(self):
+        released, album = DynoAttribute('released'), DynoAttribute('album')
+        params = ((released.between(1990, 1999) | ~album.exists()) & (album.size() > 3)).compile()
+        self.assertEqual(params['FilterExpression'],
+                         '((#n0 BETWEEN :v0 AND :v1) OR (NOT (attribute_exists(#n1)))) AND (size(#n1) > :v2)')
+        self.assertEqual(params['ExpressionAttributeNames'], {'#n0': 'released', '#n1': 'album'})
+        self.assertEqual(params['ExpressionAttributeValues'], {':v0': {'N': '1990'}, ':v1': {'N': '1999'},
+                                                               ':v2': {'N': '3'}})
+
+    def test_document_paths(self):
+        params = DynoAttribute('charts.us[0]').isin([1, 2]).compile('ConditionExpression', '#c', ':c')
+        self.assertEqual(params['ConditionExpression'], '#c0.#c1[0] IN (:c0, :c1)')
+        self.assertEqual(Placeholders().path('charts.us[0].weeks'), '#n0.#n1[0].#n2')
+
+    def test_many_placeholders(self):
+        condition = DynoAttribute('a0') == 0
+        for i in range(1, 40):
+            condition = condition | (DynoAttribute('a%d' % i) == i)
+        params = condition.compile()
+        self.assertEqual(len(params['ExpressionAttributeNames']), 40)
+        self.assertEqual(params['ExpressionAttributeValues'][':v39'], {'N': '39'})
+
+    def test_compiled_once_per_structure(self):
+        RENDER_CONDITION.cache_clear()
+        for year in range(10):
+            params = ((DynoAttribute('released') == year) & DynoAttribute('album').begins_with('P')).compile()
+            self.assertEqual(params['ExpressionAttributeValues'][':v0'], {'N': str(year)})
+        self.assertEqual(RENDER_CONDITION.cache_info().misses, 1)
+        self.assertEqual(RENDER_CONDITION.cache_info().hits, 9)
+
+    def test_update_functions(self):
+        params = UpdateExpression().append('tags', ('pop',)).set_if_not_exists('plays', 0).add('views', 1).compile()
+        self.assertEqual(params['UpdateExpression'],
+                         'SET #n0 = list_append(if_not_exists(#n0, :v0), :v1), #n1 = if_not_exists(#n1, :v2) '
+                         'ADD #n2 :v3')
+        self.assertEqual(params['ExpressionAttributeValues'][':v0'], {'L': []})
+
+        update = UpdateExpression().add('stats.plays', 1).remove('tags[0]')
+        params = update.compile()
+        self.assertEqual(params['UpdateExpression'], 'REMOVE #n2[0] ADD #n0.#n1 :v0')
+        self.assertEqual(params['ExpressionAttributeNames'], {'#n0': 'stats', '#n1': 'plays', '#n2': 'tags'})
+        self.assertEqual(update.nested(), {'stats', 'tags'})
+
+    def test_tuple_and_misuse(self):
+        self.assertEqual(Condition.coerce(('released', '<>', 1)).compile()['FilterExpression'], '#n0 <> :v0')
+        with self.assertRaises(TypeError):
+            (DynoAttribute('a') == 1) and (DynoAttribute('b') == 2)
+        with self.assertRaises(ValueError):
+            DynoAttribute('a').isin([])
+
+
+if __name__ == '__main__':
+    unittest.main()
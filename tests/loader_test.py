@@ -0,0 +1,77 @@
+#!env/bin/python3
+import json
+import os
+import tempfile
+import unittest
+
+from dynosql import dynosql
+from dynosql.loader import Loader
+from tests import dyno_options
+
+
+class LoaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dyno = dynosql.Dynosql(**dyno_options())
+        self.music = self.dyno(table_name='music', partition_key=('artist', 'str',), sort_key=('song', 'int',),
+                               released='int', rating='float')
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.music.drop()
+        self.directory.cleanup()
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as input_file:
+            input_file.write('\n'.join(lines) + '\n')
+        return path
+
+    def test_csv(self):
+        path = self.write('music.csv', ['artist,song,released,rating,album'] +
+                          ['Prince,%d,%d,%s,"Album, %d"' % (i, 1980 + i, i / 2, i) for i in range(100)] +
+                          ['Prince,100,,,"multi\nline"'])
+        stats = self.music.load(path, workers=3)
+        self.assertEqual(stats['rows'], 101)
+        self.assertEqual(stats['offset'], os.path.getsize(path))
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+        self.assertEqual(self.music['Prince', 7].json,
+                         {'artist': 'Prince', 'song': 7, 'released': 1987, 'rating': 3.5, 'album': 'Album, 7'})
+        self.assertEqual(self.music['Prince', 100].json, {'artist': 'Prince', 'song': 100, 'album': 'multi\nline'})
+
+    def test_resume_from_checkpoint(self):
+        path = self.write('music.jsonl', [json.dumps({'artist': 'Prince', 'song': i, 'plays': i * 1.5})
+                                          for i in range(200)])
+        adapter = self.dyno.adapter
+        batch_write = adapter.batch_write
+        calls = []
+
+        def failing(table_name, records, **kwargs):
+            calls.append(len(records))
+            if len(calls) == 4:
+                raise RuntimeError('connection reset')
+            return batch_write(table_name, records, **kwargs)
+
+        adapter.batch_write = failing
+        try:
+            with self.assertRaises(RuntimeError):
+                Loader(adapter, 'music', path, workers=1).run()
+        finally:
+            del adapter.batch_write
+        with open(path + '.checkpoint') as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        self.assertEqual(checkpoint['rows'], 75)
+
+        stats = self.music.load(path, workers=4)
+        self.assertEqual(stats['rows'], 200)
+        self.assertEqual(stats['resumed_from'], checkpoint['offset'])
+        self.assertEqual(self.music.count(), 200)
+        self.assertEqual(self.music['Prince', 199]['plays'], 298.5)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.music.load(self.write('music.txt', ['Prince']))
+
+
+if __name__ == '__main__':
+    unittest.main()
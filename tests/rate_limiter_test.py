@@ -0,0 +1,48 @@
+#!env/bin/python3
+import time
+import unittest
+
+from dynosql.rate_limiter import RateLimiter, TokenBucket
+
+
+class RateLimiterTestCase(unittest.TestCase):
+
+    def test_paces_to_rate(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_consumed_capacity_is_charged(self):
+        bucket = TokenBucket(rate=100, burst=10)
+        bucket.acquire()
+        bucket.consume(29)
+        self.assertLess(bucket.tokens, 0)
+        self.assertGreater(bucket.acquire(), 0.15)
+
+    def test_throttling_cuts_rate_then_recovers(self):
+        bucket = TokenBucket(rate=100, increase=1000, min_rate=10)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 50)
+        for _ in range(5):
+            bucket.throttled()
+        self.assertEqual(bucket.rate, 10)
+        time.sleep(0.1)
+        bucket.acquire()
+        self.assertEqual(bucket.rate, 100)
+        self.assertEqual(bucket.stats()['throttles'], 6)
+
+    def test_provisioned_rates(self):
+        limiter = RateLimiter(write_rate=50)
+        limiter.provision({'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5})
+        self.assertEqual(limiter.buckets['read'].target, 5)
+        self.assertEqual(limiter.buckets['write'].target, 50)
+        on_demand = RateLimiter()
+        on_demand.provision({'ReadCapacityUnits': 0, 'WriteCapacityUnits': 0})
+        self.assertEqual(on_demand.acquire('read'), 0.0)
+        self.assertEqual(on_demand.stats(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
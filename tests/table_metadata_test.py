@@ -0,0 +1,55 @@
+#!env/bin/python3
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dynosql.adapters.table_metadata import TableMetadata
+
+
+DESCRIPTION = {
+    'TableName': 'music',
+    'KeySchema': [{'AttributeName': 'artist', 'KeyType': 'HASH'}],
+    'AttributeDefinitions': [{'AttributeName': 'artist', 'AttributeType': 'S'}],
+    'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5,
+                              'LastIncreaseDateTime': datetime.datetime(2020, 1, 1)},
+    'CreationDateTime': datetime.datetime(2020, 1, 1),
+    'ItemCount': 12,
+}
+
+
+class TableMetadataTestCase(unittest.TestCase):
+
+    def test_only_the_schema_is_kept(self):
+        metadata = TableMetadata()
+        metadata.set('local', 'music', DESCRIPTION)
+        cached = metadata.get('local', 'music')
+        self.assertEqual(sorted(cached), ['AttributeDefinitions', 'KeySchema', 'ProvisionedThroughput', 'TableName'])
+        self.assertEqual(cached['ProvisionedThroughput'], {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5})
+        self.assertIsNone(metadata.get('other', 'music'))
+        metadata.invalidate('local', 'music')
+        self.assertIsNone(metadata.get('local', 'music'))
+
+    def test_file_is_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache', 'tables.json')
+            TableMetadata(path=path).set('local', 'music', DESCRIPTION)
+            self.assertEqual(TableMetadata(path=path).get('local', 'music')['TableName'], 'music')
+
+            with open(path, 'w') as cache_file:
+                cache_file.write('{not json')
+            self.assertEqual(len(TableMetadata(path=path)), 0)
+
+    def test_entries_expire(self):
+        metadata = TableMetadata(ttl=60)
+        with mock.patch('time.time', return_value=1000):
+            metadata.set('local', 'music', DESCRIPTION)
+        with mock.patch('time.time', return_value=1059):
+            self.assertIsNotNone(metadata.get('local', 'music'))
+        with mock.patch('time.time', return_value=1061):
+            self.assertIsNone(metadata.get('local', 'music'))
+
+
+if __name__ == '__main__':
+    unittest.main()